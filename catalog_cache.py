@@ -0,0 +1,167 @@
+import os
+import json
+import struct
+import numpy as np
+from sgp4.api import Satrec, WGS72
+
+CACHE_MAGIC = b'SDTCAT\x00\x00'
+CACHE_VERSION = 1
+HEADER_ALIGN = 64
+
+# Julian date of the SGP4 epoch origin, 1949 December 31 00:00 UT.
+SGP4_EPOCH_JD = 2433281.5
+
+# One fixed-width record per object: the SGP4 mean elements in the units
+# Satrec uses, plus what is needed to rebuild the catalog entry.
+ELEMENT_DTYPE = np.dtype([
+    ('norad', '<i4'),
+    ('epoch_jd', '<f8'),
+    ('epoch_fraction', '<f8'),
+    ('bstar', '<f8'),
+    ('ndot', '<f8'),
+    ('nddot', '<f8'),
+    ('inclo', '<f8'),
+    ('nodeo', '<f8'),
+    ('ecco', '<f8'),
+    ('argpo', '<f8'),
+    ('mo', '<f8'),
+    ('no_kozai', '<f8'),
+    ('revnum', '<i4'),
+    ('elnum', '<i4'),
+    ('groups', '<u8'),
+    ('classification', 'S1'),
+    ('intldesg', 'S11'),
+    ('name', 'S24'),
+])
+
+
+def source_fingerprint(paths):
+    """Name, size and modification time of every source file, in a stable order."""
+    fingerprint = []
+    for path in sorted(paths):
+        stat = os.stat(path)
+        fingerprint.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+_ELEMENT_ATTRIBUTES = (('norad', 'satnum'), ('epoch_jd', 'jdsatepoch'), ('epoch_fraction', 'jdsatepochF'),
+                       ('bstar', 'bstar'), ('ndot', 'ndot'), ('nddot', 'nddot'), ('inclo', 'inclo'),
+                       ('nodeo', 'nodeo'), ('ecco', 'ecco'), ('argpo', 'argpo'), ('mo', 'mo'),
+                       ('no_kozai', 'no_kozai'), ('revnum', 'revnum'), ('elnum', 'elnum'))
+
+
+def records_from_satrecs(satrecs, names=None, groups=None):
+    """Pack a list of Satrecs into an ELEMENT_DTYPE array, one column at a time."""
+    records = np.zeros(len(satrecs), dtype=ELEMENT_DTYPE)
+    for field, attribute in _ELEMENT_ATTRIBUTES:
+        records[field] = [getattr(satrec, attribute) for satrec in satrecs]
+    records['classification'] = [(satrec.classification or 'U').encode('ascii', 'replace')[:1] for satrec in satrecs]
+    records['intldesg'] = [(satrec.intldesg or '').encode('ascii', 'replace')[:11] for satrec in satrecs]
+    if names is not None:
+        records['name'] = [(name or '').strip().encode('utf-8', 'replace')[:24] for name in names]
+    if groups is not None:
+        records['groups'] = groups
+    return records
+
+
+_SATREC_FIELDS = ('norad', 'epoch_jd', 'epoch_fraction', 'bstar', 'ndot', 'nddot', 'ecco',
+                  'argpo', 'inclo', 'mo', 'no_kozai', 'nodeo', 'classification', 'intldesg',
+                  'elnum', 'revnum')
+
+
+def _satrec(norad, epoch_jd, epoch_fraction, bstar, ndot, nddot, ecco, argpo, inclo, mo,
+            no_kozai, nodeo, classification, intldesg, elnum, revnum):
+    satrec = Satrec()
+    satrec.sgp4init(WGS72, 'i', norad, epoch_jd - SGP4_EPOCH_JD + epoch_fraction,
+                    bstar, ndot, nddot, ecco, argpo, inclo, mo, no_kozai, nodeo)
+    satrec.classification = classification.decode('ascii') or 'U'
+    satrec.intldesg = intldesg.decode('ascii')
+    satrec.elnum = elnum
+    satrec.revnum = revnum
+    return satrec
+
+
+def satrec_from_elements(record):
+    """Initialise an SGP4 Satrec directly from a packed record, without any text parsing."""
+    return _satrec(*(record[field].item() for field in _SATREC_FIELDS))
+
+
+def satrecs_from_records(records):
+    """Satrec for every record, reading the columns in bulk rather than record by record."""
+    columns = [records[field].tolist() for field in _SATREC_FIELDS]
+    return [_satrec(*values) for values in zip(*columns)]
+
+
+def catalog_to_records(catalog):
+    """
+    Convert a DebrisCatalog into a record array plus the list of group names
+    the records' group bitmasks refer to.
+    """
+    group_names = sorted({group for groups in catalog.groups.values() for group in groups})
+    if len(group_names) > 64:
+        raise ValueError(f"Too many groups to pack into a bitmask: {len(group_names)}")
+    bits = {group: 1 << i for i, group in enumerate(group_names)}
+
+    masks = []
+    for norad_id in catalog.entries:
+        mask = 0
+        for group in catalog.groups.get(norad_id, ()):
+            mask |= bits[group]
+        masks.append(mask)
+    names = [entry.name for entry in catalog.entries.values()]
+    return records_from_satrecs(catalog.satrecs(), names, masks), group_names
+
+
+def write_catalog_cache(path, records, group_names, fingerprint):
+    """
+    Write records to path as a versioned binary file: magic, version and a
+    JSON header, padded so the fixed-width records that follow can be
+    memory-mapped.  The file is written to a temporary name and renamed so
+    readers never see a partial file.
+    """
+    header = json.dumps({
+        'count': len(records),
+        'dtype': ELEMENT_DTYPE.descr,
+        'groups': list(group_names),
+        'sources': fingerprint,
+    }).encode('utf-8')
+    prefix = len(CACHE_MAGIC) + struct.calcsize('<HI')
+    padding = (-(prefix + len(header))) % HEADER_ALIGN
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(CACHE_MAGIC)
+        f.write(struct.pack('<HI', CACHE_VERSION, len(header) + padding))
+        f.write(header + b' ' * padding)
+        f.write(np.ascontiguousarray(records, dtype=ELEMENT_DTYPE).tobytes())
+    os.replace(temp_path, path)
+
+
+def read_catalog_cache(path):
+    """
+    Memory-map a catalog cache file.  Returns (header, records), or None if
+    the file is missing, truncated or was written by another format version.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            magic = f.read(len(CACHE_MAGIC))
+            if magic != CACHE_MAGIC:
+                return None
+            version, header_size = struct.unpack('<HI', f.read(struct.calcsize('<HI')))
+            if version != CACHE_VERSION:
+                return None
+            header = json.loads(f.read(header_size).decode('utf-8'))
+        offset = len(CACHE_MAGIC) + struct.calcsize('<HI') + header_size
+        count = header['count']
+        if os.path.getsize(path) < offset + count * ELEMENT_DTYPE.itemsize:
+            return None
+        if count == 0:
+            return header, np.zeros(0, dtype=ELEMENT_DTYPE)
+        records = np.memmap(path, dtype=ELEMENT_DTYPE, mode='r', offset=offset, shape=(count,))
+        return header, records
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        print(f"Could not read catalog cache {path}: {str(e)}")
+        return None
+
@@ -0,0 +1,319 @@
+import sys
+import time
+import numpy as np
+from satellite_array import SatelliteArray, time_arrays
+
+DAY_S = 86400.0
+# Twice the largest gravitational acceleration an orbit sees (km/s^2): the
+# most two objects' relative motion can bend away from a straight line.
+MAX_RELATIVE_ACCELERATION = 2 * 398600.4418 / 6378.135 ** 2
+# Faster than escape speed at the surface: SGP4 output from a decayed or
+# broken element set, treated as a failed propagation.
+MAX_ORBITAL_SPEED_KM_S = 12.0
+# How far SGP4's short-period terms can take the radius away from the
+# mean-element perigee-apogee band (km), with room to spare.
+SHORT_PERIOD_MARGIN_KM = 50.0
+
+# Neighbouring cells (dx, dy, dz) that come after (0, 0, 0) in lexicographic
+# order: looking only at these, and at the cell itself, finds every pair of
+# adjacent cells exactly once.
+HALF_NEIGHBOURHOOD = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                      if (dx, dy, dz) >= (0, 0, 0)]
+
+
+def close_pairs(positions, radius):
+    """
+    Index pairs (i, j), i < j, of the points in positions (n, 3) that are
+    less than radius apart.  Points are hashed into cubic cells of side
+    radius, so only points in the same or adjacent cells are compared.
+    """
+    n = len(positions)
+    if n < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    cells = np.floor(positions / radius).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    dims = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    firsts, seconds = [], []
+    for dx, dy, dz in HALF_NEIGHBOURHOOD:
+        neighbour = keys + (dx * dims[1] + dy) * dims[2] + dz
+        lo = np.searchsorted(sorted_keys, neighbour, side='left')
+        counts = np.searchsorted(sorted_keys, neighbour, side='right') - lo
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        first = np.repeat(np.arange(n), counts)
+        # Position of each pair within its point's run of neighbours.
+        within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[np.repeat(lo, counts) + within]
+        if (dx, dy, dz) == (0, 0, 0):
+            keep = first < second
+            first, second = first[keep], second[keep]
+        firsts.append(first)
+        seconds.append(second)
+    if not firsts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    first, second = np.concatenate(firsts), np.concatenate(seconds)
+    offset = positions[second] - positions[first]
+    near = np.einsum('ij,ij->i', offset, offset) < radius * radius
+    first, second = first[near], second[near]
+    return np.minimum(first, second), np.maximum(first, second)
+
+
+def closest_approach(dr, dv, limit):
+    """
+    Time (s) within [-limit, limit] and distance (km) of closest approach
+    for straight-line relative motion from offsets dr and velocities dv.
+    """
+    speed2 = np.einsum('ij,ij->i', dv, dv)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tau = np.nan_to_num(-np.einsum('ij,ij->i', dr, dv) / speed2)
+    tau = np.clip(tau, -limit, limit)
+    miss = dr + dv * tau[:, None]
+    return tau, np.sqrt(np.einsum('ij,ij->i', miss, miss))
+
+
+def band_overlap(perigee_km, apogee_km, margin_km):
+    """
+    Mask of objects whose perigee-apogee altitude band, widened by
+    margin_km, overlaps that of at least one other object.  An object alone
+    in its band can never come close to anything.
+    """
+    order = np.argsort(perigee_km, kind='stable')
+    perigee, apogee = perigee_km[order], apogee_km[order]
+    highest_before = np.concatenate([[-np.inf], np.maximum.accumulate(apogee)[:-1]])
+    overlaps = highest_before >= perigee - margin_km
+    overlaps[:-1] |= perigee[1:] <= apogee[:-1] + margin_km
+    mask = np.zeros(len(order), dtype=bool)
+    mask[order] = overlaps
+    return mask
+
+
+def mean_bands(satrecs, jd, fractions):
+    """
+    Perigee and apogee altitudes (km) spanning each object's mean elements
+    at every one of the given times, so drag decay over the window is
+    covered.  Objects that fail to propagate keep their epoch band.
+    """
+    perigee = np.array([sat.altp * sat.radiusearthkm for sat in satrecs], dtype=float)
+    apogee = np.array([sat.alta * sat.radiusearthkm for sat in satrecs], dtype=float)
+    for i, sat in enumerate(satrecs):
+        for fraction in fractions:
+            if sat.sgp4(jd, fraction)[0] == 0:
+                perigee[i] = min(perigee[i], (sat.am * (1.0 - sat.em) - 1.0) * sat.radiusearthkm)
+                apogee[i] = max(apogee[i], (sat.am * (1.0 + sat.em) - 1.0) * sat.radiusearthkm)
+    return perigee, apogee
+
+
+class ConjunctionList:
+    """
+    Close approaches ranked by miss distance.  Times of closest approach
+    (tca) are Julian dates (TT); miss distances are in km and relative
+    speeds in km/s.
+    """
+
+    def __init__(self, keys_a, keys_b, tca, miss_km, speed_km_s):
+        order = np.argsort(np.asarray(miss_km, dtype=float), kind='stable')
+        self.keys_a = np.asarray(keys_a, dtype=object)[order]
+        self.keys_b = np.asarray(keys_b, dtype=object)[order]
+        self.tca = np.asarray(tca, dtype=float)[order]
+        self.miss_km = np.asarray(miss_km, dtype=float)[order]
+        self.speed_km_s = np.asarray(speed_km_s, dtype=float)[order]
+
+    def __len__(self):
+        return len(self.miss_km)
+
+    def __iter__(self):
+        return iter(zip(self.keys_a, self.keys_b, self.tca, self.miss_km, self.speed_km_s))
+
+    def involving(self, key):
+        """Row indices of the conjunctions that involve key."""
+        return np.flatnonzero((self.keys_a == key) | (self.keys_b == key))
+
+    def report(self, catalog, ts, count=20):
+        """The count closest approaches as printable lines."""
+        lines = []
+        for rank, (a, b, tca, miss, speed) in enumerate(self, start=1):
+            if rank > count:
+                break
+            when = ts.tt_jd(tca).utc_strftime('%Y-%m-%d %H:%M:%S')
+            lines.append(f"{rank:>3}. {when} UTC  {miss:7.3f} km  {speed:5.2f} km/s  "
+                         f"{catalog.name(a)} ({a}) - {catalog.name(b)} ({b})")
+        return lines
+
+
+class ConjunctionScreener:
+    """
+    Finds pairs of catalog objects that come within threshold_km of each
+    other.
+
+    Every object is propagated on a grid of step_seconds.  At each step a
+    spatial hash finds the pairs close enough that they could meet before
+    the neighbouring steps: the threshold plus the distance the fastest
+    object covers in one step.  Pairs whose radii are too far apart to
+    close in before the neighbouring steps are dropped, as is any object
+    whose mean-element altitude band over the window, widened by
+    SHORT_PERIOD_MARGIN_KM, overlaps no other.  For the
+    remaining pairs the closest approach is first estimated from straight-
+    line relative motion, then refined with SGP4 for those that could be
+    within the threshold.  Positions stay in the TEME frame, which is
+    enough for distances between objects.
+
+    Pairs slower than min_speed_km_s relative to each other, such as
+    docked vehicles sharing one element set, are not approaches and are
+    left out.
+    """
+
+    def __init__(self, catalog, threshold_km=5.0, step_seconds=60.0, chunk_steps=30, refine_iterations=4,
+                 min_speed_km_s=0.1):
+        self.catalog = catalog
+        self.threshold_km = threshold_km
+        self.min_speed_km_s = min_speed_km_s
+        self.step_seconds = step_seconds
+        self.chunk_steps = chunk_steps
+        self.refine_iterations = refine_iterations
+        self.sat_array = SatelliteArray.from_satellites(catalog)
+        self.perigee_km = None
+        self.apogee_km = None
+        self.candidate_pairs = 0
+        self.refined_pairs = 0
+
+    def _screen_steps(self, array, indices, jd, fraction, offsets, primary):
+        """Candidate (i, j, offset, estimated miss) approaches found on the sampled steps."""
+        found = []
+        half_step = self.step_seconds / 2
+        curvature = 0.5 * MAX_RELATIVE_ACCELERATION * half_step ** 2
+        for start in range(0, len(offsets), self.chunk_steps):
+            chunk = slice(start, start + self.chunk_steps)
+            errors, r, v = array.sgp4(jd[chunk], fraction[chunk])
+            for k in range(errors.shape[1]):
+                speed = np.sqrt(np.einsum('ij,ij->i', v[:, k], v[:, k]))
+                ok = (errors[:, k] == 0) & np.all(np.isfinite(r[:, k]), axis=1) & (speed < MAX_ORBITAL_SPEED_KM_S)
+                live = np.flatnonzero(ok)
+                positions, velocities = r[live, k], v[live, k]
+                if len(live) < 2:
+                    continue
+                max_speed = float(speed[live].max())
+                first, second = close_pairs(positions, self.threshold_km + max_speed * self.step_seconds)
+                # Within half a step either way the radius moves by at most
+                # the radial speed times half a step, plus the bend.
+                radius = np.sqrt(np.einsum('ij,ij->i', positions, positions))
+                radial_speed = np.abs(np.einsum('ij,ij->i', positions, velocities)) / radius
+                keep = (np.abs(radius[first] - radius[second]) <=
+                        self.threshold_km + (radial_speed[first] + radial_speed[second]) * half_step + curvature)
+                if primary is not None:
+                    a, b = indices[live[first]], indices[live[second]]
+                    keep &= primary[a] | primary[b]
+                first, second = first[keep], second[keep]
+                self.candidate_pairs += len(first)
+                tau, miss = closest_approach(positions[second] - positions[first],
+                                             velocities[second] - velocities[first], self.step_seconds / 2)
+                relative_speed = np.linalg.norm(velocities[second] - velocities[first], axis=1)
+                close = (miss < self.threshold_km + curvature) & (relative_speed >= self.min_speed_km_s)
+                found.append((indices[live[first[close]]], indices[live[second[close]]],
+                              offsets[start + k] + tau[close], miss[close]))
+        if not found:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+        return tuple(np.concatenate(column) for column in zip(*found))
+
+    def _refine(self, i, j, jd0, fraction0, offset):
+        """Closest approach of objects i and j near offset seconds: (offset, miss, speed)."""
+        satrecs = self.sat_array.satrecs
+        low, high = offset - self.step_seconds, offset + self.step_seconds
+        for _ in range(self.refine_iterations):
+            fr = fraction0 + offset / DAY_S
+            error_a, ra, va = satrecs[i].sgp4(jd0, fr)
+            error_b, rb, vb = satrecs[j].sgp4(jd0, fr)
+            if error_a or error_b:
+                return None
+            dr, dv = np.subtract(rb, ra), np.subtract(vb, va)
+            tau, miss = closest_approach(dr[None], dv[None], self.step_seconds)
+            offset = min(max(offset + float(tau[0]), low), high)
+            if abs(tau[0]) < 1e-3:
+                break
+        fr = fraction0 + offset / DAY_S
+        error_a, ra, va = satrecs[i].sgp4(jd0, fr)
+        error_b, rb, vb = satrecs[j].sgp4(jd0, fr)
+        if error_a or error_b:
+            return None
+        return offset, float(np.linalg.norm(np.subtract(rb, ra))), float(np.linalg.norm(np.subtract(vb, va)))
+
+    def screen(self, t0, hours=24.0, primaries=None):
+        """
+        Conjunctions within threshold_km over hours from Skyfield time t0.
+        With primaries (catalog keys), only pairs involving at least one of
+        them are reported.
+        """
+        self.candidate_pairs = 0
+        self.refined_pairs = 0
+        keys = self.sat_array.keys
+        offsets = np.arange(0.0, hours * 3600.0 + self.step_seconds, self.step_seconds)
+        jd0, fraction0, _ = time_arrays(t0)
+        jd0, fraction0 = float(jd0[0]), float(fraction0[0])
+        self.perigee_km, self.apogee_km = mean_bands(self.sat_array.satrecs, jd0,
+                                                     (fraction0, fraction0 + offsets[-1] / DAY_S))
+        indices = np.flatnonzero(band_overlap(self.perigee_km, self.apogee_km,
+                                              self.threshold_km + 2 * SHORT_PERIOD_MARGIN_KM))
+        primary = None
+        if primaries is not None:
+            primaries = set(primaries)
+            primary = np.array([key in primaries for key in keys], dtype=bool)
+        if len(indices) < 2:
+            return ConjunctionList([], [], [], [], [])
+
+        jd = np.full(len(offsets), jd0)
+        fraction = fraction0 + offsets / DAY_S
+        array = self.sat_array.subset(indices)._array
+        first, second, approach, estimate = self._screen_steps(array, indices, jd, fraction, offsets, primary)
+
+        # The same approach is seen from neighbouring steps: refine once per
+        # pair and step-sized cluster of estimates, from the estimate with
+        # the smallest miss.  A slow pair's cluster can span many steps, and
+        # refining stays within a step of where it starts.
+        order = np.lexsort((approach, second, first))
+        first, second, approach, estimate = first[order], second[order], approach[order], estimate[order]
+        new_cluster = np.ones(len(first), dtype=bool)
+        new_cluster[1:] = ((first[1:] != first[:-1]) | (second[1:] != second[:-1]) |
+                           (approach[1:] - approach[:-1] > self.step_seconds))
+        cluster = np.cumsum(new_cluster)
+        best = np.lexsort((estimate, cluster))
+        best = best[np.concatenate([[True], cluster[best][1:] != cluster[best][:-1]])] if len(best) else best
+        events = {}
+        for row in best:
+            i, j = int(first[row]), int(second[row])
+            refined = self._refine(i, j, jd0, fraction0, float(approach[row]))
+            self.refined_pairs += 1
+            if refined is None or refined[1] >= self.threshold_km or refined[2] < self.min_speed_km_s:
+                continue
+            offset, miss, speed = refined
+            # Clusters that converge on the same approach are kept once.
+            event = (i, j, round(offset / self.step_seconds))
+            if event not in events or miss < events[event][1]:
+                events[event] = (offset, miss, speed)
+
+        rows = list(events.items())
+        return ConjunctionList([keys[i] for (i, _, _), _ in rows], [keys[j] for (_, j, _), _ in rows],
+                               [t0.tt + offset / DAY_S for _, (offset, _, _) in rows],
+                               [miss for _, (_, miss, _) in rows], [speed for _, (_, _, speed) in rows])
+
+
+if __name__ == "__main__":
+    # python conjunction_screening.py [hours] [threshold_km]: screen the cached catalog.
+    from data_manager import DataManager
+    from skyfield.api import load
+
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 24.0
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    catalog = DataManager().load_catalog(fetch_online=False, use_local=True)
+    ts = load.timescale()
+    screener = ConjunctionScreener(catalog, threshold_km=threshold)
+    started = time.perf_counter()
+    conjunctions = screener.screen(ts.now(), hours)
+    print(f"Screened {len(catalog)} objects over {hours:g} h in {time.perf_counter() - started:.1f} s: "
+          f"{screener.candidate_pairs} candidate pairs, {screener.refined_pairs} refined, "
+          f"{len(conjunctions)} conjunctions within {threshold:g} km")
+    for line in conjunctions.report(catalog, ts):
+        print(line)
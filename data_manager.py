@@ -1,36 +1,108 @@
 import os
 import glob
+import json
+import re
+import time
 from skyfield.api import EarthSatellite, load
+from sgp4.exporter import export_tle
 import requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from debris_catalog import DebrisCatalog, group_from_filename, group_from_url
+from catalog_cache import catalog_to_records, read_catalog_cache, source_fingerprint, write_catalog_cache
+from tle_parser import parse_tle_file, parse_tle_range, split_tle_sets
+
+DEBRIS_SOURCES = [
+    'https://celestrak.org/NORAD/elements/gp.php?GROUP=iridium-33-debris&FORMAT=tle',
+    'https://celestrak.org/NORAD/elements/gp.php?GROUP=cosmos-2251-debris&FORMAT=tle',
+    'https://celestrak.org/NORAD/elements/gp.php?GROUP=fengyun-1c-debris&FORMAT=tle',
+    'https://celestrak.org/NORAD/elements/gp.php?GROUP=1999-025&FORMAT=tle',  # NOAA-15 debris
+    'https://celestrak.org/NORAD/elements/gp.php?GROUP=latest-launches&FORMAT=tle',
+    'https://celestrak.org/NORAD/elements/gp.php?GROUP=active&FORMAT=tle'
+]
+
+FALLBACK_SOURCES = [
+    'https://celestrak.org/NORAD/elements/gp.php?GROUP=stations&FORMAT=tle',
+    'https://celestrak.org/NORAD/elements/gp.php?GROUP=last-30-days&FORMAT=tle'
+]
+
+# Snapshots made from other sources, only loaded when nothing else is cached.
+DERIVED_SNAPSHOTS = ('combined_debris',)
+
+_TIMESTAMP_PATTERN = re.compile(r'^(.+)_(\d{8}_\d{4})$')
+
+
+def snapshot_source(filename):
+    """
+    Source a cached TLE file is a snapshot of: its name without the
+    timestamp, e.g. 'debris_active_20250510_0939.tle' -> 'debris_active'.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    match = _TIMESTAMP_PATTERN.match(stem)
+    return match.group(1) if match else stem
+
+
+def snapshot_time(filename):
+    """When a timestamped snapshot was taken, or None for other files."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    match = _TIMESTAMP_PATTERN.match(stem)
+    return datetime.strptime(match.group(2), "%Y%m%d_%H%M") if match else None
+
+def parse_tle_chunk(task):
+    """
+    Loader process entry point: parse the sets of a TLE file that start in
+    the byte range [start, stop) into an ELEMENT_DTYPE record array, which
+    pickles far smaller and faster than EarthSatellite objects.
+    Returns (path, records).
+    """
+    path, start, stop = task
+    return path, parse_tle_range(path, start, stop)
 
 class DataManager:
-    def __init__(self, tle_cache_dir='tle_cache'):
+    def __init__(self, tle_cache_dir='tle_cache', fetch_timeout=(5, 30), fetch_retries=3, max_fetch_workers=8,
+                 fetch_ttl=2 * 3600, retention_snapshots=3, retention_days=None,
+                 archive_snapshots=False, compact_on_fetch=True, load_workers=1, load_chunk_bytes=512 * 1024):
         current_dir = os.path.dirname(os.path.abspath(__file__))
         self.tle_cache_dir = os.path.join(current_dir, tle_cache_dir)
+        self.compiled_catalog_path = os.path.join(self.tle_cache_dir, 'catalog.bin')
+        self.manifest_path = os.path.join(self.tle_cache_dir, 'manifest.json')
+        self.archive_dir = os.path.join(self.tle_cache_dir, 'archive')
         self.ts = load.timescale()
+        self.fetch_timeout = fetch_timeout
+        self.fetch_retries = fetch_retries
+        self.max_fetch_workers = max_fetch_workers
+        self.fetch_ttl = fetch_ttl
+        self.retention_snapshots = retention_snapshots
+        self.retention_days = retention_days
+        self.archive_snapshots = archive_snapshots
+        self.compact_on_fetch = compact_on_fetch
+        self.load_workers = load_workers
+        self.load_chunk_bytes = load_chunk_bytes
+        self._session = None
         print(f"Using TLE cache directory: {self.tle_cache_dir}")
         
         os.makedirs(self.tle_cache_dir, exist_ok=True)
 
-    def load_tle_file(self, filepath):
+    def load_tle_file(self, filepath, catalog=None, group=None):
+        """
+        Load a TLE file into a {name: EarthSatellite} dict.
+        catalog: Optional DebrisCatalog that also receives every parsed object,
+                 keyed by NORAD number, so objects sharing a name are kept
+        group: Group name recorded in the catalog (defaults to one derived from the filename)
+        """
         satellites = {}
+        if catalog is not None and group is None:
+            group = group_from_filename(filepath)
         try:
             print(f"Loading TLE file: {filepath}")
-            with open(filepath, 'r', encoding='utf-8') as f:
-                lines = [line.strip() for line in f.readlines() if line.strip()]
-            for i in range(0, len(lines), 3):
-                if i + 2 >= len(lines):
-                    break
-                    
+            for name, line1, line2 in self.read_tle_sets(filepath):
                 try:
-                    name = lines[i]
-                    line1 = lines[i + 1]
-                    line2 = lines[i + 2]
-                    
-                    if len(line1) == 69 and len(line2) == 69 and line1.startswith('1 ') and line2.startswith('2 '):
-                        satellite = EarthSatellite(line1, line2, name, self.ts)
-                        satellites[name] = satellite
+                    satellite = EarthSatellite(line1, line2, name, self.ts)
+                    satellites[name] = satellite
+                    if catalog is not None:
+                        catalog.add(satellite, group)
                     
                 except Exception as e:
                     print(f"Error processing TLE set for {name}: {str(e)}")
@@ -43,126 +115,220 @@ class DataManager:
         
         return satellites
 
-    def fetch_online_tle(self, combine_sources=True):
+    def read_tle_sets(self, filepath):
+        """
+        Read a TLE file into a list of (name, line1, line2) tuples without
+        building any satellite objects.
+        """
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return self.parse_tle_text(f.read())
+
+    def parse_tle_text(self, text):
+        """Split TLE text, e.g. a downloaded response, into (name, line1, line2) tuples."""
+        return split_tle_sets(text)
+
+    def _make_session(self):
+        session = requests.Session()
+        retry = Retry(total=self.fetch_retries, backoff_factor=0.5,
+                      status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_fetch_workers, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @property
+    def session(self):
+        """Shared HTTP session, so every download reuses the same connection pool."""
+        if self._session is None:
+            self._session = self._make_session()
+        return self._session
+
+    def load_manifest(self):
+        """
+        The cache manifest: for every online source, keyed by url, its latest
+        snapshot file, when it was fetched and its ETag and Last-Modified.
+        """
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, manifest):
+        temp_path = self.manifest_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            print(f"Failed to save cache manifest: {str(e)}")
+
+    def _cached_source_path(self, meta):
+        if not meta or not meta.get('file'):
+            return None
+        path = os.path.join(self.tle_cache_dir, meta['file'])
+        return path if os.path.exists(path) else None
+
+    def _download_source(self, url, meta=None):
+        """
+        Download one source.  While the cached copy is younger than fetch_ttl
+        no request is made; after that the request is conditional on the
+        ETag and Last-Modified seen last time.
+        Returns (url, state, text, headers) where state is one of 'fresh',
+        'not_modified', 'downloaded' or 'failed', and text is only set for
+        'downloaded'.
+        """
+        cached_path = self._cached_source_path(meta)
+        if cached_path is not None and time.time() - meta.get('fetched_at', 0) < self.fetch_ttl:
+            print(f"Using cached copy of {url}")
+            return url, 'fresh', None, {}
+
+        headers = {}
+        if cached_path is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        try:
+            print(f"Fetching TLE data from: {url}")
+            response = self.session.get(url, timeout=self.fetch_timeout, headers=headers)
+            if response.status_code == 304 and cached_path is not None:
+                print(f"{url} not modified since last fetch")
+                return url, 'not_modified', None, {}
+            if response.status_code == 200 and "Invalid query" not in response.text:
+                return url, 'downloaded', response.text, response.headers
+            print(f"Invalid response from {url}, skipping...")
+        except requests.RequestException as e:
+            print(f"Error fetching from {url}: {str(e)}")
+        return url, 'failed', None, {}
+
+    def download_sources(self, urls, metadata=None):
+        """
+        Download every url concurrently over the shared session, once each.
+        Returns a list of (url, state, text, headers) in the order given.
+        """
+        if not urls:
+            return []
+        metadata = metadata or {}
+        with ThreadPoolExecutor(max_workers=min(len(urls), self.max_fetch_workers)) as pool:
+            return list(pool.map(lambda url: self._download_source(url, metadata.get(url)), urls))
+
+    def refresh_sources(self, combine_sources=True):
+        """
+        Bring the cached copy of every online source up to date, downloading
+        only what has expired and changed.  Falls back to FALLBACK_SOURCES if
+        no primary source is available at all.
+        Returns a list of (url, state, path, text): path is the source's
+        cache file and text its content when it was downloaded this time.
+        """
+        metadata = self.load_manifest()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+        urls = DEBRIS_SOURCES if combine_sources else DEBRIS_SOURCES[:1]
+
+        results = self._refresh(urls, metadata, timestamp, "online_debris" if not combine_sources else None)
+        if combine_sources and not any(path for _, _, path, _ in results):
+            print("No debris data fetched from primary sources, trying fallbacks...")
+            results += self._refresh(FALLBACK_SOURCES, metadata, timestamp)
+
+        self.save_manifest(metadata)
+        if self.compact_on_fetch and any(state == 'downloaded' for _, state, _, _ in results):
+            self.compact_cache()
+        return results
+
+    def _refresh(self, urls, metadata, timestamp, prefix=None):
+        results = []
+        now = time.time()
+        for url, state, text, headers in self.download_sources(urls, metadata):
+            meta = metadata.get(url, {})
+            path = self._cached_source_path(meta) if state != 'failed' else None
+            if state == 'not_modified':
+                meta['fetched_at'] = now
+            elif state == 'downloaded':
+                source_name = group_from_url(url)
+                path = os.path.join(self.tle_cache_dir, f"{prefix or 'debris_' + source_name}_{timestamp}.tle")
+                try:
+                    with open(path, 'w', encoding='utf-8') as f:
+                        f.write(text)
+                    print(f"Saved {source_name} data to {path}")
+                    meta = {'fetched_at': now, 'etag': headers.get('ETag'),
+                            'last_modified': headers.get('Last-Modified'),
+                            'file': os.path.basename(path)}
+                except OSError as e:
+                    print(f"Failed to save TLE data to cache: {str(e)}")
+            if meta:
+                metadata[url] = meta
+            results.append((url, state, path, text))
+        return results
+
+    def fetch_online_tle(self, combine_sources=True, catalog=None):
         """
-        Fetch TLE data from online sources with more comprehensive debris data
+        Fetch TLE data from online sources with more comprehensive debris data.
+        All sources are checked concurrently; only those whose cached copy has
+        expired and changed upstream are downloaded, the rest are read back
+        from the TLE cache.
         combine_sources: If True, combines data from multiple debris catalogs
+        catalog: Optional DebrisCatalog that also receives every fetched object
+        Returns {source_name: DebrisCatalog} with the fetched objects keyed by NORAD number.
         """
-        debris_sources = [
-            'https://celestrak.org/NORAD/elements/gp.php?GROUP=iridium-33-debris&FORMAT=tle',
-            'https://celestrak.org/NORAD/elements/gp.php?GROUP=cosmos-2251-debris&FORMAT=tle',
-            'https://celestrak.org/NORAD/elements/gp.php?GROUP=fengyun-1c-debris&FORMAT=tle',
-            'https://celestrak.org/NORAD/elements/gp.php?GROUP=1999-025&FORMAT=tle',  # NOAA-15 debris
-            'https://celestrak.org/NORAD/elements/gp.php?GROUP=latest-launches&FORMAT=tle',
-            'https://celestrak.org/NORAD/elements/gp.php?GROUP=active&FORMAT=tle'
-        ]
-        
-        fallback_sources = [
-            'https://celestrak.org/NORAD/elements/gp.php?GROUP=stations&FORMAT=tle',
-            'https://celestrak.org/NORAD/elements/gp.php?GROUP=last-30-days&FORMAT=tle'
-        ]
-        
-        all_satellite_dict = {}
+        fetched = DebrisCatalog(self.ts)
         used_sources = []
+        downloaded = False
 
         try:
-            if combine_sources:
-                for url in debris_sources:
-                    try:
-                        print(f"Fetching TLE data from: {url}")
-                        response = requests.get(url)
-                        
-                        if response.status_code == 200 and "Invalid query" not in response.text:
-                            satellites = load.tle_file(url)
-                            
-                            for sat in satellites:
-                                all_satellite_dict[sat.name] = sat
-                            
-                            used_sources.append(url)
-                            print(f"Added {len(satellites)} objects from {url}")
-                            
-                            source_name = url.split('GROUP=')[1].split('&')[0]
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-                            cache_filename = os.path.join(self.tle_cache_dir, f"debris_{source_name}_{timestamp}.tle")
-                            
-                            with open(cache_filename, 'w', encoding='utf-8') as f:
-                                f.write(response.text)
-                            print(f"Saved {source_name} data to {cache_filename}")
-                        else:
-                            print(f"Invalid response from {url}, skipping...")
-                            
-                    except Exception as e:
-                        print(f"Error fetching from {url}: {str(e)}")
-                
-                if not all_satellite_dict:
-                    print("No debris data fetched from primary sources, trying fallbacks...")
-                    for url in fallback_sources:
-                        try:
-                            satellites = load.tle_file(url)
-                            for sat in satellites:
-                                all_satellite_dict[sat.name] = sat
-                            used_sources.append(url)
-                            print(f"Added {len(satellites)} objects from fallback {url}")
-                        except Exception as e:
-                            print(f"Error with fallback {url}: {str(e)}")
-                
-                if all_satellite_dict:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-                    combined_filename = os.path.join(self.tle_cache_dir, f"combined_debris_{timestamp}.tle")
-                    
-                    try:
-                        with open(combined_filename, 'w', encoding='utf-8') as f:
-                            for sat_name, sat in all_satellite_dict.items():
-                                f.write(f"{sat_name}\n")
-                                f.write(f"{sat.model.line1}\n")
-                                f.write(f"{sat.model.line2}\n")
-                        print(f"Saved combined data with {len(all_satellite_dict)} objects to {combined_filename}")
-                    except Exception as e:
-                        print(f"Failed to save combined data: {str(e)}")
-                
-                print(f"Successfully fetched a total of {len(all_satellite_dict)} objects from {len(used_sources)} sources")
-                return {"online_combined_debris": all_satellite_dict}
-            
-            else:
-                url = debris_sources[0]
-                print(f"Fetching TLE data from single source: {url}")
-                satellites = load.tle_file(url)
-                
-                satellite_dict = {}
-                for sat in satellites:
-                    satellite_dict[sat.name] = sat
-                    
-                print(f"Successfully fetched {len(satellite_dict)} objects from {url}")
-                
+            for url, state, path, text in self.refresh_sources(combine_sources):
+                if path is None and text is None:
+                    continue
+                tle_sets = self.parse_tle_text(text) if text is not None else self.read_tle_sets(path)
+                for name, line1, line2 in tle_sets:
+                    fetched.add_tle(name, line1, line2, group_from_url(url))
+                used_sources.append(url)
+                downloaded = downloaded or state == 'downloaded'
+                print(f"Added {len(tle_sets)} objects from {url}")
+
+            if catalog is not None:
+                catalog.merge(fetched)
+
+            if not combine_sources:
+                print(f"Successfully fetched {len(fetched)} objects from {DEBRIS_SOURCES[0]}")
+                return {"online_debris": fetched}
+
+            if fetched and downloaded:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-                cache_filename = os.path.join(self.tle_cache_dir, f"online_debris_{timestamp}.tle")
-                
+                combined_filename = os.path.join(self.tle_cache_dir, f"combined_debris_{timestamp}.tle")
                 try:
-                    response = requests.get(url)
-                    if response.status_code == 200:
-                        with open(cache_filename, 'w', encoding='utf-8') as f:
-                            f.write(response.text)
-                        print(f"Saved online TLE data to {cache_filename}")
+                    self.write_tle_file(combined_filename, fetched)
+                    print(f"Saved combined data with {len(fetched)} objects to {combined_filename}")
                 except Exception as e:
-                    print(f"Failed to save TLE data to cache: {str(e)}")
-                
-                return {"online_debris": satellite_dict}
-                
+                    print(f"Failed to save combined data: {str(e)}")
+
+            print(f"Successfully fetched a total of {len(fetched)} objects from {len(used_sources)} sources")
+            return {"online_combined_debris": fetched}
+
         except Exception as e:
             print(f"Error in fetch_online_tle: {str(e)}")
             return {}
 
-    def load_all_debris(self, fetch_online=True, use_local=False):
+    def write_tle_file(self, filepath, catalog):
+        """Write every object in catalog to filepath as three-line TLE sets."""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            for entry in catalog.entries.values():
+                line1, line2 = entry.lines if entry.lines is not None else export_tle(entry.satrec())
+                f.write(f"{entry.name}\n")
+                f.write(f"{line1}\n")
+                f.write(f"{line2}\n")
+
+    def load_all_debris(self, fetch_online=True, use_local=False, catalog=None):
         """
         Load debris data with options to control sources.
         fetch_online: Whether to fetch data from online source
         use_local: Whether to load data from local cache files
+        catalog: Optional DebrisCatalog that also receives every loaded object
         """
         all_debris = {}
         
         if fetch_online:
             try:
-                online_debris = self.fetch_online_tle()
+                online_debris = self.fetch_online_tle(catalog=catalog)
                 all_debris.update(online_debris)
                 print(f"Using online data as primary source")
             except Exception as e:
@@ -172,8 +338,7 @@ class DataManager:
                     use_local = True
         
         if use_local:
-            tle_pattern = os.path.join(self.tle_cache_dir, "*.tle")
-            tle_files = glob.glob(tle_pattern)
+            tle_files = self._local_tle_files()
             
             print(f"\nSearching for TLE files in: {self.tle_cache_dir}")
             print(f"Found {len(tle_files)} TLE files")
@@ -181,7 +346,7 @@ class DataManager:
             for filepath in tle_files:
                 try:
                     filename = os.path.basename(filepath)
-                    satellites = self.load_tle_file(filepath)
+                    satellites = self.load_tle_file(filepath, catalog=catalog)
                     if satellites:
                         all_debris[filename] = satellites
                         print(f"Successfully loaded {len(satellites)} objects from {filename}")
@@ -192,6 +357,207 @@ class DataManager:
         
         return all_debris
 
+    def load_catalog(self, fetch_online=True, use_local=False, use_compiled=True):
+        """
+        Load debris data from every selected source into a single DebrisCatalog
+        keyed by NORAD number, keeping the newest element set of each object.
+        use_compiled: Use the compiled binary catalog if it is newer than every
+                      .tle file, and rebuild it after any text load.  When
+                      loading from both sources the online sources are only
+                      refreshed into the TLE cache, so if nothing changed
+                      upstream the compiled catalog is used as is
+        """
+        if fetch_online and use_local and use_compiled:
+            try:
+                self.refresh_sources()
+                fetch_online = False
+            except Exception as e:
+                print(f"Failed to fetch online data: {str(e)}")
+
+        if use_local and use_compiled and not fetch_online:
+            catalog = self.load_compiled_catalog()
+            if catalog is not None:
+                return catalog
+
+        catalog = DebrisCatalog(self.ts)
+        if fetch_online:
+            try:
+                self.fetch_online_tle(catalog=catalog)
+            except Exception as e:
+                print(f"Failed to fetch online data: {str(e)}")
+                use_local = True
+        if use_local:
+            self.load_local_catalog(catalog)
+        print(f"Catalog holds {len(catalog)} unique objects")
+
+        if use_local and use_compiled and catalog:
+            self.compile_catalog(catalog)
+        return catalog
+
+    def snapshots(self):
+        """
+        Every .tle file in the cache grouped by the source it is a snapshot
+        of, e.g. all 'debris_active_<YYYYMMDD_HHMM>.tle' files under
+        'debris_active'.  Returns {source: [paths, newest first]}.
+        """
+        snapshots = {}
+        for path in glob.glob(os.path.join(self.tle_cache_dir, "*.tle")):
+            snapshots.setdefault(snapshot_source(path), []).append(path)
+        for paths in snapshots.values():
+            paths.sort(key=lambda path: (snapshot_time(path) or datetime.min, path), reverse=True)
+        return snapshots
+
+    def current_snapshots(self):
+        """
+        The one file per source that holds its current data: the snapshot
+        the manifest records for online sources, otherwise the newest one.
+        Derived files such as the combined snapshot are left out.
+        """
+        snapshots = self.snapshots()
+        current = {source: paths[0] for source, paths in snapshots.items()}
+        for meta in self.load_manifest().values():
+            path = self._cached_source_path(meta)
+            if path is not None:
+                current[snapshot_source(path)] = path
+        for source in DERIVED_SNAPSHOTS:
+            if len(current) > 1:
+                current.pop(source, None)
+        return current
+
+    def _local_tle_files(self):
+        return sorted(self.current_snapshots().values())
+
+    def compact_cache(self, keep_snapshots=None, max_age_days=None, archive=None):
+        """
+        Retire old snapshots so the cache does not grow with every run.
+        The current and newest snapshot of every source are always kept, with up to
+        keep_snapshots - 1 older ones no older than max_age_days.  Retired
+        snapshots are deleted, or with archive set, first merged into
+        archive/<source>.tle, keeping the newest element set of each object.
+        Defaults come from the retention settings given to DataManager.
+        Returns the list of retired files.
+        """
+        keep_snapshots = self.retention_snapshots if keep_snapshots is None else keep_snapshots
+        max_age_days = self.retention_days if max_age_days is None else max_age_days
+        archive = self.archive_snapshots if archive is None else archive
+        current = set(self.current_snapshots().values())
+        now = datetime.now()
+
+        retired = []
+        for source, paths in self.snapshots().items():
+            old = []
+            kept = 0
+            for path in paths:
+                if path in current or path == paths[0]:
+                    continue
+                taken = snapshot_time(path)
+                too_old = max_age_days is not None and taken is not None and (now - taken).days > max_age_days
+                if kept < keep_snapshots - 1 and not too_old:
+                    kept += 1
+                else:
+                    old.append(path)
+            if not old:
+                continue
+            if archive:
+                self._archive_snapshots(source, old)
+            for path in old:
+                try:
+                    os.remove(path)
+                    retired.append(path)
+                except OSError as e:
+                    print(f"Failed to remove old snapshot {path}: {str(e)}")
+
+        if retired:
+            print(f"Retired {len(retired)} old TLE snapshots from {self.tle_cache_dir}")
+        return retired
+
+    def _archive_snapshots(self, source, paths):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archive_path = os.path.join(self.archive_dir, f"{source}.tle")
+        merged = DebrisCatalog(self.ts)
+        for path in ([archive_path] if os.path.exists(archive_path) else []) + paths:
+            for name, line1, line2 in self.read_tle_sets(path):
+                merged.add_tle(name, line1, line2, source)
+        self.write_tle_file(archive_path, merged)
+
+    def load_local_catalog(self, catalog, workers=None):
+        """
+        Add every object in the local .tle files to catalog.  Files are read
+        with the fixed-column parser into element records; satellites are
+        built when the catalog is used.
+        workers: Number of loader processes (defaults to load_workers).  With
+                 more than one, files are split into chunks of about
+                 load_chunk_bytes that are parsed in a process pool.
+        """
+        tle_files = self._local_tle_files()
+        print(f"\nSearching for TLE files in: {self.tle_cache_dir}")
+        print(f"Found {len(tle_files)} TLE files")
+        workers = self.load_workers if workers is None else workers
+        if workers > 1 and tle_files:
+            return self._load_local_catalog_parallel(catalog, tle_files, workers)
+
+        for filepath in tle_files:
+            try:
+                filename = os.path.basename(filepath)
+                records = parse_tle_file(filepath)
+                catalog.add_records(records, group_from_filename(filepath))
+                print(f"Indexed {len(records)} objects from {filename}")
+            except Exception as e:
+                print(f"Error processing {filepath}: {str(e)}")
+        return catalog
+
+    def _load_local_catalog_parallel(self, catalog, tle_files, workers):
+        tasks = []
+        for filepath in tle_files:
+            size = os.path.getsize(filepath)
+            count = max(1, -(-size // self.load_chunk_bytes))
+            tasks.extend((filepath, size * index // count, size * (index + 1) // count) for index in range(count))
+
+        # Results come back in task order, so the merge is the same as a
+        # sequential load whatever the number of workers.
+        counts = {}
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                for filepath, records in pool.map(parse_tle_chunk, tasks):
+                    catalog.add_records(records, group_from_filename(filepath))
+                    counts[filepath] = counts.get(filepath, 0) + len(records)
+        except Exception as e:
+            print(f"Parallel load failed, loading sequentially: {str(e)}")
+            return self.load_local_catalog(catalog, workers=1)
+        for filepath in tle_files:
+            print(f"Indexed {counts.get(filepath, 0)} objects from {os.path.basename(filepath)}")
+        return catalog
+
+    def compile_catalog(self, catalog):
+        """
+        Write catalog to the compiled binary cache, tagged with the size and
+        modification time of the .tle files it was built from.
+        """
+        try:
+            records, group_names = catalog_to_records(catalog)
+            write_catalog_cache(self.compiled_catalog_path, records, group_names,
+                                source_fingerprint(self._local_tle_files()))
+            print(f"Compiled {len(records)} objects to {self.compiled_catalog_path}")
+        except Exception as e:
+            print(f"Failed to compile catalog cache: {str(e)}")
+
+    def load_compiled_catalog(self):
+        """
+        Load the compiled binary cache.  Returns None if it is missing, has an
+        old format version or any .tle file was added, removed or changed since
+        it was written.
+        """
+        cached = read_catalog_cache(self.compiled_catalog_path)
+        if cached is None:
+            return None
+        header, records = cached
+        if header['sources'] != source_fingerprint(self._local_tle_files()):
+            print("Compiled catalog is out of date, reloading TLE files")
+            return None
+        catalog = DebrisCatalog.from_records(records, header['groups'], self.ts)
+        print(f"Loaded {len(catalog)} objects from compiled catalog {self.compiled_catalog_path}")
+        return catalog
+
 if __name__ == "__main__":
     data_manager = DataManager()
     all_debris = data_manager.load_all_debris(fetch_online=True, use_local=True)
@@ -0,0 +1,227 @@
+import os
+import re
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import date
+from sgp4.api import Satrec
+from skyfield.api import EarthSatellite, load
+from catalog_cache import satrec_from_elements, satrecs_from_records
+
+_SNAPSHOT_PATTERN = re.compile(r'^(?:debris_)?(.+?)_\d{8}_\d{4}$')
+
+
+def group_from_filename(filename):
+    """
+    Derive the source group of a cached TLE file from its name, e.g.
+    'debris_cosmos-2251-debris_20250510_0939.tle' -> 'cosmos-2251-debris',
+    'combined_debris_20250510_0939.tle' -> 'combined_debris' and
+    'high_risk_debris.tle' -> 'high_risk_debris'.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    match = _SNAPSHOT_PATTERN.match(stem)
+    return match.group(1) if match else stem
+
+
+def group_from_url(url):
+    if 'GROUP=' in url:
+        return url.split('GROUP=')[1].split('&')[0]
+    return url
+
+
+def satellite_epoch(satellite):
+    model = satellite.model
+    return model.jdsatepoch + model.jdsatepochF
+
+
+def tle_epoch(line1):
+    """Julian date of a TLE's epoch, read straight from columns 19-32 of line 1."""
+    year = int(line1[18:20])
+    year += 1900 if year >= 57 else 2000
+    return 1721424.5 + date(year, 1, 1).toordinal() + float(line1[20:32]) - 1
+
+
+def _record_entries(records):
+    names = [name.decode('utf-8', 'replace').strip() for name in records['name'].tolist()]
+    epochs = (records['epoch_jd'] + records['epoch_fraction']).tolist()
+    for row, (norad_id, name, epoch) in enumerate(zip(records['norad'].tolist(), names, epochs)):
+        yield CatalogEntry(norad_id, name, epoch, records=records, row=row)
+
+
+class CatalogEntry:
+    """
+    One catalog object in its cheapest form: the raw TLE lines, a row of a
+    compiled record array, or an already built EarthSatellite.
+    """
+    __slots__ = ('norad_id', 'name', 'epoch', 'lines', 'records', 'row', 'satellite')
+
+    def __init__(self, norad_id, name, epoch, lines=None, records=None, row=None, satellite=None):
+        self.norad_id = norad_id
+        self.name = name
+        self.epoch = epoch
+        self.lines = lines
+        self.records = records
+        self.row = row
+        self.satellite = satellite
+
+    def satrec(self):
+        if self.satellite is not None:
+            return self.satellite.model
+        if self.lines is not None:
+            return Satrec.twoline2rv(*self.lines)
+        return satrec_from_elements(self.records[self.row])
+
+    def build(self, ts):
+        if self.lines is not None:
+            return EarthSatellite(self.lines[0], self.lines[1], self.name, ts)
+        satellite = EarthSatellite.from_satrec(satrec_from_elements(self.records[self.row]), ts)
+        satellite.name = self.name
+        return satellite
+
+
+class DebrisCatalog(Mapping):
+    """
+    Satellites keyed by NORAD catalog number, merged from any number of
+    sources.  When the same object arrives from several files or groups the
+    element set with the newest epoch wins, and every group the object was
+    seen in is recorded.
+
+    Objects are stored as lightweight CatalogEntry values; the EarthSatellite
+    for an object is only built when it is looked up, and at most
+    max_materialized of them are kept alive, least recently used first out.
+    Bulk propagation goes through satrecs(), which never builds
+    EarthSatellites at all.
+
+    The catalog behaves like the {key: EarthSatellite} dicts DataManager
+    returns, so it can be handed straight to DebrisTracker.  version is
+    bumped on every change so cached propagation state can be invalidated.
+    """
+
+    def __init__(self, ts=None, max_materialized=1024):
+        self.entries = {}
+        self.groups = {}
+        self.version = 0
+        self.max_materialized = max_materialized
+        self._ts = ts
+        self._materialized = OrderedDict()
+
+    @property
+    def ts(self):
+        if self._ts is None:
+            self._ts = load.timescale()
+        return self._ts
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, norad_id):
+        return norad_id in self.entries
+
+    def __getitem__(self, norad_id):
+        entry = self.entries[norad_id]
+        if entry.satellite is not None:
+            return entry.satellite
+        satellite = self._materialized.get(norad_id)
+        if satellite is not None:
+            self._materialized.move_to_end(norad_id)
+            return satellite
+        satellite = entry.build(self.ts)
+        self._materialized[norad_id] = satellite
+        if len(self._materialized) > self.max_materialized:
+            self._materialized.popitem(last=False)
+        return satellite
+
+    def _add_entry(self, entry, group):
+        if group is not None:
+            self.groups.setdefault(entry.norad_id, set()).add(group)
+        current = self.entries.get(entry.norad_id)
+        if current is not None and current.epoch >= entry.epoch:
+            return False
+        self.entries[entry.norad_id] = entry
+        self._materialized.pop(entry.norad_id, None)
+        self.version += 1
+        return True
+
+    def add(self, satellite, group=None):
+        """Add one EarthSatellite; returns True if it is new or replaced an older element set."""
+        entry = CatalogEntry(int(satellite.model.satnum), satellite.name, satellite_epoch(satellite),
+                             satellite=satellite)
+        return self._add_entry(entry, group)
+
+    def add_many(self, satellites, group=None):
+        """Add an iterable of satellites; returns how many were new or updated."""
+        return sum(1 for satellite in satellites if self.add(satellite, group))
+
+    def add_tle(self, name, line1, line2, group=None):
+        """Add one object from its TLE lines without running the SGP4 initialisation."""
+        norad = line1[2:7].strip()
+        norad_id = int(norad) if norad.isdigit() else int(Satrec.twoline2rv(line1, line2).satnum)
+        entry = CatalogEntry(norad_id, name, tle_epoch(line1), lines=(line1, line2))
+        return self._add_entry(entry, group)
+
+    @classmethod
+    def from_records(cls, records, group_names, ts=None):
+        """Catalog over a compiled record array; nothing is built until it is used."""
+        catalog = cls(ts)
+        for entry, mask in zip(_record_entries(records), records['groups'].tolist()):
+            catalog._add_entry(entry, None)
+            catalog.groups[entry.norad_id] = {group for i, group in enumerate(group_names) if mask >> i & 1}
+        return catalog
+
+    def add_records(self, records, group=None):
+        """
+        Add every row of an ELEMENT_DTYPE record array, e.g. one parsed by a
+        loader process.  Returns how many objects were new or updated.
+        """
+        return sum(1 for entry in _record_entries(records) if self._add_entry(entry, group))
+
+    def merge(self, other):
+        """Add every entry of another catalog, with its groups."""
+        for norad_id, entry in other.entries.items():
+            groups = other.groups.get(norad_id) or [None]
+            for group in groups:
+                self._add_entry(entry, group)
+
+    def satrec(self, norad_id):
+        return self.entries[norad_id].satrec()
+
+    def satrecs(self):
+        """
+        A fresh SGP4 Satrec for every object, in iteration order.  Objects
+        backed by a compiled record array are initialised in bulk.
+        """
+        satrecs = []
+        pending = {}
+        for i, entry in enumerate(self.entries.values()):
+            if entry.satellite is None and entry.lines is None:
+                pending.setdefault(id(entry.records), (entry.records, [], []))
+                pending[id(entry.records)][1].append(i)
+                pending[id(entry.records)][2].append(entry.row)
+                satrecs.append(None)
+            else:
+                satrecs.append(entry.satrec())
+        for records, positions, rows in pending.values():
+            for i, satrec in zip(positions, satrecs_from_records(records[rows])):
+                satrecs[i] = satrec
+        return satrecs
+
+    def materialized_count(self):
+        return len(self._materialized)
+
+    def name(self, norad_id):
+        entry = self.entries.get(norad_id)
+        return entry.name if entry is not None and entry.name else str(norad_id)
+
+    def in_group(self, group):
+        return [norad_id for norad_id, groups in self.groups.items() if group in groups and norad_id in self]
+
+    def group_counts(self):
+        counts = {}
+        for norad_id, groups in self.groups.items():
+            if norad_id not in self:
+                continue
+            for group in groups:
+                counts[group] = counts.get(group, 0) + 1
+        return counts
@@ -1,31 +1,174 @@
+import threading
+import time
+import numpy as np
+from datetime import datetime, timezone
 from skyfield.api import load, wgs84
+from satellite_array import SatelliteArray, contents_key
+from visibility_filter import ReachabilityIndex
+
+# Times the propagation workers are restarted after failing before the
+# tracker falls back to propagating in this process for good.
+MAX_WORKER_RESTARTS = 3
+
 
 class DebrisTracker:
-    def __init__(self,loc):
+    def __init__(self,loc, batched=False, prefilter=False, refresh_interval=120.0, workers=None):
         self.ts = load.timescale()
-        self.location = wgs84.latlon(loc[0],loc[1])  
-    def calculate_positions(self, debris_dict) :
-        current_time = self.ts.now()
+        self.location = wgs84.latlon(loc[0],loc[1])
+        self.batched = batched or prefilter or bool(workers)
+        self.workers = workers
+        self._propagator = None
+        self.worker_restarts = 0
+        self.prefilter = prefilter
+        self.refresh_interval = refresh_interval
+        self._satellite_arrays = {}
+        self._reachability = {}
+        self.pass_predictor = None
+        self.ephemeris_cache = None
+
+    def set_location(self, loc):
+        """Move the observer.  Cached visibility data for the old location is dropped."""
+        self.location = wgs84.latlon(loc[0],loc[1])
+        self._reachability = {}
+
+    def calculate_positions(self, debris_dict, t=None) :
+        current_time = t if t is not None else self.ts.now()
+        if self.batched:
+            return self._calculate_positions_batched(debris_dict, current_time)
+
         visible_objects = {}
-        
+
         for name, satellite in debris_dict.items():
             try:
                 difference = satellite - self.location
                 topocentric = difference.at(current_time)
                 alt, az, distance = topocentric.altaz()
-                
+
                 position_data = {
                     'altitude': alt.degrees,
                     'azimuth': az.degrees,
                     'distance': distance.km,
                     'visible': alt.degrees > 0
                 }
-                
+
                 if position_data['visible']:
                     visible_objects[name] = position_data
-                    
+
             except Exception as e:
                 print(f"Error calculating position for {name}: {str(e)}")
                 continue
-        
-        return visible_objects
\ No newline at end of file
+
+        return visible_objects
+
+    def satellite_array(self, debris_dict):
+        """
+        Return the packed SatelliteArray for debris_dict, building it on first
+        use.  The array is rebuilt if the number of objects in the dict changes,
+        or for a DebrisCatalog, whenever its version changes; replace a plain
+        dict to change its satellites.
+        """
+        version = contents_key(debris_dict)
+        cached = self._satellite_arrays.get(id(debris_dict))
+        if cached is not None and cached[0] is debris_dict and cached[1] == version:
+            return cached[2]
+        sat_array = SatelliteArray.from_satellites(debris_dict)
+        if self.ephemeris_cache is not None:
+            # Elements may have changed under the same keys.
+            self.ephemeris_cache.clear()
+        self._satellite_arrays[id(debris_dict)] = (debris_dict, version, sat_array)
+        return sat_array
+
+    def parallel_propagator(self, sat_array):
+        """
+        The ParallelPropagator for sat_array, started on first use and
+        restarted if the array has been rebuilt.
+        """
+        from parallel_propagation import ParallelPropagator
+        if self._propagator is None or self._propagator.sat_array is not sat_array:
+            self.close()
+            self._propagator = ParallelPropagator(sat_array, self.workers)
+        return self._propagator
+
+    def close(self):
+        """Stop the propagation workers, if any were started."""
+        if self._propagator is not None:
+            self._propagator.close()
+            self._propagator = None
+
+    def candidate_array(self, debris_dict, current_time):
+        """
+        Return the SatelliteArray of objects in debris_dict that could be above
+        the horizon, using a ReachabilityIndex that is refreshed every
+        refresh_interval seconds.
+        """
+        sat_array = self.satellite_array(debris_dict)
+        entry = self._reachability.get(id(debris_dict))
+        if entry is None or entry['index'].sat_array is not sat_array:
+            entry = {'index': ReachabilityIndex(sat_array, self.refresh_interval),
+                     'refresh_count': None, 'subset': None}
+            self._reachability[id(debris_dict)] = entry
+
+        index = entry['index']
+        if entry['subset'] is None or index.needs_refresh(current_time):
+            candidates = index.candidates(current_time, self.location)
+            entry['subset'] = sat_array.subset(candidates)
+            entry['refresh_count'] = index.refresh_count
+        return entry['subset']
+
+    def trajectory(self, debris_dict, key, duration=60.0, step=1.0, start=None):
+        """
+        Short look-ahead track of one object for servo streaming: unix times
+        every step seconds from start (default now) for duration seconds,
+        with the object's azimuth and altitude in degrees at each.
+        """
+        start = time.time() if start is None else start
+        offsets = np.arange(0.0, duration + step / 2, step)
+        t0 = self.ts.from_datetime(datetime.fromtimestamp(start, tz=timezone.utc))
+        times = self.ts.tt_jd(t0.tt + offsets / 86400.0)
+
+        sat_array = self.satellite_array(debris_dict)
+        single = sat_array.subset([sat_array.index_of(key)])
+        alt, az, _ = single.altaz(times, self.location)
+        return start + offsets, az[0], alt[0]
+
+    def _calculate_positions_batched(self, debris_dict, current_time):
+        if self.pass_predictor is not None:
+            sat_array = self.pass_predictor.active_array(debris_dict, current_time)
+        elif self.prefilter:
+            sat_array = self.candidate_array(debris_dict, current_time)
+        else:
+            sat_array = self.satellite_array(debris_dict)
+        if not len(sat_array):
+            return {}
+
+        if self.workers and self.pass_predictor is None and not self.prefilter:
+            # The whole catalog: split it across the worker processes.  The
+            # pool is built for one fixed array, so the predictor's and
+            # prefilter's changing subsets stay in this process.
+            try:
+                alt, az, distance = self.parallel_propagator(sat_array).altaz(current_time, self.location)
+            except threading.BrokenBarrierError:
+                # A worker died or hung: start a new pool next tick, or stop
+                # using workers if they keep failing, and do this one here.
+                print("Propagation workers stopped responding; propagating in process")
+                self.close()
+                self.worker_restarts += 1
+                if self.worker_restarts > MAX_WORKER_RESTARTS:
+                    self.workers = None
+                alt, az, distance = sat_array.altaz(current_time, self.location)
+                alt, az, distance = alt[:, 0], az[:, 0], distance[:, 0]
+        elif self.ephemeris_cache is not None:
+            alt, az, distance = self.ephemeris_cache.altaz(sat_array, current_time, self.location)
+        else:
+            alt, az, distance = sat_array.altaz(current_time, self.location)
+            alt, az, distance = alt[:, 0], az[:, 0], distance[:, 0]
+
+        visible_objects = {}
+        for i in np.flatnonzero(alt > 0):
+            visible_objects[sat_array.keys[i]] = {
+                'altitude': float(alt[i]),
+                'azimuth': float(az[i]),
+                'distance': float(distance[i]),
+                'visible': True
+            }
+        return visible_objects
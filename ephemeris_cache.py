@@ -0,0 +1,170 @@
+from collections import OrderedDict
+import numpy as np
+from satellite_array import observer_frame, topocentric_altaz
+
+DAY_S = 86400.0
+
+
+def chebyshev_nodes(count):
+    """Chebyshev points of the first kind on [-1, 1], in increasing order."""
+    return np.cos(np.pi * (np.arange(count) + 0.5) / count)[::-1]
+
+
+def chebyshev_transform(count):
+    """
+    Matrix taking samples at chebyshev_nodes(count) to the coefficients of
+    the interpolating Chebyshev series.  Being a plain matrix product, an
+    object whose samples are NaN only spoils its own coefficients.
+    """
+    x = chebyshev_nodes(count)
+    degree = np.arange(count)[:, None]
+    transform = 2.0 / count * np.cos(degree * np.arccos(x)[None, :])
+    transform[0] /= 2.0
+    return transform
+
+
+def chebyshev_evaluate(coefficients, x):
+    """
+    Evaluate Chebyshev series with Clenshaw's recurrence.  coefficients has
+    shape (m, degree + 1, 3) and x shape (m,); returns (m, 3).
+    """
+    x = x[:, None]
+    b1 = np.zeros(coefficients[:, 0].shape)
+    b2 = np.zeros_like(b1)
+    for k in range(coefficients.shape[1] - 1, 0, -1):
+        b1, b2 = 2.0 * x * b1 - b2 + coefficients[:, k], b1
+    return x * b1 - b2 + coefficients[:, 0]
+
+
+class EphemerisCache:
+    """
+    Earth-fixed positions of individual objects, answered from Chebyshev
+    fits instead of running SGP4 on every query.
+
+    Each object gets a segment of segment_seconds, aligned to multiples of
+    its length so objects refitted together share sample times.  A segment
+    is fitted from one propagation at Chebyshev nodes about sample_seconds
+    apart, and checked against a propagation at the points between the
+    nodes; the largest difference is kept as its error bound.  Segments
+    over tolerance_km are split in half until they fit or reach
+    sample_seconds.  A query outside an object's segment refits it.
+
+    At most max_objects segments are kept, least recently used first out.
+    A query for more objects than that still fits and answers all of them,
+    and keeps their coefficients for the next query of the same objects,
+    but is cut back to max_objects once it has been served.
+
+    Meant for the handful of objects being displayed or tracked, e.g. the
+    pass predictor's active set; it is no help when every query covers
+    the whole catalog.
+    """
+
+    def __init__(self, segment_seconds=600.0, sample_seconds=60.0, tolerance_km=0.05, max_objects=512):
+        self.segment_days = segment_seconds / DAY_S
+        self.min_segment_days = sample_seconds / DAY_S
+        self.node_count = int(round(segment_seconds / sample_seconds)) + 1
+        self.tolerance_km = tolerance_km
+        self.max_objects = max_objects
+        self.segments = OrderedDict()
+        self.hits = 0
+        self.fits = 0
+        self.evictions = 0
+        self._batch = None
+
+        self._nodes = chebyshev_nodes(self.node_count)
+        self._transform = chebyshev_transform(self.node_count)
+        # Extrema of the next Chebyshev polynomial, which fall between the nodes.
+        self._checks = np.cos(np.pi * np.arange(1, self.node_count) / self.node_count)[::-1]
+
+    def __len__(self):
+        return len(self.segments)
+
+    def clear(self):
+        """Drop every segment, e.g. after the elements they were fitted from change."""
+        self.segments.clear()
+        self._batch = None
+
+    def error_bound(self, key):
+        """Largest fit error (km) seen when the object's current segment was checked."""
+        segment = self.segments.get(key)
+        return None if segment is None else segment[3]
+
+    def _fit(self, sat_array, indices, keys, tt, span, ts):
+        """Fit aligned segments of length span containing tt; returns the keys that missed tolerance."""
+        start = np.floor(tt / span) * span
+        x = np.concatenate([self._nodes, self._checks])
+        times = ts.tt_jd(start + (x + 1.0) / 2.0 * span)
+        errors, r_itrs = sat_array.subset(indices).itrs_positions(times)
+        r_itrs[errors != 0] = np.nan
+
+        samples = r_itrs[:, :self.node_count]
+        coefficients = np.einsum('kn,mnc->mkc', self._transform, samples)
+        checks = r_itrs[:, self.node_count:]
+        fitted = np.stack([chebyshev_evaluate(coefficients, np.full(len(keys), xc)) for xc in self._checks], axis=1)
+        error = np.max(np.linalg.norm(fitted - checks, axis=-1), axis=1)
+
+        retry = []
+        for key, c, e in zip(keys, coefficients, error.tolist()):
+            if e > self.tolerance_km and span / 2.0 >= self.min_segment_days:
+                retry.append(key)
+                continue
+            self._store(key, (start, span, c, e))
+        self.fits += 1
+        return retry
+
+    def _store(self, key, segment):
+        self.segments[key] = segment
+        self.segments.move_to_end(key)
+
+    def _evict(self):
+        """Drop least recently used segments down to max_objects."""
+        while len(self.segments) > self.max_objects:
+            self.segments.popitem(last=False)
+            self.evictions += 1
+
+    def _covers(self, segment, tt):
+        return segment is not None and segment[0] <= tt < segment[0] + segment[1]
+
+    def itrs_positions(self, sat_array, t):
+        """
+        Earth-fixed position (km) of every object in sat_array at the single
+        time t, shape (n, 3), refitting the segments that do not cover t.
+        """
+        tt = float(t.tt)
+        batch = self._batch
+        if batch is not None and batch[0] is sat_array and batch[1] <= tt < batch[2]:
+            # Same objects as last time and every segment still covers tt:
+            # evaluate the stacked coefficients without touching the dict.
+            self.hits += len(sat_array)
+            _, _, _, start, length, coefficients = batch
+            return chebyshev_evaluate(coefficients, 2.0 * (tt - start) / length - 1.0)
+
+        stale = [i for i, key in enumerate(sat_array.keys) if not self._covers(self.segments.get(key), tt)]
+        self.hits += len(sat_array) - len(stale)
+
+        span = self.segment_days
+        while stale:
+            keys = [sat_array.keys[i] for i in stale]
+            retry = set(self._fit(sat_array, stale, keys, tt, span, t.ts))
+            stale = [i for i, key in zip(stale, keys) if key in retry]
+            span /= 2.0
+
+        if not len(sat_array):
+            return np.zeros((0, 3))
+        # Evict only once the batch is gathered, so a batch larger than
+        # max_objects keeps every segment it is about to read.
+        segments = []
+        for key in sat_array.keys:
+            self.segments.move_to_end(key)
+            segments.append(self.segments[key])
+        start = np.array([segment[0] for segment in segments])
+        length = np.array([segment[1] for segment in segments])
+        coefficients = np.stack([segment[2] for segment in segments])
+        self._batch = (sat_array, start.max(), (start + length).min(), start, length, coefficients)
+        self._evict()
+        return chebyshev_evaluate(coefficients, 2.0 * (tt - start) / length - 1.0)
+
+    def altaz(self, sat_array, t, location):
+        """Altitude, azimuth (degrees) and range (km) of every object at time t, each of shape (n,)."""
+        observer_km, enu = observer_frame(location)
+        return topocentric_altaz(self.itrs_positions(sat_array, t), observer_km, enu)
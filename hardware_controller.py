@@ -1,51 +1,376 @@
+import os
+import json
+import math
 import time
+import threading
+import numpy as np
 import serial
+from servo_protocol import FRAME_SIZE, BinaryServoLink, StreamDecoder
+
+ASCII_COMMAND_SIZE = len("SERVO,000.0,00.0\n")
+
+# Location the sketch prints: "Latitude: 17.389801 | Longitude: 78.321151"
+LOCATION_PREFIX = "Latitude:"
+
+
+def _nmea_degrees(value, hemisphere):
+    """ddmm.mmmm (or dddmm.mmmm) plus N/S/E/W to signed decimal degrees."""
+    point = value.index('.')
+    degrees = float(value[:point - 2]) + float(value[point - 2:]) / 60.0
+    return -degrees if hemisphere in ('S', 'W') else degrees
+
+
+def parse_location_line(line):
+    """
+    (latitude, longitude) from one line of the serial stream, or None if the
+    line holds no valid fix.  Understands the sketch's "Latitude: ... |
+    Longitude: ..." lines and raw NMEA GGA/RMC sentences.
+    """
+    line = line.strip()
+    try:
+        if line.startswith(LOCATION_PREFIX):
+            latitude, longitude = line.split('|')
+            return float(latitude.split(':')[1]), float(longitude.split(':')[1])
+        if line.startswith('$') and '*' in line:
+            body, checksum = line[1:].split('*', 1)
+            total = 0
+            for char in body:
+                total ^= ord(char)
+            if total != int(checksum[:2], 16):
+                return None
+            fields = body.split(',')
+            if fields[0].endswith('GGA') and fields[6] not in ('', '0'):
+                return _nmea_degrees(fields[2], fields[3]), _nmea_degrees(fields[4], fields[5])
+            if fields[0].endswith('RMC') and fields[2] == 'A':
+                return _nmea_degrees(fields[3], fields[4]), _nmea_degrees(fields[5], fields[6])
+    except (ValueError, IndexError):
+        pass
+    return None
+
+
+def distance_km(a, b):
+    """Great-circle distance between two (latitude, longitude) points in degrees."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(min(1.0, math.sqrt(h)))
+
 
 class HardwareController:
-    def __init__(self, port="COM5", baud_rate=9600):
+    def __init__(self, port="COM5", baud_rate=9600, stream_rate=25.0, latency=None,
+                 location_cache=None, min_location_change_km=1.0, protocol="ascii", window=4):
         self.port = port
         self.baud_rate = baud_rate
         self.ser = None
         self.location= []
         self.no_port_mode = False
 
-    def connect(self):
+        # GPS: a reader thread parses the serial stream into the latest fix,
+        # a (latitude, longitude, unix time) tuple.  Listeners are told when
+        # the location moves more than min_location_change_km, and the fix is
+        # saved to location_cache so the next start has a location at once.
+        self.location_cache = location_cache
+        self.min_location_change_km = min_location_change_km
+        self._fix = None
+        self._fix_lock = threading.Lock()
+        self._first_fix = threading.Event()
+        self._location_listeners = []
+        self._listener_lock = threading.Lock()
+        self._reported_location = None
+        self._reader_thread = None
+        self._reader_stop = threading.Event()
+
+        # Streaming mode: a timing thread interpolates the current trajectory
+        # and sends SERVO commands at stream_rate Hz.  latency is how far
+        # ahead of the clock to point, in seconds; None estimates it from the
+        # command size, baud rate and measured write time.
+        self.stream_rate = stream_rate
+        self.latency = latency
+        self.last_command = None
+        self.commands_sent = 0
+        self._trajectory = None
+        self._trajectory_lock = threading.Lock()
+        self._write_time = 0.0
+        self._stream_thread = None
+        self._stream_stop = threading.Event()
+
+        # protocol="binary" sends servo commands as CRC-checked frames with
+        # sequence numbers (see servo_protocol), keeping up to window of them
+        # in flight; the reader thread hands the board's acks to the link.
+        self.protocol = protocol
+        self.window = window
+        self.link = None
+
+    def load_cached_location(self):
+        """Last location saved to location_cache, or None."""
+        if not self.location_cache or not os.path.exists(self.location_cache):
+            return None
+        try:
+            with open(self.location_cache, 'r') as f:
+                cached = json.load(f)
+            return [float(cached['latitude']), float(cached['longitude'])]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not read cached location {self.location_cache}: {str(e)}")
+            return None
+
+    def _save_location(self, location, timestamp):
+        if not self.location_cache:
+            return
+        try:
+            temp_path = self.location_cache + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump({'latitude': location[0], 'longitude': location[1], 'time': timestamp}, f)
+            os.replace(temp_path, self.location_cache)
+        except OSError as e:
+            print(f"Could not save location to {self.location_cache}: {str(e)}")
+
+    def add_location_listener(self, callback):
+        """
+        Call callback([latitude, longitude]) whenever the GPS location moves.
+        If the GPS has already reported a fix, callback gets it at once, so
+        a fix that came in before the listener was added is not lost.
+        Callbacks run on the reader thread and should hand the location on
+        rather than act on it there.
+        """
+        with self._listener_lock:
+            self._location_listeners.append(callback)
+            current = self._reported_location if self.latest_fix() is not None else None
+        if current is not None:
+            callback(list(current))
+
+    def latest_fix(self):
+        """Most recent (latitude, longitude, unix time) from the GPS, or None before the first fix."""
+        with self._fix_lock:
+            return self._fix
+
+    def handle_line(self, line):
+        """Record the fix in one line of the serial stream, if it has one."""
+        location = parse_location_line(line)
+        if location is None:
+            return
+        timestamp = time.time()
+        with self._fix_lock:
+            self._fix = (location[0], location[1], timestamp)
+
+        with self._listener_lock:
+            reported = self._reported_location
+            if reported is not None and distance_km(reported, location) < self.min_location_change_km:
+                self._first_fix.set()
+                return
+            self._reported_location = location
+            listeners = list(self._location_listeners)
+        self.location = [location[0], location[1]]
+        self._save_location(location, timestamp)
+        self._first_fix.set()
+        if reported is not None:
+            print(f"GPS location changed to {location[0]:.6f}, {location[1]:.6f}")
+        for callback in listeners:
+            try:
+                callback(list(location))
+            except Exception as e:
+                print(f"Error in location listener: {str(e)}")
+
+    def _read_serial(self):
+        decoder = StreamDecoder()
+        while not self._reader_stop.is_set():
+            try:
+                chunk = self.ser.read(self.ser.in_waiting or 1)
+            except (serial.SerialException, OSError) as e:
+                print(f"Serial error while reading GPS: {e}")
+                break
+            if not chunk:
+                continue
+            frames, lines = decoder.feed(chunk)
+            for frame in frames:
+                if self.link is not None:
+                    self.link.handle_frame(frame)
+            for line in lines:
+                self.handle_line(line)
+
+    def start_reader(self):
+        """Parse the serial stream for GPS fixes in a background thread."""
+        if self._reader_thread is not None or self.ser is None:
+            return
+        self._reader_stop.clear()
+        self._reader_thread = threading.Thread(target=self._read_serial, name="gps-reader", daemon=True)
+        self._reader_thread.start()
+
+    def stop_reader(self):
+        if self._reader_thread is not None:
+            self._reader_stop.set()
+            self._reader_thread.join()
+            self._reader_thread = None
+
+    def wait_for_fix(self, timeout=None):
+        """Block until the first GPS fix arrives; returns it, or None on timeout."""
+        self._first_fix.wait(timeout)
+        return self.latest_fix()
+
+    def connect(self, fix_timeout=30.0):
+        """
+        Open the serial port and start the GPS reader.  Returns the cached
+        last-known location straight away if there is one, otherwise waits
+        up to fix_timeout seconds for the first fix; [0, 0] if none came.
+        Later fixes reach the listeners from the reader thread.
+        """
         try:
-            self.ser = serial.Serial(self.port, self.baud_rate, timeout=1)
-            time.sleep(2)  
+            self.ser = serial.Serial(self.port, self.baud_rate, timeout=0.1)
             print(f"Successfully connected to Arduino on {self.port}")
-            self.serial_data=self.ser.read(100000).decode("utf-8")
-            self.serial_data=self.serial_data.split("\n")[-2]
-            print(self.serial_data)
-            if "Latitude" in self.serial_data:
-                print(self.serial_data)
-                temp = self.serial_data.split(" ")
-                self.location=[float(temp[1]),float(temp[-1])]
-                print(type(self.location[0]))
-            else:
-                print(self.serial_data)
-                self.location=[0,0]
-                return 
+            self.start_reader()
+
+            cached = self.load_cached_location()
+            if cached is not None:
+                print(f"Using last known location {cached[0]:.6f}, {cached[1]:.6f} until the GPS reports")
+                self.location = cached
+                self._reported_location = tuple(cached)
+                return self.location
+
+            fix = self.wait_for_fix(fix_timeout)
+            if fix is None:
+                print(f"No GPS fix within {fix_timeout} s")
+                self.location = [0, 0]
+            return self.location
 
         except serial.SerialException:
             print(f"Error: Could not connect to Arduino on {self.port}. Entering non-port mode.")
             self.no_port_mode = True
             self.location=[17.389801,78.321151] # This is non port mode location you can change it to your desired location (only change if you don't have a gps module)
-        finally:
             return self.location
 
+    def _write_frame(self, frame):
+        started = time.perf_counter()
+        self.ser.write(frame)
+        # Smooth the measured write time into the latency estimate.
+        self._write_time += 0.2 * (time.perf_counter() - started - self._write_time)
+
+    def binary_link(self):
+        """The BinaryServoLink for the open port, made on first use."""
+        if self.link is None:
+            self.link = BinaryServoLink(self._write_frame, self.window)
+        return self.link
+
+    def link_stats(self):
+        """Throughput and ack latency of the binary link, or None in ASCII mode."""
+        return self.link.stats() if self.link is not None else None
+
+    def upload_trajectory(self, times, azimuths, altitudes):
+        """
+        Binary protocol only: queue a trajectory on the board, which then
+        steps through it on its own clock.  times are unix times; the first
+        point is timed from now, less the estimated latency.
+        """
+        if self.protocol != "binary" or self.no_port_mode or not self.ser:
+            return 0
+        times = np.asarray(times, dtype=float)
+        delays = np.diff(times, prepend=time.time() + self.estimated_latency()) * 1000.0
+        return self.binary_link().upload_trajectory(zip(delays.tolist(), azimuths, altitudes))
+
     def move_servos(self, azimuth, altitude):
-        if not self.no_port_mode and self.ser:
-            try:
-                command = f"SERVO,{azimuth},{altitude}\n"
-                self.ser.write(command.encode())
-            except serial.SerialException as e:
-                print(f"Serial error during servo command: {e}")
-                self.no_port_mode = True
-        else:
+        if self.no_port_mode or not self.ser:
             print(f"Servo: Az={azimuth}, Alt={altitude}")
+        self._send_servo(azimuth, altitude)
+
+    def set_trajectory(self, times, azimuths, altitudes):
+        """
+        Give the streaming thread a new trajectory to follow: unix times and
+        the azimuth and altitude (degrees) of the target at each of them.
+        Azimuths are unwrapped so interpolation across north goes the short way.
+        """
+        times = np.asarray(times, dtype=float)
+        ok = np.isfinite(azimuths) & np.isfinite(altitudes)
+        if not np.any(ok):
+            self.clear_trajectory()
+            return
+        azimuths = np.unwrap(np.asarray(azimuths, dtype=float)[ok], period=360.0)
+        with self._trajectory_lock:
+            self._trajectory = (times[ok], azimuths, np.asarray(altitudes, dtype=float)[ok])
+
+    def clear_trajectory(self):
+        with self._trajectory_lock:
+            self._trajectory = None
+
+    def trajectory_end(self):
+        """Unix time the current trajectory runs out, or None without one."""
+        with self._trajectory_lock:
+            return None if self._trajectory is None else self._trajectory[0][-1]
+
+    def pointing_at(self, when):
+        """Interpolated (azimuth, altitude) at unix time when, or None outside the trajectory."""
+        with self._trajectory_lock:
+            trajectory = self._trajectory
+        if trajectory is None:
+            return None
+        times, azimuths, altitudes = trajectory
+        if when < times[0] or when > times[-1]:
+            return None
+        return float(np.interp(when, times, azimuths) % 360.0), float(np.interp(when, times, altitudes))
+
+    def estimated_latency(self):
+        """Seconds from deciding a command to the Arduino acting on it."""
+        if self.latency is not None:
+            return self.latency
+        # 10 bits per byte on the wire, plus however long write() blocks.
+        return self.command_size() * 10.0 / self.baud_rate + self._write_time
+
+    def command_size(self):
+        """Bytes on the wire per servo command."""
+        return FRAME_SIZE if self.protocol == "binary" else ASCII_COMMAND_SIZE
+
+    def effective_stream_rate(self):
+        """stream_rate, capped at the number of commands per second the serial link can carry."""
+        link_rate = self.baud_rate / (self.command_size() * 10.0)
+        return min(self.stream_rate, link_rate)
+
+    def _send_servo(self, azimuth, altitude):
+        command = f"SERVO,{azimuth:.1f},{altitude:.1f}\n"
+        self.last_command = command
+        self.commands_sent += 1
+        if self.no_port_mode or not self.ser:
+            # Streamed many times a second: not worth printing each one.
+            return
+        try:
+            if self.protocol == "binary":
+                self.binary_link().send_point(azimuth, altitude)
+            else:
+                self._write_frame(command.encode())
+        except serial.SerialException as e:
+            print(f"Serial error during servo command: {e}")
+            self.no_port_mode = True
+
+    def _stream(self):
+        interval = 1.0 / self.effective_stream_rate()
+        next_send = time.monotonic()
+        while not self._stream_stop.is_set():
+            target = self.pointing_at(time.time() + self.estimated_latency())
+            if target is not None:
+                self._send_servo(*target)
+            next_send += interval
+            delay = next_send - time.monotonic()
+            if delay < 0:
+                next_send = time.monotonic()
+                delay = 0
+            self._stream_stop.wait(delay)
+
+    def start_stream(self):
+        """Start sending interpolated servo commands from a dedicated timing thread."""
+        if self.streaming:
+            return
+        self._stream_stop.clear()
+        self._stream_thread = threading.Thread(target=self._stream, name="servo-stream", daemon=True)
+        self._stream_thread.start()
+
+    def stop_stream(self):
+        if self._stream_thread is not None:
+            self._stream_stop.set()
+            self._stream_thread.join()
+            self._stream_thread = None
+
+    @property
+    def streaming(self):
+        return self._stream_thread is not None
 
     def close(self):
+        self.stop_stream()
+        self.stop_reader()
         if not self.no_port_mode and self.ser:
             try:
                 self.ser.close()
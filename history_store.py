@@ -0,0 +1,240 @@
+import os
+import sys
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+# One raw little-endian file per column in every segment.
+COLUMNS = (('timestamps', '<f8'), ('norad_ids', '<i4'), ('azimuths', '<f4'), ('altitudes', '<f4'),
+           ('distances', '<f4'), ('latitudes', '<f8'), ('longitudes', '<f8'))
+
+
+def segment_name(timestamp):
+    """Segment holding a POSIX timestamp: its UTC day as YYYYMMDD."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y%m%d')
+
+
+class HistoryStore:
+    """
+    Append-only on-disk log of every tracked position, so tracking history
+    outlives the process and can be queried or plotted again later.
+
+    Records are (timestamp, NORAD id, azimuth, altitude, distance, observer
+    latitude, longitude).  They are stored by column in one directory per
+    UTC day under history_dir, each column a raw array file that only ever
+    grows, so a time range maps to a few segments and a binary search.
+    Each segment also keeps index.npz, its rows ordered by object, which
+    is rebuilt when the segment has grown since.  A write cut short leaves
+    some columns longer than others; readers only see the rows every
+    column has and the next write truncates the rest before appending.
+
+    record() never blocks: it puts the record on a bounded queue (dropping
+    it if the writer has fallen that far behind) and a writer thread
+    appends batches of up to batch_size records every flush_interval
+    seconds.
+    """
+
+    def __init__(self, history_dir, batch_size=512, flush_interval=1.0, queue_size=100000):
+        self.history_dir = history_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.records = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        self._indexes = {}
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(history_dir, exist_ok=True)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Write whatever is queued and stop the writer."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def record(self, timestamp, norad_id, azimuth, altitude, distance, location):
+        """Queue one observation for writing; returns False if it had to be dropped."""
+        try:
+            self.records.put_nowait((timestamp, norad_id, azimuth, altitude, distance, location[0], location[1]))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _take(self, timeout):
+        batch = []
+        try:
+            batch.append(self.records.get(timeout=timeout) if timeout else self.records.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self.records.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take(self.flush_interval)
+            if batch:
+                self._write(batch)
+                if len(batch) < self.batch_size:
+                    self._stop.wait(self.flush_interval)
+
+    def flush(self):
+        """Write every queued record now."""
+        while True:
+            batch = self._take(0)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch):
+        rows = np.array(batch, dtype=np.float64)
+        days = np.array([segment_name(t) for t in rows[:, 0]])
+        with self._write_lock:
+            for day in np.unique(days):
+                selected = rows[days == day]
+                directory = os.path.join(self.history_dir, day)
+                os.makedirs(directory, exist_ok=True)
+                try:
+                    self._truncate(directory)
+                    for i, (key, dtype) in enumerate(COLUMNS):
+                        with open(os.path.join(directory, f'{key}.bin'), 'ab') as f:
+                            selected[:, i].astype(dtype).tofile(f)
+                    self.written += len(selected)
+                except OSError as e:
+                    print(f"Error writing tracking history: {str(e)}")
+
+    def segments(self, start=None, end=None):
+        """Segment names overlapping the POSIX time range [start, end], oldest first."""
+        names = sorted(name for name in os.listdir(self.history_dir)
+                       if len(name) == 8 and name.isdigit())
+        first = segment_name(start) if start is not None else None
+        last = segment_name(end) if end is not None else None
+        return [name for name in names if (first is None or name >= first) and (last is None or name <= last)]
+
+    def _rows(self, directory):
+        """Number of rows every column file in directory has."""
+        sizes = []
+        for key, dtype in COLUMNS:
+            path = os.path.join(directory, f'{key}.bin')
+            sizes.append(os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def _truncate(self, directory):
+        """Cut every column file in directory back to the rows they all have."""
+        rows = self._rows(directory)
+        for key, dtype in COLUMNS:
+            path = os.path.join(directory, f'{key}.bin')
+            if os.path.exists(path) and os.path.getsize(path) != rows * np.dtype(dtype).itemsize:
+                os.truncate(path, rows * np.dtype(dtype).itemsize)
+
+    def _columns(self, segment):
+        """Memory-mapped columns of a segment, cut to the rows every column has."""
+        directory = os.path.join(self.history_dir, segment)
+        rows = self._rows(directory)
+        if rows == 0:
+            return None
+        return {key: np.memmap(os.path.join(directory, f'{key}.bin'), dtype=dtype, mode='r', shape=(rows,))
+                for key, dtype in COLUMNS}
+
+    def _index(self, segment, norad_ids):
+        """(sorted unique ids, first position of each, rows ordered by id) for a segment."""
+        rows = len(norad_ids)
+        cached = self._indexes.get(segment)
+        if cached is not None and cached[0] == rows:
+            return cached[1]
+        path = os.path.join(self.history_dir, segment, 'index.npz')
+        index = None
+        if os.path.exists(path):
+            try:
+                with np.load(path) as saved:
+                    if int(saved['rows']) == rows:
+                        index = (saved['ids'], saved['starts'], saved['order'])
+            except (OSError, ValueError, KeyError):
+                index = None
+        if index is None:
+            order = np.argsort(norad_ids, kind='stable')
+            ids, starts = np.unique(np.asarray(norad_ids)[order], return_index=True)
+            index = (ids, starts, order)
+            try:
+                temp_path = path + '.tmp.npz'
+                np.savez(temp_path, rows=rows, ids=ids, starts=starts, order=order)
+                os.replace(temp_path, path)
+            except OSError:
+                pass
+        self._indexes[segment] = (rows, index)
+        return index
+
+    def query(self, norad_id=None, start=None, end=None):
+        """
+        Records in the POSIX time range [start, end], of one object or all,
+        oldest first, as a dict of column arrays.
+        """
+        parts = {key: [] for key, _ in COLUMNS}
+        for segment in self.segments(start, end):
+            columns = self._columns(segment)
+            if columns is None:
+                continue
+            if norad_id is None:
+                rows = slice(None)
+                times = columns['timestamps']
+            else:
+                ids, starts, order = self._index(segment, columns['norad_ids'])
+                k = int(np.searchsorted(ids, norad_id))
+                if k == len(ids) or ids[k] != norad_id:
+                    continue
+                rows = order[starts[k]:starts[k + 1] if k + 1 < len(starts) else len(order)]
+                times = columns['timestamps'][rows]
+            lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+            hi = len(times) if end is None else int(np.searchsorted(times, end, side='right'))
+            if norad_id is None:
+                rows = slice(lo, hi)
+            else:
+                rows = rows[lo:hi]
+            for key, _ in COLUMNS:
+                parts[key].append(np.array(columns[key][rows]))
+        return {key: np.concatenate(parts[key]) if parts[key] else np.zeros(0, dtype=dtype)
+                for key, dtype in COLUMNS}
+
+    def objects(self, start=None, end=None):
+        """NORAD ids with records in the time range."""
+        return np.unique(self.query(start=start, end=end)['norad_ids'])
+
+    def snapshot(self, norad_id, start=None, end=None):
+        """An object's records in the form PlotRenderer draws."""
+        from plot_renderer import date_numbers
+        records = self.query(norad_id, start, end)
+        return {
+            'times': date_numbers(records['timestamps']),
+            'altitudes': records['altitudes'].astype(float),
+            'azimuths': records['azimuths'].astype(float),
+            'distances': records['distances'].astype(float),
+            'names': [str(norad_id)] * min(len(records['timestamps']), 20),
+        }
+
+
+if __name__ == "__main__":
+    # python history_store.py NORAD_ID [days]: plot an object's recorded track.
+    from plot_renderer import PlotRenderer
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    store = HistoryStore(os.path.join(base_dir, 'history'))
+    norad_id = int(sys.argv[1])
+    days = float(sys.argv[2]) if len(sys.argv) > 2 else 7.0
+    started = time.perf_counter()
+    snapshot = store.snapshot(norad_id, time.time() - timedelta(days=days).total_seconds(), time.time())
+    print(f"{len(snapshot['times'])} records of {norad_id} in {(time.perf_counter() - started) * 1000:.1f} ms")
+    if len(snapshot['times']):
+        renderer = PlotRenderer(os.path.join(base_dir, 'tracking_plots'))
+        print(f"Plot saved to {renderer.track(snapshot)}")
+        print(f"Sky map saved to {renderer.sky_map(snapshot)}")
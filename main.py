@@ -1,12 +1,85 @@
+import sys
 import time
+import queue
 from data_manager import DataManager
 from debris_tracker import DebrisTracker
+from pass_predictor import PassPredictor
+from ephemeris_cache import EphemerisCache
+from target_scheduler import TargetScheduler
+from tracking_pipeline import TrackingPipeline, offer, scheduled_target, select_target
 from hardware_controller import HardwareController
 from ui_components import DebrisTrackerUI
+from terminal_dashboard import TerminalDashboard
+from plot_renderer import RenderWorker
+from history_store import HistoryStore
 import os
 from codecarbon import EmissionsTracker
 
-def main():
+def track_sequentially(tracker, catalog, hardware, ui, loc, scheduler=None, history=None, locations=None):
+    """
+    The original tracking loop: every step runs in turn, then sleeps.
+    locations: Optional queue of new observer locations, applied between steps
+    """
+    last_sky_map_time = time.time()
+    sky_map_interval = 60  
+    
+    while True:
+        if locations is not None and not locations.empty():
+            new_loc = locations.get_nowait()
+            tracker.set_location(new_loc)
+            loc[:] = new_loc
+        t = tracker.ts.now()
+        all_visible_objects = tracker.calculate_positions(catalog, t)
+        
+        if scheduler is not None:
+            target = scheduled_target(scheduler, catalog, t, all_visible_objects)
+        else:
+            target = select_target(all_visible_objects)
+        
+        if target:
+            norad_id, data = target
+            if history is not None and data['visible']:
+                history.record(time.time(), norad_id, data['azimuth'], data['altitude'], data['distance'], loc)
+            ui.display_tracking_info(
+                catalog.name(norad_id), 
+                data['altitude'],
+                data['azimuth'],
+                data['distance'],
+                data['visible'],
+                loc
+            )
+            
+            hardware.move_servos(data['azimuth'], data['altitude'])
+        elif all_visible_objects:
+            norad_id, data = next(iter(all_visible_objects.items()))
+            ui.display_tracking_info(
+                catalog.name(norad_id), 
+                data['altitude'],
+                data['azimuth'],
+                data['distance'],
+                data['visible'],
+                loc
+            )
+        else:
+            ui.display_tracking_info("No objects", 0.0, 0.0, 0.0, False, loc)
+        
+        current_time = time.time()
+        if current_time - last_sky_map_time >= sky_map_interval and len(ui.tracking_data):
+            ui.generate_sky_map()
+            last_sky_map_time = current_time
+        
+        time.sleep(2)
+
+
+def main(pipeline=True, port="COM5", workers=None):
+    """
+    Run the tracker.  By default each tick propagates only the objects with
+    a pass in progress.  With workers set, every tick instead propagates
+    the whole catalog across that many worker processes; the pass
+    predictor then only drives the target scheduler.  The two are
+    exclusive, since the predictor's set of objects changes as passes
+    begin and end and the worker pool is built for one fixed set.
+    """
     tracker_output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'emissions')
     os.makedirs(tracker_output_dir, exist_ok=True)
     emissions_tracker = EmissionsTracker(
@@ -18,20 +91,21 @@ def main():
     emissions_tracker.start()
     print("\nCarbon emissions tracking started.")
     
-    data_manager = DataManager()
-    hardware = HardwareController(port="COM5", baud_rate=9600)
+    data_manager = DataManager(load_workers=os.cpu_count() or 1)
+    hardware = HardwareController(port=port, baud_rate=9600,
+                                  location_cache=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'last_location.json'))
     ui = DebrisTrackerUI()
 
     print("\nLoading debris data...")
     try:
         print("Fetching combined debris data from multiple online sources...")
-        all_debris = data_manager.load_all_debris(fetch_online=True, use_local=True)
+        catalog = data_manager.load_catalog(fetch_online=True, use_local=True)
     except Exception as e:
         print(f"\nError loading online debris data: {str(e)}")
         print("Attempting to use local cache as fallback...")
-        all_debris = data_manager.load_all_debris(fetch_online=False, use_local=True)
+        catalog = data_manager.load_catalog(fetch_online=False, use_local=True)
     
-    if not all_debris:
+    if not catalog:
         print("\nNo debris data found online or in TLE cache directory.")
         print(f"Please check your internet connection or ensure TLE files are present in: {data_manager.tle_cache_dir}")
         print("If you want to use local files, you can run the data_manager.py script separately first to download and cache the data.")
@@ -40,19 +114,11 @@ def main():
         return
 
     print("\nLoaded debris data summary:")
-    total_objects = 0
-    for source, debris_dict in all_debris.items():
-        if isinstance(debris_dict, dict):
-            source_objects = len(debris_dict)
-            total_objects += source_objects
-            print(f"- {source}: {source_objects} objects")
-    
-    print(f"Total objects loaded: {total_objects}\n")
-    
-    if total_objects == 0:
-        print("No valid debris objects found in the data.")
-        emissions_tracker.stop()
-        return
+    for group, group_objects in sorted(catalog.group_counts().items()):
+        print(f"- {group}: {group_objects} objects")
+
+    total_objects = len(catalog)
+    print(f"Total unique objects loaded: {total_objects}\n")
         
     plots_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tracking_plots')
     os.makedirs(plots_dir, exist_ok=True)
@@ -68,67 +134,57 @@ def main():
         print(f"Found an error: {e}")
         print("Please check the GPS module connection and try again.")
         return
-    tracker = DebrisTracker(loc)
+    # The pass predictor narrows each tick to the passes in progress, which
+    # already does what the reachability prefilter would.
+    tracker = DebrisTracker(loc, batched=True, workers=workers)
+    predictor = PassPredictor(tracker, horizon_hours=6)
+    if workers:
+        print(f"Propagating the whole catalog across {workers} worker processes")
+    else:
+        tracker.pass_predictor = predictor
+    # Room for the thousand or so passes usually in progress.
+    tracker.ephemeris_cache = EphemerisCache(max_objects=2048)
+
+    print("Predicting passes over the next 6 hours...")
+    schedule = predictor.update(catalog)
+    print(f"Found {len(schedule)} passes")
+    scheduler = TargetScheduler(predictor)
+    ui.renderer = RenderWorker(plots_dir).start()
+    history = HistoryStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history')).start()
 
     try:
-        last_sky_map_time = time.time()
-        sky_map_interval = 60  
-        
-        while True:
-            all_visible_objects = {}
-            
-            for source, debris_dict in all_debris.items():
-                if not isinstance(debris_dict, dict):
-                    continue
-                    
-                visible_objects = tracker.calculate_positions(debris_dict)
-                if visible_objects:
-                    all_visible_objects.update(visible_objects)
-            
-            prioritized_objects = {name: data for name, data in all_visible_objects.items() 
-                                 if data.get('visible', False) is True}
-            
-            if prioritized_objects:
-                name, data = next(iter(prioritized_objects.items()))
-                ui.display_tracking_info(
-                    name, 
-                    data['altitude'],
-                    data['azimuth'],
-                    data['distance'],
-                    data['visible'],
-                    loc
-                )
-                
-                hardware.move_servos(data['azimuth'], data['altitude'])
-            elif all_visible_objects:
-                name, data = next(iter(all_visible_objects.items()))
-                ui.display_tracking_info(
-                    name, 
-                    data['altitude'],
-                    data['azimuth'],
-                    data['distance'],
-                    data['visible'],
-                    loc
-                )
-            else:
-                ui.display_tracking_info("No objects", 0.0, 0.0, 0.0, False, loc)
-            
-            current_time = time.time()
-            if current_time - last_sky_map_time >= sky_map_interval and ui.tracking_data['timestamps']:
-                ui.generate_sky_map()
-                last_sky_map_time = current_time
-            
-            time.sleep(2)
+        # GPS fixes arrive on the reader thread: hand them to the tracking
+        # loop, which moves the tracker between steps.
+        if pipeline:
+            tracking = TrackingPipeline(tracker, catalog, hardware, ui, loc, stream=True, scheduler=scheduler,
+                                        dashboard=TerminalDashboard(), history=history)
+            hardware.add_location_listener(tracking.set_location)
+            tracking.run()
+        else:
+            locations = queue.Queue(maxsize=1)
+            hardware.add_location_listener(lambda new_loc: offer(locations, new_loc))
+            track_sequentially(tracker, catalog, hardware, ui, loc, scheduler, history, locations)
             
     except KeyboardInterrupt:
         print("\nStopping debris tracker...")
-        if ui.tracking_data['timestamps']:
+        if len(ui.tracking_data):
             print("Generating final tracking plots...")
             ui.plot_tracking_data()
             ui.generate_sky_map()
             
     finally:
+        stats = hardware.link_stats()
+        if stats:
+            latency = f"{stats['latency'] * 1000:.1f} ms" if stats['latency'] is not None else "n/a"
+            print(f"Servo link: {stats['acked']}/{stats['sent']} commands acked, "
+                  f"{stats['commands_per_second']:.1f} commands/s, latency {latency}, "
+                  f"{stats['retransmits']} resent, {stats['dropped']} dropped")
         hardware.close()
+        tracker.close()
+        ui.renderer.close()
+        print(f"Saved {len(ui.renderer.saved)} plots to {plots_dir}")
+        history.close()
+        print(f"Recorded {history.written} positions to {history.history_dir}")
         emissions = emissions_tracker.stop()
         print(f"Carbon emissions tracking stopped.")
         print(f"Total emissions: {emissions:.6f} kg CO2eq")
@@ -136,4 +192,5 @@ def main():
         print("Tracking system shutdown complete")
 
 if __name__ == "__main__":
-    main()
+    # python main.py [workers]: propagate on that many worker processes.
+    main(workers=int(sys.argv[1]) if len(sys.argv) > 1 else None)
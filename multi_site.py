@@ -0,0 +1,118 @@
+import numpy as np
+from skyfield.api import load, wgs84
+from satellite_array import SatelliteArray, contents_key, observer_frames, sites_altaz
+
+
+class MultiSiteTracker:
+    """
+    Visibility of a catalog from several ground stations at once.
+
+    Every object is propagated once per time step into the Earth-fixed
+    frame.  A single matrix product of the positions with the stacked
+    east/north/up vectors of all sites then gives every object's local
+    coordinates at every site, and altitude, azimuth and range are worked
+    out only for the (site, object) pairs above the horizon, so each
+    extra site costs a small fraction of the propagation.  Sites are given
+    as {name: (latitude, longitude)}.
+
+    Pass a DebrisTracker as tracker to share its packed satellite arrays.
+    """
+
+    def __init__(self, sites, tracker=None, min_altitude=0.0):
+        self.ts = tracker.ts if tracker is not None else load.timescale()
+        self.tracker = tracker
+        self.min_altitude = min_altitude
+        self.sites = {}
+        self._satellite_arrays = {}
+        for name, loc in dict(sites).items():
+            self.sites[name] = wgs84.latlon(loc[0], loc[1])
+        self._update_frames()
+
+    def _update_frames(self):
+        self.names = list(self.sites)
+        self.observer_km, self.enu = observer_frames(self.sites.values())
+        # Local coordinates of r from every site are axes @ r - origins.
+        self._axes = self.enu.reshape(-1, 3)
+        self._origins = np.einsum('sij,sj->si', self.enu, self.observer_km)[:, :, None]
+
+    def add_site(self, name, loc):
+        self.sites[name] = wgs84.latlon(loc[0], loc[1])
+        self._update_frames()
+
+    def remove_site(self, name):
+        del self.sites[name]
+        self._update_frames()
+
+    def satellite_array(self, debris_dict):
+        if self.tracker is not None:
+            return self.tracker.satellite_array(debris_dict)
+        version = contents_key(debris_dict)
+        cached = self._satellite_arrays.get(id(debris_dict))
+        if cached is not None and cached[0] is debris_dict and cached[1] == version:
+            return cached[2]
+        sat_array = SatelliteArray.from_satellites(debris_dict)
+        self._satellite_arrays[id(debris_dict)] = (debris_dict, version, sat_array)
+        return sat_array
+
+    def itrs_positions(self, debris_dict, t):
+        """
+        (sat_array, positions) with the Earth-fixed position (km) of every
+        object at time t, shape (n, 3); failed propagations are NaN.
+        """
+        sat_array = self.satellite_array(debris_dict)
+        errors, r_itrs = sat_array.itrs_positions(t)
+        r_itrs = r_itrs[:, 0, :]
+        r_itrs[errors[:, 0] != 0] = np.nan
+        return sat_array, r_itrs
+
+    def local(self, r_itrs):
+        """East, north and up offsets (km) of every object from every site, shape (S, 3, n)."""
+        return (self._axes @ r_itrs.T).reshape(len(self.names), 3, len(r_itrs)) - self._origins
+
+    def visibility(self, local):
+        """Mask of shape (S, n): object n is above site S's minimum altitude."""
+        up = local[:, 2, :]
+        with np.errstate(invalid='ignore'):
+            if self.min_altitude <= 0.0:
+                return up > 0.0
+            distance = np.sqrt(np.einsum('sin,sin->sn', local, local))
+            return up > distance * np.sin(np.radians(self.min_altitude))
+
+    def altaz(self, debris_dict, t=None):
+        """Altitude, azimuth (degrees) and range (km) of every object from every site, each (S, n)."""
+        current_time = t if t is not None else self.ts.now()
+        _, r_itrs = self.itrs_positions(debris_dict, current_time)
+        return sites_altaz(r_itrs, self.observer_km, self.enu)
+
+    def positions(self, debris_dict, t=None):
+        """
+        The visible (site, object) pairs as arrays: (sat_array, site indices,
+        object indices, altitude, azimuth, range).
+        """
+        current_time = t if t is not None else self.ts.now()
+        sat_array, r_itrs = self.itrs_positions(debris_dict, current_time)
+        local = self.local(r_itrs)
+        mask = self.visibility(local)
+        sites, objects = np.nonzero(mask)
+        east, north, up = local[:, 0, :][mask], local[:, 1, :][mask], local[:, 2, :][mask]
+        distance = np.sqrt(east * east + north * north + up * up)
+        alt = np.degrees(np.arcsin(up / distance))
+        az = np.degrees(np.arctan2(east, north)) % 360.0
+        return sat_array, sites, objects, alt, az, distance
+
+    def calculate_positions(self, debris_dict, t=None):
+        """
+        {site name: {key: position}} of the objects visible from each site,
+        with positions as DebrisTracker.calculate_positions returns them.
+        """
+        sat_array, sites, objects, alt, az, distance = self.positions(debris_dict, t)
+        visible = {name: {} for name in self.names}
+        keys = sat_array.keys
+        for k, (s, i) in enumerate(zip(sites, objects)):
+            visible[self.names[s]][keys[i]] = {
+                'altitude': float(alt[k]),
+                'azimuth': float(az[k]),
+                'distance': float(distance[k]),
+                'visible': True
+            }
+        return visible
@@ -0,0 +1,219 @@
+import os
+import sys
+import threading
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from sgp4.api import Satrec, SatrecArray, WGS72
+from satellite_array import observer_frame, teme_to_itrs, time_arrays, topocentric_altaz
+
+# Orbital elements of one object, as sgp4init takes them.  Epoch is in
+# days since 1949 December 31 00:00 UT.
+ELEMENT_FIELDS = ('epoch', 'bstar', 'ndot', 'nddot', 'ecco', 'argpo', 'inclo', 'mo', 'no_kozai', 'nodeo',
+                  'satnum')
+# Per-tick request written by the host: time, observer position and ENU
+# matrix, and a stop flag.
+CONTROL_JD, CONTROL_FRACTION, CONTROL_FRACTION_UT1 = 0, 1, 2
+CONTROL_OBSERVER = slice(3, 6)
+CONTROL_ENU = slice(6, 15)
+CONTROL_STOP = 15
+CONTROL_SIZE = 16
+
+
+def element_table(satrecs):
+    """The sgp4init inputs of every Satrec, shape (n, len(ELEMENT_FIELDS))."""
+    table = np.empty((len(satrecs), len(ELEMENT_FIELDS)))
+    for i, sat in enumerate(satrecs):
+        table[i] = (sat.jdsatepoch - 2433281.5 + sat.jdsatepochF, sat.bstar, sat.ndot, sat.nddot, sat.ecco,
+                    sat.argpo, sat.inclo, sat.mo, sat.no_kozai, sat.nodeo, sat.satnum)
+    return table
+
+
+def satrecs_from_table(table):
+    satrecs = []
+    for epoch, bstar, ndot, nddot, ecco, argpo, inclo, mo, no_kozai, nodeo, satnum in table:
+        sat = Satrec()
+        sat.sgp4init(WGS72, 'i', int(satnum), epoch, bstar, ndot, nddot, ecco, argpo, inclo, mo, no_kozai, nodeo)
+        satrecs.append(sat)
+    return satrecs
+
+
+def _attach(name, shape):
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+
+
+def _worker(elements_name, output_name, control_name, count, lo, hi, start, done):
+    """Propagate objects lo:hi each time the host releases start, then meet it at done."""
+    memories = []
+    try:
+        memory, elements = _attach(elements_name, (count, len(ELEMENT_FIELDS)))
+        memories.append(memory)
+        memory, output = _attach(output_name, (3, count))
+        memories.append(memory)
+        memory, control = _attach(control_name, (CONTROL_SIZE,))
+        memories.append(memory)
+        array = SatrecArray(satrecs_from_table(elements[lo:hi]))
+        while True:
+            start.wait()
+            if control[CONTROL_STOP]:
+                break
+            jd = control[CONTROL_JD:CONTROL_JD + 1].copy()
+            fraction = control[CONTROL_FRACTION:CONTROL_FRACTION + 1].copy()
+            fraction_ut1 = control[CONTROL_FRACTION_UT1:CONTROL_FRACTION_UT1 + 1].copy()
+            errors, r, _ = array.sgp4(jd, fraction)
+            r_itrs = teme_to_itrs(r, jd, fraction_ut1)[:, 0, :]
+            alt, az, distance = topocentric_altaz(r_itrs, control[CONTROL_OBSERVER].copy(),
+                                                  control[CONTROL_ENU].reshape(3, 3).copy())
+            failed = errors[:, 0] != 0
+            alt[failed] = np.nan
+            az[failed] = np.nan
+            distance[failed] = np.nan
+            output[0, lo:hi] = alt
+            output[1, lo:hi] = az
+            output[2, lo:hi] = distance
+            done.wait()
+    finally:
+        for memory in memories:
+            memory.close()
+
+
+class ParallelPropagator:
+    """
+    Propagates a SatelliteArray across a pool of worker processes that
+    stay up between ticks.
+
+    The elements of every object are put in shared memory once; each
+    worker builds SGP4 records for its own contiguous share of the objects
+    at start-up.  On each tick the host writes the time and observer frame
+    into a small shared control block and releases the workers with a
+    barrier; they write altitude, azimuth and range straight into a shared
+    output buffer and meet the host at a second barrier.  Nothing is
+    pickled per tick.  Call close() (or use it as a context manager) to
+    stop the workers and free the shared memory.
+
+    If a worker has died or a tick takes longer than timeout, altaz()
+    raises threading.BrokenBarrierError and the pool has to be closed and
+    started again.
+    """
+
+    def __init__(self, sat_array, workers=None, timeout=60.0):
+        self.sat_array = sat_array
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(sat_array) or 1))
+        self.timeout = timeout
+        count = len(sat_array)
+        self._count = count
+        self._memories = []
+        elements = self._shared((count, len(ELEMENT_FIELDS)))
+        elements[:] = element_table(sat_array.satrecs)
+        self._output = self._shared((3, count))
+        self._control = self._shared((CONTROL_SIZE,))
+        self._control[:] = 0.0
+
+        # Spawn rather than fork: the tracking loop has threads running.
+        context = multiprocessing.get_context('spawn')
+        self._start = context.Barrier(self.workers + 1)
+        self._done = context.Barrier(self.workers + 1)
+        bounds = np.linspace(0, count, self.workers + 1).astype(int)
+        self._processes = [
+            context.Process(target=_worker, name=f"propagation-{i}", daemon=True,
+                            args=(self._memories[0].name, self._memories[1].name, self._memories[2].name,
+                                  count, int(bounds[i]), int(bounds[i + 1]), self._start, self._done))
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+    def _shared(self, shape):
+        memory = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 8))
+        self._memories.append(memory)
+        return np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def altaz(self, t, location):
+        """
+        Altitude and azimuth (degrees) and range (km) of every object at the
+        single time t as seen from location, each of shape (n,).  Objects
+        whose propagation failed come back as NaN.
+        """
+        jd, fraction, fraction_ut1 = time_arrays(t)
+        observer_km, enu = observer_frame(location)
+        control = self._control
+        control[CONTROL_JD] = jd[0]
+        control[CONTROL_FRACTION] = fraction[0]
+        control[CONTROL_FRACTION_UT1] = fraction_ut1[0]
+        control[CONTROL_OBSERVER] = observer_km
+        control[CONTROL_ENU] = enu.ravel()
+        if not all(process.is_alive() for process in self._processes):
+            # Nobody would meet us at the barrier: fail now, not after
+            # timeout.  A worker killed while waiting on a barrier is never
+            # woken, so waking the others through it would hang for good.
+            raise threading.BrokenBarrierError
+        self._start.wait(self.timeout)
+        self._done.wait(self.timeout)
+        alt, az, distance = self._output.copy()
+        return alt, az, distance
+
+    def close(self):
+        if self._processes:
+            # With a worker dead the barriers cannot be used (see altaz), so
+            # the others are terminated rather than released.
+            timeout = 0.0
+            if all(process.is_alive() for process in self._processes):
+                self._control[CONTROL_STOP] = 1.0
+                try:
+                    self._start.wait(self.timeout)
+                    timeout = self.timeout
+                except threading.BrokenBarrierError:
+                    pass
+            for process in self._processes:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+            self._processes = []
+        for memory in self._memories:
+            memory.close()
+            memory.unlink()
+        self._memories = []
+
+
+def benchmark(catalog, location, workers_list=(1, 2, 4), ticks=20):
+    """Mean seconds per tick for each worker count, propagating the whole catalog."""
+    from skyfield.api import load, wgs84
+    from satellite_array import SatelliteArray
+
+    ts = load.timescale()
+    observer = wgs84.latlon(location[0], location[1])
+    sat_array = SatelliteArray.from_satellites(catalog)
+    results = {}
+    started = time.perf_counter()
+    for _ in range(ticks):
+        sat_array.altaz(ts.now(), observer)
+    results[0] = (time.perf_counter() - started) / ticks
+    for workers in workers_list:
+        with ParallelPropagator(sat_array, workers) as propagator:
+            propagator.altaz(ts.now(), observer)
+            started = time.perf_counter()
+            for _ in range(ticks):
+                propagator.altaz(ts.now(), observer)
+            results[workers] = (time.perf_counter() - started) / ticks
+    return results
+
+
+if __name__ == "__main__":
+    # python parallel_propagation.py [workers...]: time one tick of the cached catalog.
+    from data_manager import DataManager
+    catalog = DataManager().load_catalog(fetch_online=False, use_local=True)
+    workers_list = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4, os.cpu_count() or 1]
+    for workers, seconds in benchmark(catalog, (17.389801, 78.321151), workers_list).items():
+        label = "in process" if workers == 0 else f"{workers} workers"
+        print(f"{len(catalog)} objects, {label}: {seconds * 1000:.1f} ms per tick")
@@ -0,0 +1,311 @@
+import numpy as np
+from satellite_array import observer_frame, teme_to_itrs, time_arrays, topocentric_altaz
+from visibility_filter import ReachabilityIndex
+
+DAY_S = 86400.0
+
+
+class PassSchedule:
+    """
+    Time-sorted set of passes.  Times are Julian dates (TT).  Passes are kept
+    sorted by rise time, so the passes in progress at a given moment are found
+    with a binary search bounded by the longest pass in the schedule.
+    """
+
+    def __init__(self, keys, rise, culmination, set_, max_altitude, rise_clipped=None, set_clipped=None):
+        keys = np.asarray(keys, dtype=object)
+        rise = np.asarray(rise, dtype=float)
+        order = np.argsort(rise, kind='stable')
+        self.keys = keys[order]
+        self.rise = rise[order]
+        self.culmination = np.asarray(culmination, dtype=float)[order]
+        self.set = np.asarray(set_, dtype=float)[order]
+        self.max_altitude = np.asarray(max_altitude, dtype=float)[order]
+        n = len(self.rise)
+        self.rise_clipped = np.zeros(n, dtype=bool) if rise_clipped is None else np.asarray(rise_clipped, dtype=bool)[order]
+        self.set_clipped = np.zeros(n, dtype=bool) if set_clipped is None else np.asarray(set_clipped, dtype=bool)[order]
+        self.max_duration = float(np.max(self.set - self.rise)) if n else 0.0
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [], [])
+
+    def __len__(self):
+        return len(self.rise)
+
+    def rows(self, mask):
+        return PassSchedule(self.keys[mask], self.rise[mask], self.culmination[mask], self.set[mask],
+                            self.max_altitude[mask], self.rise_clipped[mask], self.set_clipped[mask])
+
+    def merge(self, other):
+        return PassSchedule(np.concatenate([self.keys, other.keys]),
+                            np.concatenate([self.rise, other.rise]),
+                            np.concatenate([self.culmination, other.culmination]),
+                            np.concatenate([self.set, other.set]),
+                            np.concatenate([self.max_altitude, other.max_altitude]),
+                            np.concatenate([self.rise_clipped, other.rise_clipped]),
+                            np.concatenate([self.set_clipped, other.set_clipped]))
+
+    def active(self, jd, tolerance=0.0):
+        """Row indices of the passes whose [rise, set] window, widened by tolerance, contains jd."""
+        lo = np.searchsorted(self.rise, jd - self.max_duration - tolerance, side='left')
+        hi = np.searchsorted(self.rise, jd + tolerance, side='right')
+        rows = np.arange(lo, hi)
+        return rows[self.set[rows] >= jd - tolerance]
+
+    def active_keys(self, jd, tolerance=0.0):
+        return set(self.keys[self.active(jd, tolerance)])
+
+    def between(self, jd_start, jd_end):
+        """Row indices of the passes that overlap [jd_start, jd_end]."""
+        hi = np.searchsorted(self.rise, jd_end, side='right')
+        rows = np.arange(0, hi)
+        return rows[self.set[rows] >= jd_start]
+
+    def for_keys(self, keys):
+        keys = set(keys)
+        return np.array([i for i, key in enumerate(self.keys) if key in keys], dtype=np.int64)
+
+
+def _interpolate_crossing(t0, t1, a0, a1, level):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.clip(np.nan_to_num((level - a0) / (a1 - a0)), 0.0, 1.0)
+    return t0 + (t1 - t0) * fraction
+
+
+def altitude_grid(sat_array, location, times, coarse_factor=4):
+    """
+    Altitude (degrees) of every object in sat_array at every time in times,
+    shape (n, T).  The whole batch is first propagated only at every
+    coarse_factor-th time.  Between two coarse samples the sub-satellite
+    point cannot move further than the object's ground rate allows, so
+    intervals in which the object provably stays out of the observer's
+    visibility cone are filled with -90 and never propagated at full rate.
+    """
+    n_times = len(times.tt)
+    alt = np.full((len(sat_array), n_times), -90.0)
+    if not len(sat_array):
+        return alt
+
+    coarse = np.arange(0, n_times, max(coarse_factor, 1))
+    if coarse[-1] != n_times - 1:
+        coarse = np.append(coarse, n_times - 1)
+
+    index = ReachabilityIndex(sat_array)
+    observer_km, enu = observer_frame(location)
+    up = observer_km / np.linalg.norm(observer_km)
+
+    errors, r_itrs = sat_array.itrs_positions(times[coarse])
+    with np.errstate(invalid='ignore'):
+        direction = r_itrs / np.linalg.norm(r_itrs, axis=2)[..., None]
+        separation = np.arccos(np.clip(direction @ up, -1.0, 1.0))
+    separation[errors != 0] = np.nan
+
+    # Smallest separation reachable between neighbouring coarse samples.
+    jd = np.asarray(times.tt, dtype=float)
+    gap = np.diff(jd[coarse]) * DAY_S
+    closest = (separation[:, :-1] + separation[:, 1:] - index.ground_rate[:, None] * gap[None, :]) / 2
+    flagged = np.nan_to_num(closest, nan=np.inf) <= (index.cone + index.margin)[:, None]
+
+    jd_utc, fraction, fraction_ut1 = time_arrays(times)
+    for obj in np.flatnonzero(flagged.any(axis=1)):
+        samples = np.unique(np.concatenate([np.arange(coarse[k], coarse[k + 1] + 1)
+                                            for k in np.flatnonzero(flagged[obj])]))
+        sat_errors, r, _ = sat_array.satrecs[obj].sgp4_array(jd_utc[samples], fraction[samples])
+        r = teme_to_itrs(r, jd_utc[samples], fraction_ut1[samples])
+        sample_alt, _, _ = topocentric_altaz(r, observer_km, enu)
+        sample_alt[sat_errors != 0] = -90.0
+        alt[obj, samples] = np.nan_to_num(sample_alt, nan=-90.0)
+    return alt
+
+
+def find_passes(sat_array, location, times, min_altitude=0.0, coarse_factor=4):
+    """
+    Find every pass of the objects in sat_array over location during the
+    Skyfield Time array times.  Rise and set are interpolated linearly
+    between grid points and culmination with a parabola through the highest
+    sample, so accuracy is a small fraction of the grid step.
+    Returns a PassSchedule.
+    """
+    jd = np.asarray(times.tt, dtype=float)
+    alt = altitude_grid(sat_array, location, times, coarse_factor)
+    above = alt > min_altitude
+    n_times = len(jd)
+
+    # Pad both ends so passes already in progress, or still in progress at
+    # the end of the window, get a rise and a set.
+    padded = np.zeros((above.shape[0], n_times + 2), dtype=bool)
+    padded[:, 1:-1] = above
+    edges = np.diff(padded.astype(np.int8), axis=1)
+    rise_obj, rise_idx = np.nonzero(edges == 1)
+    set_obj, set_idx = np.nonzero(edges == -1)
+    set_idx = set_idx - 1  # last sample that is still above the horizon
+
+    keys = np.asarray(sat_array.keys, dtype=object)
+    if not len(rise_obj):
+        return PassSchedule.empty()
+
+    rise_clipped = rise_idx == 0
+    set_clipped = set_idx == n_times - 1
+
+    prev = np.maximum(rise_idx - 1, 0)
+    rise = np.where(rise_clipped, jd[rise_idx],
+                    _interpolate_crossing(jd[prev], jd[rise_idx], alt[rise_obj, prev], alt[rise_obj, rise_idx], min_altitude))
+    after = np.minimum(set_idx + 1, n_times - 1)
+    set_ = np.where(set_clipped, jd[set_idx],
+                    _interpolate_crossing(jd[set_idx], jd[after], alt[set_obj, set_idx], alt[set_obj, after], min_altitude))
+
+    culmination = np.empty(len(rise_obj))
+    max_altitude = np.empty(len(rise_obj))
+    for i, (obj, start, stop) in enumerate(zip(rise_obj, rise_idx, set_idx)):
+        segment = alt[obj, start:stop + 1]
+        k = int(np.argmax(segment)) + start
+        peak, offset = alt[obj, k], 0.0
+        if start < k < stop:
+            a, b, c = alt[obj, k - 1], alt[obj, k], alt[obj, k + 1]
+            denominator = a - 2 * b + c
+            if denominator < 0:
+                offset = 0.5 * (a - c) / denominator
+                peak = b - 0.25 * (a - c) * offset
+        step = jd[min(k + 1, n_times - 1)] - jd[k] if n_times > 1 else 0.0
+        culmination[i] = jd[k] + offset * step
+        max_altitude[i] = peak
+
+    return PassSchedule(keys[rise_obj], rise, culmination, set_, max_altitude, rise_clipped, set_clipped)
+
+
+class PassPredictor:
+    """
+    Precomputes rise, culmination and set times for every object in a debris
+    dict over a rolling horizon, in batches of batch_size objects, and lets the
+    tracking loop propagate only the objects that are up right now.
+
+    The schedule is updated incrementally: objects that are added or whose
+    element set changes are recomputed on their own, removed objects are
+    dropped, and the window is extended forward once half of it has elapsed.
+    A change of observer location recomputes everything.
+    """
+
+    def __init__(self, tracker, horizon_hours=24.0, step_seconds=30.0, coarse_factor=4,
+                 batch_size=1000, min_altitude=0.0):
+        self.tracker = tracker
+        self.horizon = horizon_hours / 24.0
+        self.step = step_seconds / DAY_S
+        self.coarse_factor = coarse_factor
+        self.batch_size = batch_size
+        self.min_altitude = min_altitude
+        # Passes are treated as in progress one grid step before their
+        # predicted rise and after their set, which absorbs the interpolation
+        # error of grazing passes.
+        self.tolerance = self.step
+        self._schedules = {}
+
+    def schedule(self, debris_dict):
+        entry = self._schedules.get(id(debris_dict))
+        return entry['schedule'] if entry else PassSchedule.empty()
+
+    def _location_key(self):
+        location = self.tracker.location
+        return (location.latitude.degrees, location.longitude.degrees, location.elevation.m)
+
+    def _time_grid(self, jd_start, jd_end):
+        n = max(int(np.ceil((jd_end - jd_start) / self.step)), 1) + 1
+        return self.tracker.ts.tt_jd(jd_start + np.arange(n) * self.step)
+
+    def compute(self, sat_array, jd_start, jd_end):
+        """Predict passes for every object in sat_array, batch by batch."""
+        static = ReachabilityIndex(sat_array).static_candidates(self.tracker.location.latitude.degrees)
+        times = self._time_grid(jd_start, jd_end)
+        schedule = PassSchedule.empty()
+        for start in range(0, len(static), self.batch_size):
+            batch = sat_array.subset(static[start:start + self.batch_size])
+            schedule = schedule.merge(find_passes(batch, self.tracker.location, times,
+                                                  self.min_altitude, self.coarse_factor))
+        return schedule
+
+    def update(self, debris_dict, t=None):
+        """Bring the schedule for debris_dict up to date for time t and return it."""
+        t = t if t is not None else self.tracker.ts.now()
+        jd_now = t.tt
+        sat_array = self.tracker.satellite_array(debris_dict)
+        entry = self._schedules.get(id(debris_dict))
+
+        if entry is None or entry['location'] != self._location_key() or jd_now < entry['start']:
+            entry = {'start': jd_now, 'end': jd_now + self.horizon, 'location': self._location_key(),
+                     'sat_array': sat_array, 'fingerprints': _fingerprints(sat_array),
+                     'schedule': self.compute(sat_array, jd_now, jd_now + self.horizon),
+                     'debris_dict': debris_dict, 'active': None}
+            self._schedules[id(debris_dict)] = entry
+            return entry['schedule']
+
+        schedule = entry['schedule']
+        if entry['sat_array'] is not sat_array:
+            # The catalog changed: only recompute objects that are new or
+            # whose element set differs, and drop the ones that went away.
+            old = entry['fingerprints']
+            fingerprints = _fingerprints(sat_array)
+            changed = [i for i, key in enumerate(sat_array.keys) if old.get(key) != fingerprints[key]]
+            stale = (set(old) - set(fingerprints)) | {sat_array.keys[i] for i in changed}
+            if stale:
+                keep = np.array([key not in stale for key in schedule.keys], dtype=bool)
+                schedule = schedule.rows(keep)
+            if changed:
+                schedule = schedule.merge(self.compute(sat_array.subset(changed), jd_now, entry['end']))
+            entry.update(sat_array=sat_array, fingerprints=fingerprints, active=None)
+
+        if jd_now + self.horizon / 2 > entry['end']:
+            extension = self.compute(sat_array, entry['end'], jd_now + self.horizon)
+            schedule = _join(schedule, extension)
+            # Forget passes that are already over.
+            schedule = schedule.rows(schedule.set >= jd_now - self.tolerance)
+            entry['end'] = jd_now + self.horizon
+
+        entry.update(schedule=schedule, debris_dict=debris_dict)
+        return schedule
+
+    def active_array(self, debris_dict, t):
+        """SatelliteArray of the objects in debris_dict with a pass in progress at t."""
+        schedule = self.update(debris_dict, t)
+        entry = self._schedules[id(debris_dict)]
+        active = frozenset(schedule.active_keys(t.tt, self.tolerance))
+        if entry['active'] is None or entry['active'][0] != active:
+            sat_array = entry['sat_array']
+            indices = [i for i, key in enumerate(sat_array.keys) if key in active]
+            entry['active'] = (active, sat_array.subset(indices))
+        return entry['active'][1]
+
+
+def _fingerprints(sat_array):
+    return {key: _fingerprint(sat) for key, sat in zip(sat_array.keys, sat_array.satrecs)}
+
+
+def _fingerprint(satrec):
+    return (satrec.satnum, satrec.jdsatepoch, satrec.jdsatepochF, satrec.no_kozai, satrec.ecco, satrec.inclo)
+
+
+def _join(schedule, extension):
+    """
+    Append a schedule computed for the following window, gluing together
+    passes that were cut at the boundary between the two windows.  Returns
+    a new schedule; the two given are left as they are.
+    """
+    culmination, set_ = schedule.culmination.copy(), schedule.set.copy()
+    max_altitude, set_clipped = schedule.max_altitude.copy(), schedule.set_clipped.copy()
+    open_rows = {key: i for i, key in enumerate(schedule.keys) if set_clipped[i]}
+    keep = np.ones(len(extension), dtype=bool)
+    for j, key in enumerate(extension.keys):
+        i = open_rows.pop(key, None) if extension.rise_clipped[j] else None
+        if i is None:
+            continue
+        set_[i] = extension.set[j]
+        set_clipped[i] = extension.set_clipped[j]
+        if extension.max_altitude[j] > max_altitude[i]:
+            max_altitude[i] = extension.max_altitude[j]
+            culmination[i] = extension.culmination[j]
+        keep[j] = False
+    # Passes still open at the old window end that did not continue have set.
+    for i in open_rows.values():
+        set_clipped[i] = False
+    joined = PassSchedule(schedule.keys, schedule.rise, culmination, set_, max_altitude,
+                          schedule.rise_clipped, set_clipped)
+    return joined.merge(extension.rows(keep))
@@ -0,0 +1,185 @@
+import os
+import queue
+import time
+import multiprocessing
+from datetime import datetime
+
+SKY_MAP_POINTS = 20
+
+
+def date_numbers(timestamps):
+    """POSIX timestamps as Matplotlib date numbers in local time."""
+    import matplotlib.dates as mdates
+    offset = datetime.now().astimezone().utcoffset().total_seconds()
+    return mdates.date2num(datetime(1970, 1, 1)) + (timestamps + offset) / 86400.0
+
+
+class PlotRenderer:
+    """
+    The tracking plot and sky map drawn on figures that are built once and
+    kept: each render only swaps the data of the existing artists and saves
+    a PNG.  Uses the Agg canvas directly, so no GUI backend is involved.
+    """
+
+    def __init__(self, plots_dir):
+        import matplotlib.dates as mdates
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.plots_dir = plots_dir
+        os.makedirs(plots_dir, exist_ok=True)
+
+        self.track_figure = Figure(figsize=(12, 10))
+        FigureCanvasAgg(self.track_figure)
+        self.track_axes = self.track_figure.subplots(3, 1)
+        self.track_lines = []
+        for ax, color, title, label in zip(self.track_axes, 'brg',
+                                           ('Altitude Over Time', 'Azimuth Over Time', 'Distance Over Time'),
+                                           ('Altitude (degrees)', 'Azimuth (degrees)', 'Distance (km)')):
+            line, = ax.plot([], [], f'{color}-')
+            ax.set_title(title)
+            ax.set_ylabel(label)
+            ax.xaxis_date()
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
+            ax.grid(True)
+            self.track_lines.append(line)
+        self.track_axes[-1].set_xlabel('Time')
+        self.track_figure.tight_layout()
+
+        self.sky_figure = Figure(figsize=(8, 8))
+        FigureCanvasAgg(self.sky_figure)
+        ax = self.sky_figure.add_subplot(111, projection='polar')
+        self.sky_points = ax.scatter([], [], c=[], cmap='viridis', alpha=0.7, s=50, vmin=0, vmax=1)
+        colorbar = self.sky_figure.colorbar(self.sky_points, ax=ax)
+        colorbar.set_label('Time Sequence (newer points are lighter)')
+        ax.set_theta_zero_location('N')
+        ax.set_theta_direction(-1)
+        ax.set_rmax(90)
+        ax.set_rticks([0, 30, 60, 90])
+        ax.set_rlabel_position(-22.5)
+        ax.grid(True)
+        ax.set_title('Sky Map of Tracked Objects', va='bottom')
+
+    def _save(self, figure, prefix):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(self.plots_dir, f'{prefix}_{timestamp}.png')
+        figure.savefig(path)
+        return path
+
+    def track(self, snapshot):
+        """Altitude, azimuth and distance over time; returns the PNG path."""
+        times = snapshot['times']
+        for ax, line, key in zip(self.track_axes, self.track_lines, ('altitudes', 'azimuths', 'distances')):
+            line.set_data(times, snapshot[key])
+            ax.relim()
+            ax.autoscale_view()
+        return self._save(self.track_figure, 'debris_track')
+
+    def sky_map(self, snapshot):
+        """The last SKY_MAP_POINTS positions on a polar sky map; returns the PNG path."""
+        import numpy as np
+
+        azimuths = np.radians(snapshot['azimuths'][-SKY_MAP_POINTS:])
+        zenith = 90.0 - np.asarray(snapshot['altitudes'][-SKY_MAP_POINTS:])
+        self.sky_points.set_offsets(np.column_stack([azimuths, zenith]))
+        self.sky_points.set_array(np.arange(len(azimuths), dtype=float))
+        self.sky_points.set_clim(0, max(len(azimuths) - 1, 1))
+        return self._save(self.sky_figure, 'sky_map')
+
+
+def _render_loop(requests, results, plots_dir):
+    """Worker process: render the newest request of each kind, skipping older ones."""
+    renderer = PlotRenderer(plots_dir)
+    running = True
+    while running:
+        pending = {}
+        item = requests.get()
+        while True:
+            if item is None:
+                running = False
+            else:
+                kind, snapshot = item
+                if kind in pending:
+                    results.put(('coalesced', kind, None))
+                pending[kind] = snapshot
+            try:
+                item = requests.get_nowait()
+            except queue.Empty:
+                break
+        for kind, snapshot in pending.items():
+            try:
+                results.put(('saved', kind, getattr(renderer, kind)(snapshot)))
+            except Exception as e:
+                results.put(('error', kind, str(e)))
+
+
+class RenderWorker:
+    """
+    Renders plots in a separate process so saving PNGs never stalls the
+    tracking loop, which only hands over a snapshot of the data.  If
+    requests arrive faster than they can be drawn, the worker draws only
+    the newest of each kind.  Call poll() now and then to collect what has
+    been saved.
+    """
+
+    def __init__(self, plots_dir):
+        self.plots_dir = plots_dir
+        self.submitted = 0
+        self.saved = []
+        self.coalesced = 0
+        self.errors = []
+        self._pending = 0
+        # Spawn rather than fork: the tracking loop has threads running.
+        context = multiprocessing.get_context('spawn')
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._process = context.Process(target=_render_loop, name="plot-renderer",
+                                        args=(self._requests, self._results, plots_dir), daemon=True)
+
+    def start(self):
+        self._process.start()
+        return self
+
+    def submit(self, kind, snapshot):
+        """Queue a 'track' or 'sky_map' render of snapshot without waiting for it."""
+        self._requests.put((kind, snapshot))
+        self.submitted += 1
+        self._pending += 1
+
+    def poll(self, timeout=0.0):
+        """Collect finished renders; returns the paths saved since the last poll."""
+        saved = []
+        while True:
+            try:
+                if timeout and not saved:
+                    status, kind, result = self._results.get(timeout=timeout)
+                else:
+                    status, kind, result = self._results.get_nowait()
+            except queue.Empty:
+                self.saved.extend(saved)
+                return saved
+            self._pending -= 1
+            if status == 'saved':
+                saved.append(result)
+            elif status == 'coalesced':
+                self.coalesced += 1
+            else:
+                self.errors.append(f"{kind}: {result}")
+
+    def wait(self, timeout=30.0):
+        """Wait for every submitted render to finish or be skipped."""
+        deadline = time.monotonic() + timeout
+        while self._pending > 0 and self._process.is_alive():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self.poll(timeout=min(remaining, 0.5))
+        return self._pending <= 0
+
+    def close(self, timeout=30.0):
+        """Finish outstanding renders and stop the worker."""
+        if self._process.is_alive():
+            self.wait(timeout)
+            self._requests.put(None)
+            self._process.join(timeout)
+        self.poll()
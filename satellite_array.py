@@ -0,0 +1,172 @@
+import numpy as np
+from sgp4.api import SatrecArray
+from skyfield.sgp4lib import theta_GMST1982
+
+DAY_S = 86400.0
+
+
+def time_arrays(t):
+    """
+    Split a Skyfield Time (scalar or array) into the arrays SGP4 expects.
+    Returns (jd, fraction, fraction_ut1), each a 1-D array.  The UTC
+    fraction is the UT1 one less UT1 - UTC.
+    """
+    jd = np.atleast_1d(np.asarray(t.whole, dtype=float))
+    fraction_ut1 = np.atleast_1d(np.asarray(t.ut1_fraction, dtype=float))
+    fraction = np.atleast_1d(np.asarray(t.ut1_fraction - t.dut1 / DAY_S, dtype=float))
+    jd, fraction, fraction_ut1 = np.broadcast_arrays(jd, fraction, fraction_ut1)
+    return jd, fraction, fraction_ut1
+
+
+def contents_key(debris_dict):
+    """
+    What a packed array of debris_dict must be rebuilt on a change of, in
+    constant time: a DebrisCatalog's version, bumped on every change, or a
+    plain dict's length.  To change the satellites of a plain dict without
+    changing its length, replace the dict rather than edit it.
+    """
+    version = getattr(debris_dict, 'version', None)
+    return len(debris_dict) if version is None else version
+
+
+def teme_to_itrs(r_teme, jd, fraction_ut1):
+    """
+    Rotate TEME positions of shape (n, T, 3) into the Earth-fixed frame
+    for the T times given.  Polar motion is ignored, as in Skyfield's
+    default satellite handling.
+    """
+    theta, _ = theta_GMST1982(jd, fraction_ut1)
+    cos_t = np.cos(theta)
+    sin_t = np.sin(theta)
+    x = r_teme[..., 0]
+    y = r_teme[..., 1]
+    r_itrs = np.empty_like(r_teme)
+    r_itrs[..., 0] = cos_t * x + sin_t * y
+    r_itrs[..., 1] = cos_t * y - sin_t * x
+    r_itrs[..., 2] = r_teme[..., 2]
+    return r_itrs
+
+
+def observer_frame(location):
+    """
+    Return (position_km, enu_matrix) for a Skyfield GeographicPosition.
+    The rows of enu_matrix are the local east, north and up unit vectors.
+    """
+    lat = location.latitude.radians
+    lon = location.longitude.radians
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    sin_lon, cos_lon = np.sin(lon), np.cos(lon)
+    enu = np.array([
+        [-sin_lon, cos_lon, 0.0],
+        [-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat],
+        [cos_lat * cos_lon, cos_lat * sin_lon, sin_lat],
+    ])
+    return np.asarray(location.itrs_xyz.km, dtype=float), enu
+
+
+def topocentric_altaz(r_itrs, observer_km, enu):
+    """
+    Convert Earth-fixed positions (..., 3) into altitude and azimuth in
+    degrees and range in km as seen from the observer.
+    """
+    offset = r_itrs - observer_km
+    local = offset @ enu.T
+    distance = np.sqrt(np.einsum('...i,...i->...', local, local))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        alt = np.degrees(np.arcsin(local[..., 2] / distance))
+    az = np.degrees(np.arctan2(local[..., 0], local[..., 1])) % 360.0
+    return alt, az, distance
+
+
+def observer_frames(locations):
+    """
+    observer_frame for several locations at once: positions (S, 3) in km
+    and ENU matrices (S, 3, 3).
+    """
+    frames = [observer_frame(location) for location in locations]
+    if not frames:
+        return np.zeros((0, 3)), np.zeros((0, 3, 3))
+    return np.stack([frame[0] for frame in frames]), np.stack([frame[1] for frame in frames])
+
+
+def sites_altaz(r_itrs, observers_km, enus):
+    """
+    Altitude and azimuth (degrees) and range (km) of Earth-fixed positions
+    (n, 3) from S observers in one broadcast operation; each result has
+    shape (S, n).
+    """
+    local = np.einsum('sij,nj->sni', enus, r_itrs) - np.einsum('sij,sj->si', enus, observers_km)[:, None, :]
+    distance = np.sqrt(np.einsum('sni,sni->sn', local, local))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        alt = np.degrees(np.arcsin(local[..., 2] / distance))
+    az = np.degrees(np.arctan2(local[..., 0], local[..., 1])) % 360.0
+    return alt, az, distance
+
+
+class SatelliteArray:
+    """
+    A fixed set of satellites packed into one SGP4 SatrecArray so the
+    whole set can be propagated with a single vectorized call.
+    """
+
+    def __init__(self, keys, satrecs):
+        self.keys = list(keys)
+        self.satrecs = list(satrecs)
+        self._array = SatrecArray(self.satrecs) if self.satrecs else None
+        self._positions = None
+
+    @classmethod
+    def from_satellites(cls, debris_dict):
+        """
+        Build from a {name: EarthSatellite} dict as loaded by DataManager, or
+        from a DebrisCatalog, whose Satrecs are made without building any
+        EarthSatellite objects.
+        """
+        if hasattr(debris_dict, 'satrecs'):
+            return cls(debris_dict.keys(), debris_dict.satrecs())
+        return cls(debris_dict.keys(), [sat.model for sat in debris_dict.values()])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def index_of(self, key):
+        """Position of key in the array, using an index built on first use."""
+        if self._positions is None:
+            self._positions = {k: i for i, k in enumerate(self.keys)}
+        return self._positions[key]
+
+    def subset(self, indices):
+        return SatelliteArray([self.keys[i] for i in indices],
+                              [self.satrecs[i] for i in indices])
+
+    def teme_positions(self, t):
+        """
+        Propagate every satellite to time(s) t.
+        Returns (errors, r_teme) with shapes (n, T) and (n, T, 3).
+        """
+        jd, fraction, _ = time_arrays(t)
+        if self._array is None:
+            return np.zeros((0, len(jd)), dtype=np.uint8), np.zeros((0, len(jd), 3))
+        errors, r, _ = self._array.sgp4(jd, fraction)
+        return errors, r
+
+    def itrs_positions(self, t):
+        """Same as teme_positions but rotated into the Earth-fixed frame."""
+        jd, _, fraction_ut1 = time_arrays(t)
+        errors, r = self.teme_positions(t)
+        return errors, teme_to_itrs(r, jd, fraction_ut1)
+
+    def altaz(self, t, location):
+        """
+        Altitude and azimuth (degrees) and range (km) of every satellite as
+        seen from location.  Each result has shape (n, T); objects whose
+        propagation failed come back as NaN.
+        """
+        errors, r_itrs = self.itrs_positions(t)
+        observer_km, enu = observer_frame(location)
+        alt, az, distance = topocentric_altaz(r_itrs, observer_km, enu)
+        failed = errors != 0
+        alt[failed] = np.nan
+        az[failed] = np.nan
+        distance[failed] = np.nan
+        return alt, az, distance
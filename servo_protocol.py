@@ -0,0 +1,253 @@
+import struct
+import threading
+import time
+
+# Every frame is FRAME_SIZE bytes: sync byte, type, sequence number, three
+# little-endian 16-bit fields, then a CRC-16/CCITT of type through fields.
+# Angles travel as centi-degrees.  The sync byte never occurs in the
+# sketch's ASCII output, so frames and text lines can share the port.
+SYNC = 0xA5
+FRAME_FORMAT = '<BBBhhHH'
+FRAME_SIZE = struct.calcsize(FRAME_FORMAT)
+
+POINT = 0x01             # point now: azimuth, altitude
+TRAJECTORY_POINT = 0x02  # queue a point: azimuth, altitude, ms after the previous one
+TRAJECTORY_CLEAR = 0x03  # drop every queued point
+ACK = 0x80               # from the board: status, free queue slots
+
+STATUS_OK = 0
+STATUS_QUEUE_FULL = 1
+STATUS_UNKNOWN = 2
+
+
+def crc16(data, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE, as computed by the sketch."""
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xFFFF
+    return crc
+
+
+def centidegrees(angle):
+    return int(round(angle * 100.0))
+
+
+def encode_frame(kind, seq, a=0, b=0, c=0):
+    body = struct.pack('<BBhhH', kind, seq & 0xFF, a, b, c)
+    return bytes([SYNC]) + body + struct.pack('<H', crc16(body))
+
+
+def decode_frame(frame):
+    """(kind, seq, a, b, c) from one frame, or None if it is damaged."""
+    if len(frame) != FRAME_SIZE or frame[0] != SYNC:
+        return None
+    _, kind, seq, a, b, c, crc = struct.unpack(FRAME_FORMAT, frame)
+    if crc16(frame[1:-2]) != crc:
+        return None
+    return kind, seq, a, b, c
+
+
+def azimuth_field(azimuth):
+    """Azimuth as 0-359.99 degrees, shifted by 180 so its centi-degrees fit a signed field."""
+    return centidegrees(azimuth % 360.0) - 18000
+
+
+def azimuth_from_field(value):
+    return (value + 18000) / 100.0
+
+
+class StreamDecoder:
+    """
+    Splits bytes read from the port into frames and text lines.  Bytes from
+    a sync byte on are held until a whole frame is there; a frame that
+    fails its CRC is dropped one byte at a time so the decoder resyncs on
+    the next sync byte.
+    """
+
+    def __init__(self):
+        self.pending = bytearray()
+        self.text = bytearray()
+        self.bad_frames = 0
+
+    def feed(self, data):
+        """Returns lists of (frames, lines) completed by data."""
+        self.pending += data
+        frames, lines = [], []
+        while self.pending:
+            if self.pending[0] == SYNC:
+                if len(self.pending) < FRAME_SIZE:
+                    break
+                frame = decode_frame(bytes(self.pending[:FRAME_SIZE]))
+                if frame is None:
+                    self.bad_frames += 1
+                    del self.pending[0]
+                    continue
+                frames.append(frame)
+                del self.pending[:FRAME_SIZE]
+                continue
+            sync = self.pending.find(SYNC)
+            chunk = self.pending if sync < 0 else self.pending[:sync]
+            self.text += chunk
+            del self.pending[:len(chunk)]
+            *complete, rest = self.text.split(b'\n')
+            lines.extend(line.decode('utf-8', 'replace') for line in complete)
+            self.text = bytearray(rest)
+        return frames, lines
+
+
+class BinaryServoLink:
+    """
+    Sends framed servo commands and matches the board's acks to them.
+
+    Up to window commands are in flight at once.  A command whose ack has
+    not come back within ack_timeout is sent again, up to max_retries
+    times.  A pointing command sent while the window is full is dropped
+    rather than queued, since a newer one will follow; trajectory uploads
+    wait for room instead.  Acks are fed in by whoever reads the port.
+    """
+
+    def __init__(self, write, window=4, ack_timeout=0.5, max_retries=3):
+        self.write = write
+        self.window = window
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+        self.free_slots = None
+        self._seq = 0
+        self._in_flight = {}
+        self._condition = threading.Condition()
+        self._started = time.monotonic()
+        self.sent = 0
+        self.acked = 0
+        self.bytes_sent = 0
+        self.retransmits = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_full = 0
+        self.latency = None
+        self.min_latency = None
+        self.max_latency = None
+
+    def _next_seq(self):
+        seq = self._seq
+        self._seq = (self._seq + 1) & 0xFF
+        return seq
+
+    def _send(self, frame):
+        self.write(frame)
+        self.sent += 1
+        self.bytes_sent += len(frame)
+
+    def _expire(self, now):
+        """Resend or give up on commands whose ack is overdue.  Holds the condition."""
+        for seq, (frame, sent_at, tries) in list(self._in_flight.items()):
+            if now - sent_at < self.ack_timeout:
+                continue
+            if tries >= self.max_retries:
+                del self._in_flight[seq]
+                self.failed += 1
+                continue
+            self._in_flight[seq] = (frame, now, tries + 1)
+            self.retransmits += 1
+            self._send(frame)
+
+    def send(self, kind, a=0, b=0, c=0, wait=True, timeout=5.0):
+        """
+        Send one command; returns its sequence number, or None if the window
+        stayed full (immediately, unless wait).
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if len(self._in_flight) < self.window:
+                    break
+                if not wait or now >= deadline:
+                    self.dropped += 1
+                    return None
+                self._condition.wait(min(self.ack_timeout, deadline - now))
+            seq = self._next_seq()
+            frame = encode_frame(kind, seq, a, b, c)
+            self._in_flight[seq] = (frame, time.monotonic(), 0)
+            self._send(frame)
+            return seq
+
+    def send_point(self, azimuth, altitude):
+        return self.send(POINT, azimuth_field(azimuth), centidegrees(altitude), wait=False)
+
+    def upload_trajectory(self, points, clear=True):
+        """
+        Queue (delay_ms, azimuth, altitude) points on the board, which plays
+        each delay_ms after the one before.  Commands are pipelined up to the
+        window and sending stops once the board reports its queue full.
+        Waits for the acks; returns the number of points the board queued.
+        """
+        if clear:
+            self.send(TRAJECTORY_CLEAR)
+        queue_full = self.queue_full
+        sent = 0
+        for delay_ms, azimuth, altitude in points:
+            if self.queue_full > queue_full:
+                break
+            delay_ms = int(min(max(delay_ms, 0), 0xFFFF))
+            if self.send(TRAJECTORY_POINT, azimuth_field(azimuth), centidegrees(altitude), delay_ms) is None:
+                break
+            sent += 1
+        self.wait_idle()
+        return sent - (self.queue_full - queue_full)
+
+    def handle_frame(self, frame):
+        """Match an ack from the board to its command."""
+        kind, seq, status, free_slots, _ = frame
+        if kind != ACK:
+            return
+        with self._condition:
+            entry = self._in_flight.pop(seq, None)
+            if entry is None:
+                return
+            _, sent_at, tries = entry
+            if status != STATUS_OK:
+                self.rejected += 1
+            if status == STATUS_QUEUE_FULL:
+                self.queue_full += 1
+            self.acked += 1
+            self.free_slots = free_slots
+            if tries == 0:
+                latency = time.monotonic() - sent_at
+                self.latency = latency if self.latency is None else self.latency + 0.2 * (latency - self.latency)
+                self.min_latency = latency if self.min_latency is None else min(self.min_latency, latency)
+                self.max_latency = latency if self.max_latency is None else max(self.max_latency, latency)
+            self._condition.notify_all()
+
+    def in_flight(self):
+        with self._condition:
+            return len(self._in_flight)
+
+    def wait_idle(self, timeout=5.0):
+        """Wait until every command has been acked or given up on."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._in_flight and time.monotonic() < deadline:
+                self._expire(time.monotonic())
+                self._condition.wait(min(self.ack_timeout, max(deadline - time.monotonic(), 0)))
+            return not self._in_flight
+
+    def stats(self):
+        """Link counters, throughput since creation and ack round-trip times in seconds."""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            'sent': self.sent,
+            'acked': self.acked,
+            'retransmits': self.retransmits,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'commands_per_second': self.acked / elapsed,
+            'bytes_per_second': self.bytes_sent / elapsed,
+            'latency': self.latency,
+            'min_latency': self.min_latency,
+            'max_latency': self.max_latency,
+        }
@@ -10,6 +10,42 @@ Servo servoAltitude;
 
 String inputString = "";
 
+// Binary protocol (see servo_protocol.py): 11-byte frames of sync byte,
+// type, sequence number, three little-endian 16-bit fields and a
+// CRC-16/CCITT of type through fields.  Angles are centi-degrees.
+const byte FRAME_SYNC = 0xA5;
+const byte FRAME_SIZE = 11;
+const byte FRAME_POINT = 0x01;
+const byte FRAME_TRAJECTORY_POINT = 0x02;
+const byte FRAME_TRAJECTORY_CLEAR = 0x03;
+const byte FRAME_ACK = 0x80;
+const byte STATUS_OK = 0;
+const byte STATUS_QUEUE_FULL = 1;
+const byte STATUS_UNKNOWN = 2;
+
+byte frame[FRAME_SIZE];
+byte frameLength = 0;
+
+// Sequence numbers and statuses of the last frames handled, to spot a
+// frame resent because its ack was lost.  At least the host's window.
+const byte RECENT_FRAMES = 8;
+int recentSeq[RECENT_FRAMES] = {-1, -1, -1, -1, -1, -1, -1, -1};
+byte recentStatus[RECENT_FRAMES];
+byte lastSeq = 0;
+
+// Queued trajectory points, each played delay ms after the one before.
+struct TrajectoryPoint
+{
+  int azimuth;
+  int altitude;
+  unsigned int delay;
+};
+const byte QUEUE_SIZE = 32;
+TrajectoryPoint queue[QUEUE_SIZE];
+byte queueHead = 0;
+byte queueCount = 0;
+unsigned long lastStepMs = 0;
+
 void setup()
 {
   Serial.begin(9600);
@@ -39,7 +75,25 @@ void loop()
   // Servo Control via Serial
   while (Serial.available())
   {
-    char inChar = (char)Serial.read();
+    byte inByte = Serial.read();
+    if (frameLength > 0 || (inByte == FRAME_SYNC && inputString.length() == 0))
+    {
+      frame[frameLength++] = inByte;
+      if (frameLength == FRAME_SIZE)
+      {
+        if (processFrame())
+        {
+          frameLength = 0;
+        }
+        else
+        {
+          resync();
+        }
+      }
+      continue;
+    }
+
+    char inChar = (char)inByte;
     if (inChar == '\n')
     {
       processCommand(inputString);
@@ -50,6 +104,140 @@ void loop()
       inputString += inChar;
     }
   }
+
+  playTrajectory();
+}
+
+unsigned int crc16(const byte *data, byte length)
+{
+  unsigned int crc = 0xFFFF;
+  for (byte i = 0; i < length; i++)
+  {
+    crc ^= (unsigned int)data[i] << 8;
+    for (byte bit = 0; bit < 8; bit++)
+    {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+int field(byte offset)
+{
+  return (int)(frame[offset] | ((unsigned int)frame[offset + 1] << 8));
+}
+
+// Centi-degrees to a servo pulse, keeping the 0-180 degree limit of the
+// ASCII commands but without rounding to whole degrees.
+void writeServo(Servo &servo, long centidegrees)
+{
+  centidegrees = constrain(centidegrees, 0, 18000);
+  servo.writeMicroseconds(544 + (centidegrees * (2400 - 544)) / 18000);
+}
+
+void point(int azimuthField, int altitude)
+{
+  // Azimuth arrives shifted down by 180 degrees to fit a signed field.
+  writeServo(servoAzimuth, (long)azimuthField + 18000);
+  writeServo(servoAltitude, altitude);
+}
+
+void sendAck(byte seq, byte status)
+{
+  byte ack[FRAME_SIZE] = {FRAME_SYNC, FRAME_ACK, seq, status, 0,
+                          (byte)(QUEUE_SIZE - queueCount), 0, 0, 0, 0, 0};
+  unsigned int crc = crc16(ack + 1, FRAME_SIZE - 3);
+  ack[FRAME_SIZE - 2] = crc & 0xFF;
+  ack[FRAME_SIZE - 1] = crc >> 8;
+  Serial.write(ack, FRAME_SIZE);
+}
+
+// Drop the first byte of a damaged frame and start again from the next
+// sync byte already read, as the host's StreamDecoder does, so one lost
+// byte does not throw away the frame behind it.
+void resync()
+{
+  byte start = 1;
+  while (start < frameLength && frame[start] != FRAME_SYNC)
+  {
+    start++;
+  }
+  frameLength -= start;
+  memmove(frame, frame + start, frameLength);
+}
+
+// Returns false, without acking, for a frame that fails its CRC.
+bool processFrame()
+{
+  unsigned int crc = frame[FRAME_SIZE - 2] | ((unsigned int)frame[FRAME_SIZE - 1] << 8);
+  if (crc != crc16(frame + 1, FRAME_SIZE - 3))
+  {
+    return false;  // Damaged: no ack, so the sender retransmits.
+  }
+
+  byte type = frame[1];
+  byte seq = frame[2];
+  byte slot = seq % RECENT_FRAMES;
+  if (recentSeq[slot] == seq && (byte)(lastSeq - seq) < RECENT_FRAMES)
+  {
+    // Resent because the ack was lost: ack it again, do not redo it.
+    sendAck(seq, recentStatus[slot]);
+    return true;
+  }
+  byte status = STATUS_OK;
+  if (type == FRAME_POINT)
+  {
+    point(field(3), field(5));
+  }
+  else if (type == FRAME_TRAJECTORY_POINT)
+  {
+    if (queueCount == QUEUE_SIZE)
+    {
+      status = STATUS_QUEUE_FULL;
+    }
+    else
+    {
+      if (queueCount == 0)
+      {
+        lastStepMs = millis();
+      }
+      TrajectoryPoint &next = queue[(queueHead + queueCount) % QUEUE_SIZE];
+      next.azimuth = field(3);
+      next.altitude = field(5);
+      next.delay = (unsigned int)field(7);
+      queueCount++;
+    }
+  }
+  else if (type == FRAME_TRAJECTORY_CLEAR)
+  {
+    queueCount = 0;
+  }
+  else
+  {
+    status = STATUS_UNKNOWN;
+  }
+  recentSeq[slot] = seq;
+  recentStatus[slot] = status;
+  lastSeq = seq;
+  sendAck(seq, status);
+  return true;
+}
+
+void playTrajectory()
+{
+  if (queueCount == 0)
+  {
+    return;
+  }
+  TrajectoryPoint &next = queue[queueHead];
+  unsigned long now = millis();
+  if (now - lastStepMs >= next.delay)
+  {
+    point(next.azimuth, next.altitude);
+    lastStepMs += next.delay;
+    queueHead = (queueHead + 1) % QUEUE_SIZE;
+    queueCount--;
+  }
 }
 
 void processCommand(String cmd)
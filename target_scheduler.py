@@ -0,0 +1,347 @@
+from contextlib import nullcontext
+import numpy as np
+from satellite_array import observer_frame, teme_to_itrs, time_arrays, topocentric_altaz
+
+DAY_S = 86400.0
+
+# The Arduino sketch constrains both servo commands to 0-180 degrees, so
+# only the eastern half of the sky (azimuth 0-180) can be pointed at.
+AZIMUTH_LIMITS = (0.0, 180.0)
+ALTITUDE_LIMITS = (0.0, 180.0)
+
+
+class TargetPlan:
+    """
+    Sequence of tracks the mount should follow, sorted by start time.  Times
+    are Julian dates (TT).  Each row runs from start, when the mount begins
+    slewing to the object (the end of the track before it), through joined,
+    when the object is reached, to end.  slew is the largest single-axis
+    move in degrees needed to get there, and azimuth and altitude are where
+    the object is met at joined.
+    """
+
+    def __init__(self, keys, start, end, slew, joined=None, azimuth=None, altitude=None):
+        self.keys = np.asarray(keys, dtype=object)
+        self.start = np.asarray(start, dtype=float)
+        self.end = np.asarray(end, dtype=float)
+        self.slew = np.asarray(slew, dtype=float)
+        self.joined = self.start.copy() if joined is None else np.asarray(joined, dtype=float)
+        self.azimuth = np.full(len(self.keys), np.nan) if azimuth is None else np.asarray(azimuth, dtype=float)
+        self.altitude = np.full(len(self.keys), np.nan) if altitude is None else np.asarray(altitude, dtype=float)
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def tracked_seconds(self):
+        return float(np.sum(self.end - self.joined) * DAY_S)
+
+    def index_at(self, jd):
+        """Row slewing to or tracking its object at jd, or -1 while idle."""
+        row = int(np.searchsorted(self.start, jd, side='right')) - 1
+        if row >= 0 and jd <= self.end[row]:
+            return row
+        return -1
+
+    def target_at(self, jd):
+        """Key of the object being tracked, or slewed to, at jd."""
+        row = self.index_at(jd)
+        return self.keys[row] if row >= 0 else None
+
+    def slew_at(self, jd):
+        """(key, azimuth, altitude, joined) of the track the mount is slewing to at jd, or None."""
+        row = self.index_at(jd)
+        if row < 0 or jd >= self.joined[row]:
+            return None
+        return self.keys[row], float(self.azimuth[row]), float(self.altitude[row]), float(self.joined[row])
+
+
+def pass_tracks(sat_array, location, ts, schedule, rows, samples=32):
+    """
+    Azimuth and altitude (degrees) of each pass in rows of schedule at
+    samples evenly spaced times from rise to set.  Returns (jd, az, alt),
+    each of shape (len(rows), samples).  Each object is propagated once for
+    all of its passes.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    fractions = np.linspace(0.0, 1.0, samples)
+    jd = schedule.rise[rows, None] + (schedule.set[rows] - schedule.rise[rows])[:, None] * fractions
+    if not len(rows):
+        return jd, np.zeros_like(jd), np.zeros_like(jd)
+
+    position = {key: i for i, key in enumerate(sat_array.keys)}
+    objects = np.array([position[key] for key in schedule.keys[rows]])
+    order = np.argsort(objects, kind='stable')
+    times = jd[order].ravel()
+    jd_utc, fraction, fraction_ut1 = time_arrays(ts.tt_jd(times))
+
+    r_teme = np.empty((len(times), 3))
+    errors = np.empty(len(times), dtype=np.uint8)
+    bounds = np.flatnonzero(np.diff(objects[order])) + 1
+    for group in np.split(np.arange(len(rows)), bounds):
+        span = slice(group[0] * samples, (group[-1] + 1) * samples)
+        satrec = sat_array.satrecs[objects[order[group[0]]]]
+        errors[span], r_teme[span], _ = satrec.sgp4_array(jd_utc[span], fraction[span])
+
+    observer_km, enu = observer_frame(location)
+    alt, az, _ = topocentric_altaz(teme_to_itrs(r_teme, jd_utc, fraction_ut1), observer_km, enu)
+    alt[errors != 0] = np.nan
+    unsorted = np.empty_like(order)
+    unsorted[order] = np.arange(len(order))
+    az = az.reshape(len(rows), samples)[unsorted]
+    alt = alt.reshape(len(rows), samples)[unsorted]
+    return jd, az, alt
+
+
+def reachable_windows(az, alt, azimuth_limits=AZIMUTH_LIMITS, altitude_limits=ALTITUDE_LIMITS,
+                      min_altitude=0.0):
+    """
+    Longest run of samples of each pass that the servos can point at.
+    Returns (first, last) sample indices; last < first for passes that are
+    never reachable.
+    """
+    with np.errstate(invalid='ignore'):
+        ok = ((az >= azimuth_limits[0]) & (az <= azimuth_limits[1]) &
+              (alt >= max(min_altitude, altitude_limits[0])) & (alt <= altitude_limits[1]))
+    run = np.zeros(len(az), dtype=np.int64)
+    best = np.zeros(len(az), dtype=np.int64)
+    last = np.full(len(az), -1, dtype=np.int64)
+    for k in range(az.shape[1]):
+        run = (run + 1) * ok[:, k]
+        longer = run > best
+        best[longer] = run[longer]
+        last[longer] = k
+    return last - best + 1, last
+
+
+def sample_at(jd, az, alt, when):
+    """
+    Azimuth and altitude of each pass at its time in when, interpolated
+    between its evenly spaced samples.
+    """
+    last = jd.shape[1] - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x = np.nan_to_num((when - jd[:, 0]) / (jd[:, -1] - jd[:, 0]) * last)
+    k = np.clip(x.astype(np.int64), 0, last - 1)
+    f = np.clip(x - k, 0.0, 1.0)
+    rows = np.arange(len(jd))
+    return (az[rows, k] + f * (az[rows, k + 1] - az[rows, k]),
+            alt[rows, k] + f * (alt[rows, k + 1] - alt[rows, k]))
+
+
+class TargetScheduler:
+    """
+    Chooses which object to track from the pass predictor's schedule, so the
+    mount follows one object through its pass instead of jumping to
+    whichever visible object comes first.
+
+    Every pass is sampled along its track and cut to the part the servos can
+    reach.  Tracks are then chained with dynamic programming in order of
+    their end time: following a track to its end and then slewing to the
+    next costs the slew time (both axes move together at slew_rate deg/s,
+    plus settle_seconds) and slew_penalty seconds per degree moved.  The
+    plan maximises tracked seconds minus that penalty.  A track earns at
+    most max_track_seconds, so objects that stay up for hours (geostationary
+    ones in particular) do not crowd out passing debris.  Only the tracks
+    ending within one slew of the next track's start are compared exactly;
+    for earlier ones the best chain so far is taken.
+
+    Each track of the plan begins as the one before it ends, with the slew,
+    so target() already names the next object while the mount is moving
+    to meet it.
+
+    The plan is rebuilt when the pass schedule changes or half of it has
+    been used.  The track in progress is kept to its end and the rest is
+    planned from where it leaves the mount; sampled passes are reused
+    between plans.
+    """
+
+    def __init__(self, predictor, slew_rate=60.0, settle_seconds=1.0, slew_penalty=0.5,
+                 min_track_seconds=20.0, max_track_seconds=900.0, samples_per_pass=32, azimuth_limits=AZIMUTH_LIMITS,
+                 altitude_limits=ALTITUDE_LIMITS, min_altitude=None):
+        self.predictor = predictor
+        self.slew_rate = slew_rate
+        self.settle_seconds = settle_seconds
+        self.slew_penalty = slew_penalty
+        self.min_track_seconds = min_track_seconds
+        self.max_track_seconds = max_track_seconds
+        self.samples_per_pass = samples_per_pass
+        self.azimuth_limits = azimuth_limits
+        self.altitude_limits = altitude_limits
+        self.min_altitude = predictor.min_altitude if min_altitude is None else min_altitude
+        self.plan = TargetPlan.empty()
+        self.replans = 0
+        self._schedule = None
+        self._plan_end = None
+        self._sat_array = None
+        self._samples = {}
+
+    def _sampled(self, sat_array, schedule, rows, location):
+        """(jd, az, alt) samples of the given schedule rows, propagating only passes not seen before."""
+        if sat_array is not self._sat_array:
+            self._samples = {}
+            self._sat_array = sat_array
+        pass_ids = list(zip(schedule.keys[rows].tolist(), schedule.rise[rows].tolist(), schedule.set[rows].tolist()))
+        missing = [i for i, pass_id in enumerate(pass_ids) if pass_id not in self._samples]
+        if missing:
+            jd, az, alt = pass_tracks(sat_array, location, self.predictor.tracker.ts, schedule,
+                                      rows[missing], self.samples_per_pass)
+            for k, i in enumerate(missing):
+                self._samples[pass_ids[i]] = (jd[k], az[k], alt[k])
+        samples = [self._samples[pass_id] for pass_id in pass_ids]
+        if not samples:
+            empty = np.zeros((0, self.samples_per_pass))
+            return empty, empty, empty
+        return tuple(np.stack(column) for column in zip(*samples))
+
+    def _tracks(self, sat_array, schedule, jd_start, location):
+        """Reachable part of every pass still to come: (keys, start, end, sample jd, az, alt)."""
+        rows = np.flatnonzero(schedule.set > jd_start)
+        jd, az, alt = self._sampled(sat_array, schedule, rows, location)
+        # Forget passes that are over or no longer in the schedule.
+        current = set(zip(schedule.keys[rows].tolist(), schedule.rise[rows].tolist(), schedule.set[rows].tolist()))
+        for pass_id in [pass_id for pass_id in self._samples if pass_id not in current]:
+            del self._samples[pass_id]
+        first, last = reachable_windows(az, alt, self.azimuth_limits, self.altitude_limits, self.min_altitude)
+        ok = last >= first
+        index = np.arange(len(rows))
+        start = np.where(ok, jd[index, np.maximum(first, 0)], np.inf)
+        end = np.where(ok, jd[index, np.maximum(last, 0)], -np.inf)
+        start = np.maximum(start, jd_start)
+        ok &= (end - start) * DAY_S >= self.min_track_seconds
+        order = np.flatnonzero(ok)[np.argsort(end[ok], kind='stable')]
+        return schedule.keys[rows[order]], start[order], end[order], jd[order], az[order], alt[order]
+
+    def _slew_seconds(self, degrees):
+        return degrees / self.slew_rate + self.settle_seconds
+
+    def plan_from(self, sat_array, schedule, jd_start, position=None, location=None):
+        """
+        Best sequence of tracks from jd_start on, with the mount starting at
+        position (azimuth, altitude), or free to start anywhere if None.
+        Passes are as seen from location (default the tracker's).
+        """
+        location = self.predictor.tracker.location if location is None else location
+        keys, start, end, jd, az, alt = self._tracks(sat_array, schedule, jd_start, location)
+        n = len(keys)
+        if not n:
+            return TargetPlan.empty()
+        end_az, end_alt = sample_at(jd, az, alt, end)
+        longest_slew = self._slew_seconds(max(np.ptp(self.azimuth_limits), np.ptp(self.altitude_limits))) / DAY_S
+        min_track = self.min_track_seconds / DAY_S
+
+        best = np.full(n, -np.inf)
+        parent = np.full(n, -1, dtype=np.int64)
+        join = np.zeros(n)
+        begin = np.zeros(n)
+        slew = np.zeros(n)
+        prefix_best = np.full(n, -np.inf)
+        prefix_arg = np.full(n, -1, dtype=np.int64)
+        slew_days = 1.0 / (self.slew_rate * DAY_S)
+        settle_days = self.settle_seconds / DAY_S
+        # Predecessors whose end could still delay the join.
+        window_lo = np.searchsorted(end, start - longest_slew, side='left').tolist()
+        window_hi = np.searchsorted(end, end - min_track, side='left').tolist()
+        last = jd.shape[1] - 1
+
+        def pointing(i, when):
+            # sample_at for a single pass and time, without the array overhead.
+            x = (when - jd[i, 0]) / (jd[i, -1] - jd[i, 0]) * last if jd[i, -1] > jd[i, 0] else 0.0
+            k = min(max(int(x), 0), last - 1)
+            f = min(max(x - k, 0.0), 1.0)
+            return az[i, k] + f * (az[i, k + 1] - az[i, k]), alt[i, k] + f * (alt[i, k + 1] - alt[i, k])
+
+        for i in range(n):
+            start_i, end_i = start[i], end[i]
+            lo, hi = window_lo[i], min(window_hi[i], i)
+            # (value, predecessor, joined, degrees, slew begins)
+            choice = (-np.inf, -1, start_i, 0.0, start_i)
+            if hi > lo:
+                ready = end[lo:hi]
+                arrive = np.maximum(start_i, ready)
+                degrees = np.maximum(np.abs(np.interp(arrive, jd[i], az[i]) - end_az[lo:hi]),
+                                     np.abs(np.interp(arrive, jd[i], alt[i]) - end_alt[lo:hi]))
+                joined = np.maximum(start_i, ready + degrees * slew_days + settle_days)
+                gain = (end_i - joined) * DAY_S
+                values = best[lo:hi] + np.minimum(gain, self.max_track_seconds) - self.slew_penalty * degrees
+                values[gain < self.min_track_seconds] = -np.inf
+                k = int(np.argmax(values))
+                choice = (values[k], lo + k, joined[k], degrees[k], ready[k])
+
+            # The best chain that ended earlier, and starting a chain here.
+            extra = [(prefix_best[lo - 1], prefix_arg[lo - 1], end_az[prefix_arg[lo - 1]], end_alt[prefix_arg[lo - 1]])] \
+                if lo > 0 and prefix_arg[lo - 1] >= 0 else []
+            if position is not None:
+                extra.append((0.0, -1, position[0], position[1]))
+            for value, j, from_az, from_alt in extra:
+                ready = end[j] if j >= 0 else jd_start
+                to_az, to_alt = pointing(i, max(start_i, ready))
+                degrees = max(abs(to_az - from_az), abs(to_alt - from_alt))
+                joined = max(start_i, ready + degrees * slew_days + settle_days)
+                gain = (end_i - joined) * DAY_S
+                value += min(gain, self.max_track_seconds) - self.slew_penalty * degrees
+                if gain >= self.min_track_seconds and value > choice[0]:
+                    choice = (value, j, joined, degrees, ready)
+            if position is None:
+                value = min((end_i - start_i) * DAY_S, self.max_track_seconds)
+                if value > choice[0]:
+                    choice = (value, -1, start_i, 0.0, start_i)
+
+            best[i], parent[i], join[i], slew[i], begin[i] = choice
+            if i and prefix_best[i - 1] >= best[i]:
+                prefix_best[i], prefix_arg[i] = prefix_best[i - 1], prefix_arg[i - 1]
+            elif np.isfinite(best[i]):
+                prefix_best[i], prefix_arg[i] = best[i], i
+
+        chain = []
+        i = int(prefix_arg[-1])
+        while i >= 0:
+            chain.append(i)
+            i = int(parent[i])
+        chain.reverse()
+        aim_az, aim_alt = sample_at(jd[chain], az[chain], alt[chain], join[chain])
+        return TargetPlan(keys[chain], begin[chain], end[chain], slew[chain], join[chain], aim_az, aim_alt)
+
+    def update(self, debris_dict, t=None, lock=None):
+        """
+        Bring the plan up to date for time t and return it.  With lock, only
+        reading the pass schedule holds it: the plan itself is worked out
+        after, so a replan does not stall others using the tracker.
+        """
+        with lock if lock is not None else nullcontext():
+            t = t if t is not None else self.predictor.tracker.ts.now()
+            schedule = self.predictor.update(debris_dict, t)
+            if schedule is self._schedule and self._plan_end is not None and t.tt + self.predictor.horizon / 2 <= self._plan_end:
+                return self.plan
+            sat_array = self.predictor.tracker.satellite_array(debris_dict)
+            location = self.predictor.tracker.location
+
+        jd_now = t.tt
+        row = self.plan.index_at(jd_now)
+        active = schedule.active(jd_now)
+        tracking = row >= 0 and jd_now >= self.plan.joined[row]
+        same = active[schedule.keys[active] == self.plan.keys[row]] if tracking else active[:0]
+        if not len(same):
+            self.plan = self.plan_from(sat_array, schedule, jd_now, location=location)
+        else:
+            # Finish the track in progress, then plan from where it ends.
+            key, end = self.plan.keys[row], self.plan.end[row]
+            jd, az, alt = self._sampled(sat_array, schedule, same[:1], location)
+            position = (np.interp(end, jd[0], az[0]), np.interp(end, jd[0], alt[0]))
+            rest = self.plan_from(sat_array, schedule, end, position, location)
+            self.plan = TargetPlan(np.concatenate([[key], rest.keys]), np.concatenate([[jd_now], rest.start]),
+                                   np.concatenate([[end], rest.end]), np.concatenate([[0.0], rest.slew]),
+                                   np.concatenate([[jd_now], rest.joined]),
+                                   np.concatenate([[np.nan], rest.azimuth]), np.concatenate([[np.nan], rest.altitude]))
+        self._schedule = schedule
+        self._plan_end = jd_now + self.predictor.horizon
+        self.replans += 1
+        return self.plan
+
+    def target(self, debris_dict, t=None, lock=None):
+        """Key of the object to track, or to slew to, at time t, or None while idle."""
+        t = t if t is not None else self.predictor.tracker.ts.now()
+        return self.update(debris_dict, t, lock).target_at(t.tt)
@@ -0,0 +1,152 @@
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+CLEAR_SCREEN = "\x1b[2J"
+
+
+def move_to(row, column):
+    """ANSI cursor address of a 0-based row and column."""
+    return f"\x1b[{row + 1};{column + 1}H"
+
+
+def diff_updates(previous, lines):
+    """
+    Escape sequences that turn the screen showing previous into lines,
+    rewriting only the span of each row between its first and last
+    changed character.  Both are lists of equal-width strings.
+    """
+    out = []
+    for row in range(max(len(previous), len(lines))):
+        old = previous[row] if row < len(previous) else ""
+        new = lines[row] if row < len(lines) else " " * len(old)
+        width = max(len(old), len(new))
+        old, new = old.ljust(width), new.ljust(width)
+        if old == new:
+            continue
+        first = next(i for i in range(width) if old[i] != new[i])
+        last = next(i for i in range(width - 1, -1, -1) if old[i] != new[i])
+        out.append(move_to(row, first) + new[first:last + 1])
+    return "".join(out)
+
+
+class TerminalDashboard:
+    """
+    Live tracking display drawn in place with ANSI cursor addressing: each
+    frame is composed as a list of fixed-width lines and only the cells
+    that differ from the frame on screen are written, in one write.  Shows
+    the current target, the top_n highest visible objects and how long
+    each tracking stage takes.
+
+    Anything else written to the terminal would scroll the frame and leave
+    the diffs working from a screen that is no longer there, so the
+    dashboard is also a writable stream: set it as sys.stdout while it
+    runs and printed messages appear in its last status_lines rows.
+    """
+
+    def __init__(self, stream=None, top_n=10, width=78, status_lines=3):
+        self.stream = stream if stream is not None else sys.stdout
+        self.top_n = top_n
+        self.width = width
+        self.frames = 0
+        self.messages = deque(maxlen=status_lines)
+        self.status_lines = status_lines
+        self._partial = ""
+        self._message_lock = threading.Lock()
+        self._frame = None
+        self._screen = None
+
+    def write(self, text):
+        """Keep printed text as status messages, one per completed line."""
+        with self._message_lock:
+            lines = (self._partial + text).split("\n")
+            self._partial = lines.pop()
+            self.messages.extend(line.strip() for line in lines if line.strip())
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def _status(self):
+        with self._message_lock:
+            messages = list(self.messages)
+        return [self._line(f" > {message}") for message in messages] + \
+            [self._line()] * (self.status_lines - len(messages))
+
+    def _line(self, text=""):
+        return text[:self.width].ljust(self.width)
+
+    def compose(self, target, visible_objects, name, location, timings=None, rates=None):
+        """
+        Lines of one frame.  target is (key, data) or None, visible_objects
+        maps keys to position dicts, name(key) gives display names, timings
+        maps stage names to (last, average) seconds and rates maps labels to
+        rates in Hz.
+        """
+        now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+        rule = "=" * self.width
+        lines = [
+            self._line(f" SPACE DEBRIS TRACKER   {now}   observer {location[0]:.5f}, {location[1]:.5f}"),
+            self._line(rule),
+        ]
+        if target is None:
+            lines.append(self._line(" Target:   none"))
+            lines.append(self._line())
+        else:
+            key, data = target
+            status = "VISIBLE" if data.get('visible') else "BELOW HORIZON"
+            lines.append(self._line(f" Target:   {name(key)[:40]} ({key})"))
+            lines.append(self._line(f" Altitude: {data['altitude']:6.1f}°   Azimuth: {data['azimuth']:6.1f}°   "
+                                    f"Distance: {data['distance']:8.1f} km   {status}"))
+        lines.append(self._line(rule))
+
+        lines.append(self._line(f" {'#':>2}  {'Object':<28} {'NORAD':>8} {'Alt°':>7} {'Az°':>7} {'Range km':>10}"))
+        ranked = sorted(visible_objects.items(), key=lambda item: -item[1]['altitude'])[:self.top_n]
+        for rank, (key, data) in enumerate(ranked, start=1):
+            marker = "*" if target is not None and key == target[0] else " "
+            lines.append(self._line(f"{marker}{rank:>2}  {name(key)[:28]:<28} {str(key)[:8]:>8} "
+                                    f"{data['altitude']:7.1f} {data['azimuth']:7.1f} {data['distance']:10.1f}"))
+        for _ in range(self.top_n - len(ranked)):
+            lines.append(self._line())
+        lines.append(self._line(f" {len(visible_objects)} objects above the horizon"))
+        lines.append(self._line(rule))
+
+        stages = "  ".join(f"{stage} {last * 1000:.1f}/{average * 1000:.1f}"
+                           for stage, (last, average) in (timings or {}).items())
+        lines.append(self._line(f" Stage ms (last/avg): {stages}"))
+        rate_text = "  ".join(f"{label} {rate:.1f} Hz" for label, rate in (rates or {}).items())
+        lines.append(self._line(f" {rate_text}"))
+        lines.append(self._line(" Press Ctrl+C to stop tracking"))
+        return lines
+
+    def draw(self, lines):
+        """
+        Bring the terminal up to date with lines and the status messages
+        below them, writing only what changed.
+        """
+        self._frame = list(lines)
+        lines = self._frame + self._status()
+        if self._screen is None:
+            update = HIDE_CURSOR + CLEAR_SCREEN + diff_updates([], lines)
+        else:
+            update = diff_updates(self._screen, lines)
+        self._screen = list(lines)
+        self.frames += 1
+        if update:
+            self.stream.write(update)
+            self.stream.flush()
+        return update
+
+    def render(self, target, visible_objects, name, location, timings=None, rates=None):
+        return self.draw(self.compose(target, visible_objects, name, location, timings, rates))
+
+    def close(self):
+        """Show any messages not drawn yet and put the cursor back below the dashboard."""
+        if self._screen is not None:
+            self.draw(self._frame)
+            self.stream.write(move_to(len(self._screen), 0) + SHOW_CURSOR + "\n")
+            self.stream.flush()
+            self._screen = None
@@ -0,0 +1,65 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+from catalog_cache import CACHE_MAGIC, read_catalog_cache
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tle_cache')
+
+
+class TestCatalogCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for filename in ('iridium_debris.tle', 'debris_iridium-33-debris_20250510_0939.tle', 'recent_debris.tle'):
+            shutil.copy(os.path.join(CACHE_DIR, filename), self.tmp_dir)
+        self.data_manager = DataManager(tle_cache_dir=self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_second_load_skips_text_parsing(self):
+        text_catalog = self.data_manager.load_catalog(fetch_online=False, use_local=True)
+        self.assertTrue(os.path.exists(self.data_manager.compiled_catalog_path))
+
+        with patch('data_manager.parse_tle_file', side_effect=AssertionError("parsed text")):
+            compiled = self.data_manager.load_catalog(fetch_online=False, use_local=True)
+
+        self.assertEqual(set(compiled), set(text_catalog))
+        self.assertEqual(compiled.groups, text_catalog.groups)
+        jd, fr = np.array([2460806.0]), np.array([0.25])
+        for norad_id, satellite in text_catalog.items():
+            self.assertEqual(compiled[norad_id].name, satellite.name)
+            expected = satellite.model.sgp4_array(jd, fr)[1]
+            result = compiled[norad_id].model.sgp4_array(jd, fr)[1]
+            np.testing.assert_allclose(result, expected, atol=1e-6)
+
+    def test_changed_source_file_triggers_rebuild(self):
+        self.data_manager.load_catalog(fetch_online=False, use_local=True)
+        self.assertIsNotNone(self.data_manager.load_compiled_catalog())
+
+        source = os.path.join(self.tmp_dir, 'recent_debris.tle')
+        stat = os.stat(source)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNone(self.data_manager.load_compiled_catalog())
+
+        self.data_manager.load_catalog(fetch_online=False, use_local=True)
+        self.assertIsNotNone(self.data_manager.load_compiled_catalog())
+
+    def test_other_format_version_is_ignored(self):
+        self.data_manager.load_catalog(fetch_online=False, use_local=True)
+        path = self.data_manager.compiled_catalog_path
+        with open(path, 'r+b') as f:
+            f.seek(len(CACHE_MAGIC))
+            f.write(b'\xff\xff')
+        self.assertIsNone(read_catalog_cache(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
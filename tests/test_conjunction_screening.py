@@ -0,0 +1,130 @@
+import sys
+import os
+import unittest
+import numpy as np
+from sgp4.api import Satrec, WGS72
+from skyfield.api import load
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from conjunction_screening import ConjunctionScreener, band_overlap, close_pairs
+from data_manager import DataManager
+from satellite_array import time_arrays
+
+TLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'tle_cache', 'debris_active_20250510_0939.tle')
+TS = load.timescale()
+EPOCH = TS.utc(2025, 5, 10, 12)
+
+
+def circular_orbit(satnum, altitude_km, inclination, mean_anomaly=0.0):
+    radius = 6378.135 + altitude_km
+    mean_motion = np.sqrt(398600.8 / radius ** 3) * 60.0
+    satrec = Satrec()
+    satrec.sgp4init(WGS72, 'i', satnum, EPOCH.ut1 - 2433281.5, 0.0, 0.0, 0.0, 0.0001, 0.0,
+                    inclination, mean_anomaly, mean_motion, 0.0)
+    return satrec
+
+
+class FakeCatalog(dict):
+    def satrecs(self):
+        return list(self.values())
+
+    def name(self, key):
+        return f"OBJECT {key}"
+
+
+class TestClosePairs(unittest.TestCase):
+
+    def test_matches_all_pairs_check(self):
+        rng = np.random.default_rng(3)
+        points = rng.uniform(-2000, 2000, size=(800, 3))
+        first, second = close_pairs(points, 150.0)
+        distance = np.linalg.norm(points[:, None] - points[None], axis=2)
+        expected = {(i, j) for i, j in zip(*np.nonzero(distance < 150.0)) if i < j}
+        self.assertEqual(set(zip(first.tolist(), second.tolist())), expected)
+        self.assertEqual(len(first), len(expected))
+
+    def test_band_overlap(self):
+        perigee = np.array([500.0, 520.0, 35780.0, 1200.0])
+        apogee = np.array([510.0, 530.0, 35790.0, 1300.0])
+        self.assertEqual(band_overlap(perigee, apogee, 5.0).tolist(), [False, False, False, False])
+        self.assertEqual(band_overlap(perigee, apogee, 15.0).tolist(), [True, True, False, False])
+
+
+class TestConjunctionScreener(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = FakeCatalog({
+            1: circular_orbit(1, 700.0, 0.9),
+            2: circular_orbit(2, 700.0, 1.2),             # crosses 1 at the node at the epoch
+            3: circular_orbit(3, 700.0, 0.9, 0.01),       # trails 1 by about 70 km
+            4: circular_orbit(4, 700.0, 0.9),             # same elements as 1, as docked vehicles
+            5: circular_orbit(5, 35786.0, 0.0),           # alone in its altitude band
+        })
+
+    def test_finds_crossing_at_node(self):
+        screener = ConjunctionScreener(self.catalog, threshold_km=5.0, step_seconds=60.0)
+        start = TS.tt_jd(EPOCH.tt - 600.0 / 86400.0)
+        conjunctions = screener.screen(start, hours=20.0 / 60.0)
+        pairs = {frozenset((a, b)) for a, b, _, _, _ in conjunctions}
+        self.assertEqual(pairs, {frozenset((1, 2)), frozenset((2, 4))})
+        a, b, tca, miss, speed = next(iter(conjunctions))
+        # Their mean elements meet exactly at the epoch; SGP4's short-period
+        # terms move the true closest approach a little from it.
+        offsets = np.arange(-20.0, 20.0, 0.01)
+        jd = np.full(len(offsets), EPOCH.whole)
+        fraction = EPOCH.ut1_fraction - EPOCH.dut1 / 86400.0 + offsets / 86400.0
+        _, r1, _ = self.catalog[1].sgp4_array(jd, fraction)
+        _, r2, _ = self.catalog[2].sgp4_array(jd, fraction)
+        distance = np.linalg.norm(r1 - r2, axis=1)
+        self.assertAlmostEqual(miss, distance.min(), delta=0.01)
+        self.assertAlmostEqual((tca - EPOCH.tt) * 86400.0, offsets[distance.argmin()], delta=0.05)
+        self.assertAlmostEqual(speed, 2 * 7.5 * np.sin(0.15), delta=0.2)
+        self.assertTrue(all(miss < 5.0 for _, _, _, miss, _ in conjunctions))
+        self.assertEqual(len(conjunctions.report(self.catalog, TS)), 2)
+
+    def test_primaries_limit_pairs(self):
+        screener = ConjunctionScreener(self.catalog, threshold_km=5.0)
+        start = TS.tt_jd(EPOCH.tt - 600.0 / 86400.0)
+        conjunctions = screener.screen(start, hours=20.0 / 60.0, primaries=[4])
+        self.assertEqual([(a, b) for a, b, _, _, _ in conjunctions], [(2, 4)])
+
+
+class TestAgainstBruteForce(unittest.TestCase):
+
+    def test_finds_every_sampled_approach(self):
+        # A crowded shell, including a pair whose mean-element bands are
+        # further apart than the threshold and a slow, co-orbiting pair.
+        debris = DataManager().load_tle_file(TLE_FILE)
+        perigee = {key: sat.model.altp * sat.model.radiusearthkm for key, sat in debris.items()}
+        shell = sorted(key for key, altitude in perigee.items() if 480.0 < altitude < 580.0)
+        rng = np.random.default_rng(0)
+        chosen = set(rng.choice(shell, min(600, len(shell)), replace=False).tolist())
+        chosen |= {key for key, sat in debris.items() if sat.model.satnum in (44207, 52478, 57582, 58264)}
+        catalog = FakeCatalog({key: debris[key].model for key in sorted(chosen)})
+
+        threshold, hours = 25.0, 0.5
+        start = TS.utc(2025, 5, 10, 12)
+        screener = ConjunctionScreener(catalog, threshold_km=threshold)
+        found = {frozenset((a, b)) for a, b, _, _, _ in screener.screen(start, hours)}
+
+        # Every pair seen within the threshold on a 2 s grid really came
+        # that close, so the screener must report it.
+        offsets = np.arange(0.0, hours * 3600.0 + 2.0, 2.0)
+        jd0, fraction0, _ = time_arrays(start)
+        errors, r, v = screener.sat_array._array.sgp4(np.full(len(offsets), jd0[0]),
+                                                     fraction0[0] + offsets / 86400.0)
+        keys = screener.sat_array.keys
+        expected = set()
+        for k in range(len(offsets)):
+            ok = np.flatnonzero(errors[:, k] == 0)
+            first, second = close_pairs(r[ok, k], threshold)
+            speed = np.linalg.norm(v[ok[first], k] - v[ok[second], k], axis=1)
+            expected |= {frozenset((keys[i], keys[j]))
+                         for i, j in zip(ok[first][speed >= 0.1], ok[second][speed >= 0.1])}
+        self.assertTrue(expected)
+        self.assertEqual(expected - found, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
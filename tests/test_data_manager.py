@@ -0,0 +1,243 @@
+import sys
+import os
+import glob
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager, DEBRIS_SOURCES
+from debris_catalog import DebrisCatalog, group_from_url
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tle_cache')
+
+
+def _response(text, status_code=200, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.text = text
+    response.headers = headers or {}
+    return response
+
+
+class TestOnlineFetch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_manager = DataManager(tle_cache_dir=self.tmp_dir)
+        with open(os.path.join(CACHE_DIR, 'iridium_debris.tle'), 'r', encoding='utf-8') as f:
+            self.tle_text = f.read()
+        self.tle_sets = self.data_manager.parse_tle_text(self.tle_text)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _serve(self, delay=0.0):
+        """Answer every GET with a slice of the test TLEs, one slice per source."""
+        self.calls = []
+        self.request_headers = {}
+        self.active = 0
+        self.peak = 0
+        lock = threading.Lock()
+        per_source = max(1, len(self.tle_sets) // len(DEBRIS_SOURCES))
+
+        def get(url, timeout=None, headers=None):
+            with lock:
+                self.calls.append((url, timeout))
+                self.request_headers[url] = headers or {}
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(delay)
+            with lock:
+                self.active -= 1
+            i = DEBRIS_SOURCES.index(url)
+            chunk = self.tle_sets[i * per_source:(i + 1) * per_source]
+            if (headers or {}).get('If-None-Match') == f'"{i}"':
+                return _response('', status_code=304)
+            return _response(''.join(f"{n}\n{l1}\n{l2}\n" for n, l1, l2 in chunk),
+                             headers={'ETag': f'"{i}"', 'Last-Modified': 'Sat, 10 May 2025 09:39:00 GMT'})
+
+        session = MagicMock()
+        session.get.side_effect = get
+        self.data_manager._session = session
+        return per_source
+
+    def test_sources_downloaded_once_each_and_concurrently(self):
+        per_source = self._serve(delay=0.2)
+        with patch('data_manager.load.tle_file', side_effect=AssertionError("second download")):
+            start = time.perf_counter()
+            result = self.data_manager.fetch_online_tle()
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(sorted(url for url, _ in self.calls), sorted(DEBRIS_SOURCES))
+        self.assertTrue(all(timeout == self.data_manager.fetch_timeout for _, timeout in self.calls))
+        self.assertGreater(self.peak, 1)
+        self.assertLess(elapsed, 0.2 * len(DEBRIS_SOURCES))
+
+        fetched = result['online_combined_debris']
+        self.assertIsInstance(fetched, DebrisCatalog)
+        served = self.tle_sets[:per_source * len(DEBRIS_SOURCES)]
+        self.assertEqual(len(fetched), len({line1[2:7] for _, line1, _ in served}))
+        self.assertEqual(set(fetched.group_counts()), {group_from_url(url) for url in DEBRIS_SOURCES})
+
+    def test_cache_files_written(self):
+        self._serve()
+        self.data_manager.fetch_online_tle()
+        group_files = glob.glob(os.path.join(self.tmp_dir, 'debris_*.tle'))
+        combined = glob.glob(os.path.join(self.tmp_dir, 'combined_debris_*.tle'))
+        self.assertEqual(len(group_files), len(DEBRIS_SOURCES))
+        self.assertEqual(len(combined), 1)
+
+        catalog = DebrisCatalog(self.data_manager.ts)
+        self.data_manager.load_local_catalog(catalog)
+        fetched = self.data_manager.fetch_online_tle()['online_combined_debris']
+        self.assertEqual(set(catalog), set(fetched))
+
+    def test_no_requests_within_ttl(self):
+        self._serve()
+        first = self.data_manager.fetch_online_tle()['online_combined_debris']
+        self.calls.clear()
+
+        second = self.data_manager.fetch_online_tle()['online_combined_debris']
+        self.assertEqual(self.calls, [])
+        self.assertEqual(set(second), set(first))
+        self.assertEqual(len(glob.glob(os.path.join(self.tmp_dir, 'debris_*.tle'))), len(DEBRIS_SOURCES))
+
+    def test_conditional_request_after_ttl(self):
+        self._serve()
+        self.data_manager.fetch_online_tle()
+        files = set(os.listdir(self.tmp_dir))
+        self.calls.clear()
+
+        self.data_manager.fetch_ttl = 0
+        fetched = self.data_manager.fetch_online_tle()['online_combined_debris']
+        self.assertEqual(len(self.calls), len(DEBRIS_SOURCES))
+        for i, url in enumerate(DEBRIS_SOURCES):
+            self.assertEqual(self.request_headers[url]['If-None-Match'], f'"{i}"')
+            self.assertIn('If-Modified-Since', self.request_headers[url])
+        self.assertEqual(set(os.listdir(self.tmp_dir)), files)
+        self.assertGreater(len(fetched), 0)
+
+    def test_restart_uses_compiled_catalog_without_network(self):
+        self._serve()
+        first = self.data_manager.load_catalog(fetch_online=True, use_local=True)
+
+        restarted = DataManager(tle_cache_dir=self.tmp_dir)
+        restarted._session = MagicMock()
+        restarted._session.get.side_effect = AssertionError("network call")
+        with patch('data_manager.parse_tle_file', side_effect=AssertionError("parsed text")):
+            catalog = restarted.load_catalog(fetch_online=True, use_local=True)
+        self.assertEqual(set(catalog), set(first))
+
+    def test_failed_source_is_skipped(self):
+        self._serve()
+        get = self.data_manager._session.get.side_effect
+
+        def flaky(url, timeout=None, headers=None):
+            if url == DEBRIS_SOURCES[0]:
+                return _response("Invalid query", status_code=200)
+            return get(url, timeout, headers)
+
+        self.data_manager._session.get.side_effect = flaky
+        fetched = self.data_manager.fetch_online_tle()['online_combined_debris']
+        self.assertNotIn(group_from_url(DEBRIS_SOURCES[0]), fetched.group_counts())
+        self.assertGreater(len(fetched), 0)
+
+    def test_session_retries_configured(self):
+        adapter = self.data_manager.session.get_adapter('https://celestrak.org')
+        self.assertEqual(adapter.max_retries.total, self.data_manager.fetch_retries)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+
+
+class TestSnapshotRetention(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        source = os.path.join(CACHE_DIR, 'debris_iridium-33-debris_20250510_0939.tle')
+        self.snapshots = []
+        for stamp in ('20250508_0939', '20250509_0939', '20250510_0939', '20250511_0939'):
+            path = os.path.join(self.tmp_dir, f'debris_iridium-33-debris_{stamp}.tle')
+            shutil.copy(source, path)
+            self.snapshots.append(path)
+        shutil.copy(source, os.path.join(self.tmp_dir, 'combined_debris_20250511_0939.tle'))
+        shutil.copy(os.path.join(CACHE_DIR, 'high_risk_debris.tle'), self.tmp_dir)
+        self.data_manager = DataManager(tle_cache_dir=self.tmp_dir, retention_snapshots=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_loader_reads_only_current_snapshots(self):
+        files = [os.path.basename(path) for path in self.data_manager._local_tle_files()]
+        self.assertEqual(files, ['debris_iridium-33-debris_20250511_0939.tle', 'high_risk_debris.tle'])
+
+    def test_manifest_snapshot_is_current(self):
+        with open(self.data_manager.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({DEBRIS_SOURCES[0]: {'file': os.path.basename(self.snapshots[1]), 'fetched_at': 0}}, f)
+        self.assertIn(self.snapshots[1], self.data_manager._local_tle_files())
+        self.assertNotIn(self.snapshots[3], self.data_manager._local_tle_files())
+
+    def test_compaction_keeps_configured_snapshots(self):
+        retired = self.data_manager.compact_cache()
+        self.assertEqual(sorted(retired), self.snapshots[:2])
+        self.assertTrue(os.path.exists(self.snapshots[2]))
+        self.assertTrue(os.path.exists(self.snapshots[3]))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'high_risk_debris.tle')))
+
+    def test_compaction_by_age_and_archive(self):
+        retired = self.data_manager.compact_cache(keep_snapshots=10, max_age_days=0, archive=True)
+        self.assertEqual(sorted(retired), self.snapshots[:3])
+
+        archive_path = os.path.join(self.data_manager.archive_dir, 'debris_iridium-33-debris.tle')
+        archived = {line1[2:7] for _, line1, _ in self.data_manager.read_tle_sets(archive_path)}
+        original = {line1[2:7] for _, line1, _ in self.data_manager.read_tle_sets(self.snapshots[3])}
+        self.assertEqual(archived, original)
+        self.assertNotIn(archive_path, self.data_manager._local_tle_files())
+
+
+class TestParallelLoading(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for filename in ('debris_iridium-33-debris_20250510_0939.tle', 'debris_cosmos-2251-debris_20250510_0939.tle',
+                         'iridium_debris.tle', 'recent_debris.tle'):
+            shutil.copy(os.path.join(CACHE_DIR, filename), self.tmp_dir)
+        self.data_manager = DataManager(tle_cache_dir=self.tmp_dir, load_chunk_bytes=16 * 1024)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parallel_load_matches_sequential(self):
+        sequential = self.data_manager.load_local_catalog(DebrisCatalog(self.data_manager.ts), workers=1)
+        parallel = self.data_manager.load_local_catalog(DebrisCatalog(self.data_manager.ts), workers=2)
+
+        self.assertEqual(list(parallel), list(sequential))
+        self.assertEqual(parallel.groups, sequential.groups)
+        self.assertTrue(all(entry.lines is None for entry in parallel.entries.values()))
+        jd, fr = np.array([2460806.0]), np.array([0.25])
+        for norad_id in list(sequential)[:200]:
+            self.assertEqual(parallel.name(norad_id), sequential.name(norad_id))
+            np.testing.assert_allclose(parallel.satrec(norad_id).sgp4_array(jd, fr)[1],
+                                       sequential.satrec(norad_id).sgp4_array(jd, fr)[1], atol=1e-6)
+
+    def test_large_files_are_chunked(self):
+        tasks = []
+        with patch('data_manager.ProcessPoolExecutor') as executor:
+            executor.return_value.__enter__.return_value.map.side_effect = lambda fn, items: tasks.extend(items) or []
+            self.data_manager.load_local_catalog(DebrisCatalog(self.data_manager.ts), workers=4)
+        paths = [path for path, _, _ in tasks]
+        self.assertTrue(any(paths.count(path) > 1 for path in paths))
+        for filepath in set(paths):
+            ranges = sorted((start, stop) for path, start, stop in tasks if path == filepath)
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], os.path.getsize(filepath))
+            self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+            self.assertTrue(all(stop - start <= 16 * 1024 for start, stop in ranges))
+
+
+if __name__ == '__main__':
+    unittest.main()
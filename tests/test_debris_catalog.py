@@ -0,0 +1,99 @@
+import sys
+import os
+import unittest
+from skyfield.api import EarthSatellite, load
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from debris_catalog import DebrisCatalog, group_from_filename, group_from_url
+
+OLD_IRIDIUM_33 = (
+    "1 24946U 97051C   25083.52953373  .00000956  00000+0  33013-3 0  9994",
+    "2 24946  86.3949 178.6289 0007757  10.7950 349.3411 14.34823619440616",
+)
+NEW_IRIDIUM_33 = (
+    "1 24946U 97051C   25129.62621484  .00000350  00000+0  11642-3 0  9993",
+    "2 24946  86.3888 159.3246 0007247 187.4956 172.6133 14.34870299447216",
+)
+IRIDIUM_33_DEB = (
+    "1 33773U 97051L   25083.80947091  .00003355  00000+0  10059-2 0  9993",
+    "2 33773  86.4084 171.8933 0008985 308.5313  51.5081 14.42541273845561",
+)
+IRIDIUM_33_DEB_2 = (
+    "1 33775U 97051N   25083.97309579  .00005455  00000+0  17079-2 0  9998",
+    "2 33775  86.3699 161.6217 0011378 315.8806 217.5159 14.40495566843563",
+)
+
+
+class TestDebrisCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.ts = load.timescale()
+
+    def satellite(self, lines, name):
+        return EarthSatellite(lines[0], lines[1], name, self.ts)
+
+    def test_objects_with_same_name_are_kept_apart(self):
+        catalog = DebrisCatalog()
+        catalog.add(self.satellite(IRIDIUM_33_DEB, "IRIDIUM 33 DEB"), "iridium-33-debris")
+        catalog.add(self.satellite(IRIDIUM_33_DEB_2, "IRIDIUM 33 DEB"), "iridium-33-debris")
+        self.assertEqual(sorted(catalog), [33773, 33775])
+
+    def test_newest_epoch_wins_in_any_order(self):
+        for first, second in ((OLD_IRIDIUM_33, NEW_IRIDIUM_33), (NEW_IRIDIUM_33, OLD_IRIDIUM_33)):
+            catalog = DebrisCatalog()
+            catalog.add(self.satellite(first, "IRIDIUM 33"), "iridium_debris")
+            catalog.add(self.satellite(second, "IRIDIUM 33"), "iridium-33-debris")
+            self.assertEqual(len(catalog), 1)
+            self.assertAlmostEqual(catalog[24946].model.epochdays, 129.62621484)
+            self.assertEqual(catalog.groups[24946], {"iridium_debris", "iridium-33-debris"})
+
+    def test_version_changes_only_on_update(self):
+        catalog = DebrisCatalog()
+        catalog.add(self.satellite(NEW_IRIDIUM_33, "IRIDIUM 33"))
+        version = catalog.version
+        self.assertFalse(catalog.add(self.satellite(OLD_IRIDIUM_33, "IRIDIUM 33")))
+        self.assertEqual(catalog.version, version)
+
+    def test_group_counts(self):
+        catalog = DebrisCatalog()
+        catalog.add_many([self.satellite(IRIDIUM_33_DEB, "IRIDIUM 33 DEB"),
+                          self.satellite(NEW_IRIDIUM_33, "IRIDIUM 33")], "iridium-33-debris")
+        catalog.add(self.satellite(NEW_IRIDIUM_33, "IRIDIUM 33"), "active")
+        self.assertEqual(catalog.group_counts(), {"iridium-33-debris": 2, "active": 1})
+        self.assertEqual(catalog.in_group("active"), [24946])
+        self.assertEqual(catalog.name(24946), "IRIDIUM 33")
+
+    def test_tle_entries_are_materialized_lazily(self):
+        catalog = DebrisCatalog(self.ts, max_materialized=2)
+        catalog.add_tle("IRIDIUM 33", *OLD_IRIDIUM_33, group="iridium_debris")
+        catalog.add_tle("IRIDIUM 33", *NEW_IRIDIUM_33, group="iridium-33-debris")
+        catalog.add_tle("IRIDIUM 33 DEB", *IRIDIUM_33_DEB)
+        catalog.add_tle("IRIDIUM 33 DEB", *IRIDIUM_33_DEB_2)
+        self.assertEqual(sorted(catalog), [24946, 33773, 33775])
+        self.assertEqual(catalog.materialized_count(), 0)
+        self.assertAlmostEqual(catalog[24946].model.epochdays, 129.62621484)
+
+        first = catalog[33773]
+        self.assertIs(catalog[33773], first)
+        catalog[33775]
+        catalog[24946]
+        self.assertEqual(catalog.materialized_count(), 2)
+        self.assertIsNot(catalog[33773], first)
+
+    def test_satrecs_match_materialized_satellites(self):
+        catalog = DebrisCatalog(self.ts)
+        catalog.add_tle("IRIDIUM 33 DEB", *IRIDIUM_33_DEB)
+        catalog.add(self.satellite(NEW_IRIDIUM_33, "IRIDIUM 33"))
+        self.assertEqual([satrec.satnum for satrec in catalog.satrecs()], [33773, 24946])
+        self.assertEqual(catalog.materialized_count(), 0)
+
+    def test_group_names(self):
+        self.assertEqual(group_from_filename("debris_cosmos-2251-debris_20250510_0939.tle"), "cosmos-2251-debris")
+        self.assertEqual(group_from_filename("combined_debris_20250510_0939.tle"), "combined_debris")
+        self.assertEqual(group_from_filename("/tmp/high_risk_debris.tle"), "high_risk_debris")
+        self.assertEqual(group_from_url(
+            "https://celestrak.org/NORAD/elements/gp.php?GROUP=fengyun-1c-debris&FORMAT=tle"), "fengyun-1c-debris")
+
+
+if __name__ == '__main__':
+    unittest.main()
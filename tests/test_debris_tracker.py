@@ -0,0 +1,85 @@
+import sys
+import os
+import unittest
+from skyfield.api import EarthSatellite
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+from debris_catalog import DebrisCatalog
+from debris_tracker import DebrisTracker
+
+OLD_IRIDIUM_33 = (
+    "1 24946U 97051C   25083.52953373  .00000956  00000+0  33013-3 0  9994",
+    "2 24946  86.3949 178.6289 0007757  10.7950 349.3411 14.34823619440616",
+)
+NEW_IRIDIUM_33 = (
+    "1 24946U 97051C   25129.62621484  .00000350  00000+0  11642-3 0  9993",
+    "2 24946  86.3888 159.3246 0007247 187.4956 172.6133 14.34870299447216",
+)
+TLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'tle_cache', 'debris_active_20250510_0939.tle')
+
+
+class TestBatchedPositions(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        debris = DataManager().load_tle_file(TLE_FILE)
+        cls.debris = dict(list(debris.items())[:2000])
+        cls.loc = [17.389801, 78.321151]
+
+    def test_batched_matches_per_object(self):
+        """Batched propagation should agree with the per-object Skyfield path"""
+        tracker = DebrisTracker(self.loc)
+        batched = DebrisTracker(self.loc, batched=True)
+        t = tracker.ts.utc(2025, 5, 10, 12, 0, 0)
+
+        expected = tracker.calculate_positions(self.debris, t)
+        result = batched.calculate_positions(self.debris, t)
+
+        self.assertTrue(expected)
+        self.assertEqual(set(expected), set(result))
+        for name, data in expected.items():
+            self.assertAlmostEqual(data['altitude'], result[name]['altitude'], places=6)
+            self.assertAlmostEqual(data['azimuth'], result[name]['azimuth'], places=6)
+            self.assertAlmostEqual(data['distance'], result[name]['distance'], places=4)
+            self.assertTrue(result[name]['visible'])
+
+    def test_array_is_reused_between_ticks(self):
+        batched = DebrisTracker(self.loc, batched=True)
+        first = batched.satellite_array(self.debris)
+        self.assertIs(first, batched.satellite_array(self.debris))
+
+    def test_array_is_rebuilt_when_a_catalog_entry_changes(self):
+        batched = DebrisTracker(self.loc, batched=True)
+        catalog = DebrisCatalog(ts=batched.ts)
+        catalog.add(EarthSatellite(*OLD_IRIDIUM_33, "IRIDIUM 33", batched.ts))
+        catalog.add_many(list(self.debris.values())[:10])
+        first = batched.satellite_array(catalog)
+        self.assertIs(batched.satellite_array(catalog), first)
+        # A newer element set for one object: same keys and length.
+        catalog.add(EarthSatellite(*NEW_IRIDIUM_33, "IRIDIUM 33", batched.ts))
+        second = batched.satellite_array(catalog)
+        self.assertIsNot(second, first)
+        self.assertEqual(len(second), len(first))
+        self.assertAlmostEqual(second.satrecs[second.keys.index(24946)].epochdays, 129.62621484, places=6)
+
+    def test_trajectory_matches_positions(self):
+        tracker = DebrisTracker(self.loc, batched=True)
+        t = tracker.ts.utc(2025, 5, 10, 12, 0, 0)
+        name, data = next(iter(tracker.calculate_positions(self.debris, t).items()))
+        start = t.utc_datetime().timestamp()
+
+        times, az, alt = tracker.trajectory(self.debris, name, duration=10.0, step=2.0, start=start)
+        self.assertEqual(len(times), 6)
+        self.assertAlmostEqual(times[-1] - times[0], 10.0)
+        self.assertAlmostEqual(alt[0], data['altitude'], places=4)
+        self.assertAlmostEqual(az[0], data['azimuth'], places=4)
+
+        later = tracker.calculate_positions(self.debris, tracker.ts.utc(2025, 5, 10, 12, 0, 10))
+        if name in later:
+            self.assertAlmostEqual(alt[-1], later[name]['altitude'], places=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import sys
+import os
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from skyfield.api import load, wgs84
+from data_manager import DataManager
+from debris_tracker import DebrisTracker
+from ephemeris_cache import EphemerisCache
+from satellite_array import SatelliteArray
+
+TLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'tle_cache', 'debris_active_20250510_0939.tle')
+
+
+class TestEphemerisCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        debris = DataManager().load_tle_file(TLE_FILE)
+        cls.debris = dict(list(debris.items())[:200])
+        cls.sat_array = SatelliteArray.from_satellites(cls.debris)
+        cls.ts = load.timescale()
+        cls.loc = [17.389801, 78.321151]
+        cls.location = wgs84.latlon(*cls.loc)
+
+    def test_matches_propagation_within_bound(self):
+        cache = EphemerisCache(tolerance_km=0.05)
+        start = self.ts.utc(2025, 5, 10, 12, 0, 0)
+        for offset in np.linspace(0, 1800, 37):
+            t = self.ts.tt_jd(start.tt + offset / 86400.0)
+            expected_errors, expected = self.sat_array.itrs_positions(t)
+            result = cache.itrs_positions(self.sat_array, t)
+            ok = expected_errors[:, 0] == 0
+            difference = np.linalg.norm(result[ok] - expected[ok, 0], axis=1)
+            self.assertLess(difference.max(), 0.05)
+        for key in self.sat_array.keys:
+            bound = cache.error_bound(key)
+            if not np.isnan(bound):
+                self.assertLessEqual(bound, 0.05)
+
+    def test_segments_refresh_outside_their_span(self):
+        cache = EphemerisCache(segment_seconds=600)
+        t = self.ts.utc(2025, 5, 10, 12, 0, 0)
+        cache.itrs_positions(self.sat_array, t)
+        fits = cache.fits
+        cache.itrs_positions(self.sat_array, self.ts.tt_jd(t.tt + 1 / 86400.0))
+        self.assertEqual(cache.fits, fits)
+        self.assertEqual(cache.hits, len(self.sat_array))
+        cache.itrs_positions(self.sat_array, self.ts.tt_jd(t.tt + 900 / 86400.0))
+        self.assertGreater(cache.fits, fits)
+
+    def test_tight_tolerance_shortens_segments(self):
+        cache = EphemerisCache(segment_seconds=1200, sample_seconds=300, tolerance_km=1e-3)
+        t = self.ts.utc(2025, 5, 10, 12, 0, 0)
+        cache.itrs_positions(self.sat_array.subset([0]), t)
+        _, span, _, error = cache.segments[self.sat_array.keys[0]]
+        self.assertLess(span, 1200 / 86400.0)
+
+    def test_least_recently_used_evicted(self):
+        cache = EphemerisCache(max_objects=10)
+        t = self.ts.utc(2025, 5, 10, 12, 0, 0)
+        first = self.sat_array.subset(range(10))
+        cache.itrs_positions(first, t)
+        cache.itrs_positions(self.sat_array.subset([0]), t)
+        cache.itrs_positions(self.sat_array.subset(range(10, 15)), t)
+        self.assertEqual(len(cache), 10)
+        self.assertEqual(cache.evictions, 5)
+        self.assertIn(self.sat_array.keys[0], cache.segments)
+        self.assertNotIn(self.sat_array.keys[1], cache.segments)
+
+    def test_batch_larger_than_max_objects(self):
+        cache = EphemerisCache(max_objects=50)
+        t = self.ts.utc(2025, 5, 10, 12, 0, 0)
+        expected_errors, expected = self.sat_array.itrs_positions(t)
+        result = cache.itrs_positions(self.sat_array, t)
+        ok = expected_errors[:, 0] == 0
+        self.assertLess(np.linalg.norm(result[ok] - expected[ok, 0], axis=1).max(), 0.05)
+        # Served in full, then cut back to the bound.
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(cache.evictions, len(self.sat_array) - 50)
+
+        # The same batch again is answered from its kept coefficients.
+        fits = cache.fits
+        np.testing.assert_array_equal(cache.itrs_positions(self.sat_array, t), result)
+        self.assertEqual(cache.fits, fits)
+
+        later = self.ts.tt_jd(t.tt + 3600 / 86400.0)
+        cache.itrs_positions(self.sat_array.subset(range(10)), later)
+        self.assertEqual(len(cache), 50)
+        cache.itrs_positions(self.sat_array, later)
+        self.assertEqual(len(cache), 50)
+
+    def test_tracker_uses_cache(self):
+        plain = DebrisTracker(self.loc, batched=True)
+        cached = DebrisTracker(self.loc, batched=True)
+        cached.ephemeris_cache = EphemerisCache(max_objects=50)
+        t = plain.ts.utc(2025, 5, 10, 12, 0, 0)
+
+        expected = plain.calculate_positions(self.debris, t)
+        result = cached.calculate_positions(self.debris, t)
+        self.assertTrue(expected)
+        self.assertEqual(len(cached.ephemeris_cache), min(len(self.debris), 50))
+        for name in set(expected) & set(result):
+            self.assertAlmostEqual(expected[name]['altitude'], result[name]['altitude'], places=3)
+            self.assertAlmostEqual(expected[name]['distance'], result[name]['distance'], places=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
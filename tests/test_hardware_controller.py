@@ -0,0 +1,217 @@
+import sys
+import os
+import io
+import json
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import hardware_controller
+from hardware_controller import HardwareController, parse_location_line
+
+
+class FakeSerial:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append((time.time(), data.decode()))
+
+    def close(self):
+        pass
+
+
+def _parse(command):
+    _, azimuth, altitude = command.strip().split(',')
+    return float(azimuth), float(altitude)
+
+
+class TestServoStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.hardware = HardwareController(stream_rate=50.0, latency=0.0)
+        self.hardware.ser = FakeSerial()
+
+    def tearDown(self):
+        self.hardware.stop_stream()
+
+    def test_streams_interpolated_positions(self):
+        now = time.time()
+        self.hardware.set_trajectory([now, now + 2.0], [100.0, 120.0], [10.0, 30.0])
+        self.hardware.start_stream()
+        time.sleep(0.5)
+        self.hardware.stop_stream()
+
+        writes = self.hardware.ser.writes
+        self.assertGreaterEqual(len(writes), 15)
+        for sent_at, command in writes:
+            azimuth, altitude = _parse(command)
+            expected = 100.0 + 10.0 * (sent_at - now)
+            self.assertAlmostEqual(azimuth, expected, delta=0.3)
+            self.assertAlmostEqual(altitude - 10.0, azimuth - 100.0, delta=0.2)
+
+    def test_latency_is_led(self):
+        self.hardware.latency = 0.5
+        now = time.time()
+        self.hardware.set_trajectory([now, now + 2.0], [100.0, 120.0], [10.0, 30.0])
+        self.hardware.start_stream()
+        time.sleep(0.2)
+        self.hardware.stop_stream()
+        sent_at, command = self.hardware.ser.writes[0]
+        self.assertAlmostEqual(_parse(command)[0], 100.0 + 10.0 * (sent_at + 0.5 - now), delta=0.3)
+
+    def test_azimuth_wraps_through_north(self):
+        now = time.time()
+        self.hardware.set_trajectory([now, now + 1.0], [358.0, 2.0], [20.0, 20.0])
+        azimuth, _ = self.hardware.pointing_at(now + 0.5)
+        self.assertAlmostEqual(azimuth % 360.0, 0.0, delta=1e-6)
+
+    def test_nothing_sent_outside_trajectory(self):
+        now = time.time()
+        self.hardware.set_trajectory([now - 10.0, now - 5.0], [100.0, 120.0], [10.0, 30.0])
+        self.hardware.start_stream()
+        time.sleep(0.1)
+        self.hardware.stop_stream()
+        self.assertEqual(self.hardware.ser.writes, [])
+
+    def test_rate_limited_by_baud(self):
+        self.hardware.stream_rate = 1000.0
+        self.assertLess(self.hardware.effective_stream_rate(), 60.0)
+        self.hardware.latency = None
+        self.assertGreater(self.hardware.estimated_latency(), 0.0)
+
+    def test_no_port_mode_prints_only_direct_commands(self):
+        self.hardware.no_port_mode = True
+        now = time.time()
+        self.hardware.set_trajectory([now, now + 2.0], [100.0, 120.0], [10.0, 30.0])
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.hardware.move_servos(90.0, 45.0)
+            self.hardware.start_stream()
+            time.sleep(0.1)
+            self.hardware.stop_stream()
+        self.assertEqual(output.getvalue().splitlines(), ["Servo: Az=90.0, Alt=45.0"])
+        self.assertGreater(self.hardware.commands_sent, 2)
+        self.assertEqual(self.hardware.ser.writes, [])
+
+
+def _nmea(body):
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"${body}*{checksum:02X}"
+
+
+class FakeGpsSerial:
+    """Serial port that hands out queued bytes a few at a time."""
+
+    def __init__(self, *args, **kwargs):
+        self.pending = b""
+        self.lock = threading.Lock()
+
+    def feed(self, data):
+        with self.lock:
+            self.pending += data
+
+    @property
+    def in_waiting(self):
+        return min(len(self.pending), 7)
+
+    def read(self, size=1):
+        with self.lock:
+            chunk, self.pending = self.pending[:size], self.pending[size:]
+        if not chunk:
+            time.sleep(0.01)
+        return chunk
+
+    def write(self, data):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestGpsReader(unittest.TestCase):
+
+    def test_parse_location_lines(self):
+        self.assertEqual(parse_location_line("Latitude: 17.389801 | Longitude: 78.321151\r"),
+                         (17.389801, 78.321151))
+        latitude, longitude = parse_location_line(_nmea("GPGGA,123519,4807.038,N,01131.000,W,1,08,0.9,545.4,M,46.9,M,,"))
+        self.assertAlmostEqual(latitude, 48.1173, places=4)
+        self.assertAlmostEqual(longitude, -11.516667, places=5)
+        latitude, _ = parse_location_line(_nmea("GPRMC,123519,A,3352.128,S,15112.558,E,022.4,084.4,230394,003.1,W"))
+        self.assertAlmostEqual(latitude, -33.8688, places=4)
+        self.assertIsNone(parse_location_line(_nmea("GPRMC,123519,V,,,,,,,230394,,")))
+        self.assertIsNone(parse_location_line("$GPGGA,123519,4807.038,N,01131.000,E,1,08*00"))
+        self.assertIsNone(parse_location_line("Latitude: 17.38"))
+        self.assertIsNone(parse_location_line("Waiting for GPS signal..."))
+
+    def test_reader_keeps_latest_fix_and_notifies_on_moves(self):
+        hardware = HardwareController(min_location_change_km=1.0)
+        hardware.ser = FakeGpsSerial()
+        moves = []
+        hardware.add_location_listener(moves.append)
+        hardware.start_reader()
+        try:
+            hardware.ser.feed(b"Waiting for GPS signal...\r\nLatitude: 17.389801 | Longitude: 78.321151\r\n")
+            fix = hardware.wait_for_fix(2.0)
+            self.assertEqual(fix[:2], (17.389801, 78.321151))
+            # A few metres of jitter is not a move; a few kilometres is.
+            hardware.ser.feed(b"Latitude: 17.389900 | Longitude: 78.321151\r\n"
+                              b"Latitude: 17.489801 | Longitude: 78.321151\r\n")
+            deadline = time.time() + 2.0
+            while len(moves) < 2 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            hardware.stop_reader()
+        self.assertEqual(moves, [[17.389801, 78.321151], [17.489801, 78.321151]])
+        self.assertEqual(hardware.latest_fix()[:2], (17.489801, 78.321151))
+
+    def test_connect_returns_cached_location_without_waiting(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = os.path.join(directory, 'last_location.json')
+            with open(cache, 'w') as f:
+                json.dump({'latitude': 10.0, 'longitude': 20.0, 'time': 0}, f)
+            hardware = HardwareController(location_cache=cache)
+            with mock.patch.object(hardware_controller.serial, 'Serial', FakeGpsSerial):
+                started = time.time()
+                location = hardware.connect(fix_timeout=5.0)
+                self.assertLess(time.time() - started, 1.0)
+                self.assertEqual(location, [10.0, 20.0])
+
+                moves = []
+                hardware.add_location_listener(moves.append)
+                hardware.ser.feed(b"Latitude: 11.000000 | Longitude: 20.000000\n")
+                deadline = time.time() + 2.0
+                while not moves and time.time() < deadline:
+                    time.sleep(0.01)
+                hardware.close()
+            self.assertEqual(moves, [[11.0, 20.0]])
+            with open(cache) as f:
+                self.assertEqual(json.load(f)['latitude'], 11.0)
+
+    def test_listener_added_after_a_fix_gets_it(self):
+        hardware = HardwareController()
+        hardware.handle_line("Latitude: 12.000000 | Longitude: 30.000000")
+        moves = []
+        hardware.add_location_listener(moves.append)
+        self.assertEqual(moves, [[12.0, 30.0]])
+        hardware.handle_line("Latitude: 13.000000 | Longitude: 30.000000")
+        self.assertEqual(moves, [[12.0, 30.0], [13.0, 30.0]])
+
+    def test_connect_waits_for_first_fix(self):
+        hardware = HardwareController()
+        with mock.patch.object(hardware_controller.serial, 'Serial', FakeGpsSerial):
+            timer = threading.Timer(0.2, lambda: hardware.ser.feed(b"Latitude: 1.5 | Longitude: 2.5\n"))
+            timer.start()
+            location = hardware.connect(fix_timeout=5.0)
+            hardware.close()
+        self.assertEqual(location, [1.5, 2.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import sys
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from history_store import HistoryStore
+
+DAY = 86400.0
+START = 1767225600.0  # 2026-01-01 00:00 UTC
+
+
+class TestHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.history_dir = tempfile.mkdtemp()
+        self.store = HistoryStore(self.history_dir, flush_interval=0.05)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.history_dir, ignore_errors=True)
+
+    def fill(self, seconds, step=1.0, objects=(25544, 33591, 43013)):
+        for i, t in enumerate(np.arange(START, START + seconds, step)):
+            self.store.record(t, objects[i % len(objects)], 100.0 + i % 50, 10.0 + i % 70, 800.0, (17.4, 78.3))
+            if i % 50000 == 0:
+                self.store.flush()
+        self.store.flush()
+
+    def test_records_survive_reopening(self):
+        self.fill(10)
+        reopened = HistoryStore(self.history_dir)
+        records = reopened.query(25544)
+        np.testing.assert_array_equal(records['timestamps'], START + np.array([0, 3, 6, 9]))
+        self.assertTrue(np.all(records['norad_ids'] == 25544))
+        np.testing.assert_allclose(records['latitudes'], 17.4)
+        self.assertEqual(list(reopened.objects()), [25544, 33591, 43013])
+
+    def test_partial_write_does_not_misalign_columns(self):
+        self.fill(10)
+        # A write cut short after the first two columns of a record.
+        directory = os.path.join(self.history_dir, '20260101')
+        with open(os.path.join(directory, 'timestamps.bin'), 'ab') as f:
+            np.array([START + 100], dtype='<f8').tofile(f)
+        with open(os.path.join(directory, 'norad_ids.bin'), 'ab') as f:
+            np.array([99999], dtype='<i4').tofile(f)
+        self.assertEqual(len(self.store.query()['timestamps']), 10)
+
+        self.store.record(START + 10, 25544, 1.0, 2.0, 3.0, (17.4, 78.3))
+        self.store.flush()
+        records = self.store.query()
+        self.assertEqual(len(records['timestamps']), 11)
+        self.assertEqual(records['timestamps'][-1], START + 10)
+        self.assertEqual(records['norad_ids'][-1], 25544)
+        self.assertEqual(records['altitudes'][-1], 2.0)
+
+    def test_time_range_spans_day_segments(self):
+        self.fill(2 * DAY, step=60.0)
+        self.assertEqual(self.store.segments(), ['20260101', '20260102'])
+        records = self.store.query(start=START + DAY - 120, end=START + DAY + 60)
+        np.testing.assert_array_equal(records['timestamps'], START + DAY + np.array([-120, -60, 0, 60]))
+        self.assertEqual(len(self.store.query(33591, START + DAY - 120, START + DAY + 60)['timestamps']), 2)
+
+    def test_writer_thread_never_blocks_recording(self):
+        store = HistoryStore(self.history_dir, flush_interval=0.05, queue_size=10).start()
+        started = time.perf_counter()
+        accepted = sum(store.record(START + i, 25544, 0.0, 0.0, 0.0, (0, 0)) for i in range(1000))
+        self.assertLess(time.perf_counter() - started, 0.5)
+        store.close()
+        self.assertEqual(store.written + store.dropped, 1000)
+        self.assertEqual(store.written, accepted)
+
+    def test_week_query_is_fast(self):
+        self.fill(7 * DAY, step=2.0, objects=tuple(range(1000, 1040)))
+        self.store.query(1001)
+        started = time.perf_counter()
+        records = self.store.query(1001, START + DAY, START + 6 * DAY)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(records['timestamps']), int(5 * DAY / 80))
+        self.assertLess(elapsed, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
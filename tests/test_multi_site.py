@@ -0,0 +1,75 @@
+import sys
+import os
+import time
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+from debris_tracker import DebrisTracker
+from multi_site import MultiSiteTracker
+
+TLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'tle_cache', 'debris_active_20250510_0939.tle')
+SITES = {'hyderabad': (17.389801, 78.321151), 'svalbard': (78.2298, 15.4078), 'santiago': (-33.45, -70.67)}
+
+
+class TestMultiSiteTracker(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.debris = DataManager().load_tle_file(TLE_FILE)
+
+    def test_matches_single_site_trackers(self):
+        multi = MultiSiteTracker(SITES)
+        t = multi.ts.utc(2025, 5, 10, 12, 30)
+        visible = multi.calculate_positions(self.debris, t)
+        self.assertEqual(set(visible), set(SITES))
+        for name, loc in SITES.items():
+            expected = DebrisTracker(loc, batched=True).calculate_positions(self.debris, t)
+            self.assertEqual(set(visible[name]), set(expected))
+            for key, data in expected.items():
+                self.assertAlmostEqual(visible[name][key]['altitude'], data['altitude'], places=6)
+                self.assertAlmostEqual(visible[name][key]['azimuth'], data['azimuth'], places=6)
+                self.assertAlmostEqual(visible[name][key]['distance'], data['distance'], places=4)
+
+    def test_minimum_altitude_and_site_changes(self):
+        multi = MultiSiteTracker(SITES, min_altitude=30.0)
+        t = multi.ts.utc(2025, 5, 10, 12, 30)
+        alt, _, _ = multi.altaz(self.debris, t)
+        self.assertEqual(alt.shape, (3, len(self.debris)))
+        visible = multi.calculate_positions(self.debris, t)
+        self.assertEqual(len(visible['santiago']), int(np.sum(alt[2] > 30.0)))
+
+        multi.remove_site('svalbard')
+        multi.add_site('quito', (-0.18, -78.47))
+        self.assertEqual(list(multi.calculate_positions(self.debris, t)), ['hyderabad', 'santiago', 'quito'])
+
+    def test_no_sites(self):
+        multi = MultiSiteTracker({})
+        t = multi.ts.utc(2025, 5, 10, 12, 30)
+        self.assertEqual(multi.calculate_positions(self.debris, t), {})
+        _, sites, objects, alt, _, _ = multi.positions(self.debris, t)
+        self.assertEqual((len(sites), len(objects), len(alt)), (0, 0, 0))
+        self.assertEqual(multi.altaz(self.debris, t)[0].shape, (0, len(self.debris)))
+
+        multi.add_site('hyderabad', SITES['hyderabad'])
+        multi.remove_site('hyderabad')
+        self.assertEqual(multi.calculate_positions(self.debris, t), {})
+
+    def test_extra_sites_are_cheap(self):
+        t = DebrisTracker(SITES['hyderabad']).ts.utc(2025, 5, 10, 12, 30)
+        many = {f"site {i}": (-60.0 + i, -180.0 + 3.0 * i) for i in range(100)}
+        timings = []
+        for tracker in (MultiSiteTracker({'hyderabad': SITES['hyderabad']}), MultiSiteTracker(many)):
+            tracker.positions(self.debris, t)
+            started = time.perf_counter()
+            for _ in range(5):
+                tracker.positions(self.debris, t)
+            timings.append(time.perf_counter() - started)
+        # Each extra site costs well under a tenth of propagating the catalog.
+        self.assertLess((timings[1] - timings[0]) / 99, 0.15 * timings[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
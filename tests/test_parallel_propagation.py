@@ -0,0 +1,80 @@
+import sys
+import os
+import unittest
+import warnings
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+from debris_tracker import DebrisTracker
+from parallel_propagation import ParallelPropagator, element_table, satrecs_from_table
+from satellite_array import SatelliteArray
+
+TLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'tle_cache', 'debris_active_20250510_0939.tle')
+LOC = [17.389801, 78.321151]
+
+
+class TestParallelPropagator(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        debris = DataManager().load_tle_file(TLE_FILE)
+        cls.debris = dict(list(debris.items())[:3000])
+        cls.sat_array = SatelliteArray.from_satellites(cls.debris)
+
+    def test_elements_rebuild_the_same_orbits(self):
+        tracker = DebrisTracker(LOC)
+        t = tracker.ts.utc(2025, 5, 10, 18)
+        rebuilt = SatelliteArray(self.sat_array.keys, satrecs_from_table(element_table(self.sat_array.satrecs)))
+        _, expected = self.sat_array.teme_positions(t)
+        _, actual = rebuilt.teme_positions(t)
+        np.testing.assert_allclose(actual, expected, atol=1e-3)
+
+    def test_matches_single_process(self):
+        tracker = DebrisTracker(LOC)
+        with ParallelPropagator(self.sat_array, workers=3) as propagator:
+            for hour in (12, 13):
+                t = tracker.ts.utc(2025, 5, 10, hour)
+                alt, az, distance = propagator.altaz(t, tracker.location)
+                expected = self.sat_array.altaz(t, tracker.location)
+                np.testing.assert_allclose(alt, expected[0][:, 0], atol=1e-6)
+                np.testing.assert_allclose(az, expected[1][:, 0], atol=1e-6)
+                np.testing.assert_allclose(distance, expected[2][:, 0], atol=1e-5)
+        self.assertEqual(propagator._processes, [])
+
+    def test_tracker_uses_workers(self):
+        serial = DebrisTracker(LOC, batched=True)
+        parallel = DebrisTracker(LOC, workers=2)
+        try:
+            t = serial.ts.utc(2025, 5, 10, 12, 30)
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                visible = parallel.calculate_positions(self.debris, t)
+            self.assertEqual(set(visible), set(serial.calculate_positions(self.debris, t)))
+            self.assertIsNotNone(parallel._propagator)
+        finally:
+            parallel.close()
+        self.assertIsNone(parallel._propagator)
+
+    def test_tracker_recovers_from_a_dead_worker(self):
+        serial = DebrisTracker(LOC, batched=True)
+        parallel = DebrisTracker(LOC, workers=2)
+        try:
+            t = serial.ts.utc(2025, 5, 10, 12, 30)
+            expected = set(serial.calculate_positions(self.debris, t))
+            parallel.calculate_positions(self.debris, t)
+            parallel._propagator._processes[0].kill()
+            parallel._propagator._processes[0].join()
+            # This tick is propagated in process, the next on a new pool.
+            self.assertEqual(set(parallel.calculate_positions(self.debris, t)), expected)
+            self.assertIsNone(parallel._propagator)
+            self.assertEqual(set(parallel.calculate_positions(self.debris, t)), expected)
+            self.assertIsNotNone(parallel._propagator)
+            self.assertEqual(parallel.worker_restarts, 1)
+        finally:
+            parallel.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import sys
+import os
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+from debris_tracker import DebrisTracker
+from pass_predictor import PassPredictor, PassSchedule, _join
+
+TLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'tle_cache', 'debris_active_20250510_0939.tle')
+LOC = [17.389801, 78.321151]
+
+
+class TestPassSchedule(unittest.TestCase):
+
+    def test_active_uses_time_sorted_windows(self):
+        schedule = PassSchedule(['b', 'a', 'c'], [5.0, 1.0, 2.0], [6.0, 2.0, 2.5], [7.0, 3.0, 2.8],
+                                [10.0, 20.0, 5.0])
+        self.assertEqual(list(schedule.keys), ['a', 'c', 'b'])
+        self.assertEqual(schedule.active_keys(2.6), {'a', 'c'})
+        self.assertEqual(schedule.active_keys(4.0), set())
+        self.assertEqual(schedule.active_keys(4.0, tolerance=1.0), {'a', 'b'})
+
+    def test_join_glues_cut_passes_into_a_new_schedule(self):
+        schedule = PassSchedule(['a', 'b'], [1.0, 2.0], [1.5, 2.5], [3.0, 3.0], [20.0, 30.0],
+                                set_clipped=[True, True])
+        extension = PassSchedule(['a', 'c'], [3.0, 4.0], [3.5, 4.5], [4.0, 5.0], [40.0, 10.0],
+                                 rise_clipped=[True, False])
+        joined = _join(schedule, extension)
+        self.assertEqual(list(joined.keys), ['a', 'b', 'c'])
+        self.assertEqual(list(joined.set), [4.0, 3.0, 5.0])
+        self.assertEqual(list(joined.culmination), [3.5, 2.5, 4.5])
+        self.assertFalse(np.any(joined.set_clipped))
+        self.assertEqual(joined.max_duration, 3.0)
+        # The schedule that was extended is unchanged.
+        self.assertEqual(list(schedule.set), [3.0, 3.0])
+        self.assertEqual(list(schedule.max_altitude), [20.0, 30.0])
+        self.assertEqual(list(schedule.set_clipped), [True, True])
+
+
+class TestPassPredictor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        debris = DataManager().load_tle_file(TLE_FILE)
+        cls.debris = dict(list(debris.items())[:1500])
+
+    def test_active_objects_cover_visible_objects(self):
+        """Every object above the horizon must have a pass in progress"""
+        full = DebrisTracker(LOC, batched=True)
+        scheduled = DebrisTracker(LOC, batched=True)
+        scheduled.pass_predictor = PassPredictor(scheduled, horizon_hours=2)
+        for minute in range(0, 120, 11):
+            t = full.ts.utc(2025, 5, 10, 12, minute, 5)
+            expected = {name for name, data in full.calculate_positions(self.debris, t).items()
+                        if data['altitude'] > 0.05}
+            self.assertTrue(expected <= set(scheduled.calculate_positions(self.debris, t)))
+
+    def test_rise_and_set_match_skyfield_events(self):
+        tracker = DebrisTracker(LOC, batched=True)
+        predictor = PassPredictor(tracker, horizon_hours=3, step_seconds=30)
+        t0 = tracker.ts.utc(2025, 5, 10, 12)
+        schedule = predictor.update(self.debris, t0)
+        complete = np.flatnonzero(~schedule.rise_clipped & ~schedule.set_clipped & (schedule.max_altitude > 5))
+        for row in complete[:5]:
+            satellite = self.debris[schedule.keys[row]]
+            times, events = satellite.find_events(tracker.location, tracker.ts.tt_jd(schedule.rise[row] - 0.01),
+                                                  tracker.ts.tt_jd(schedule.set[row] + 0.01))
+            rise = times.tt[list(events).index(0)]
+            set_ = times.tt[list(events).index(2)]
+            self.assertLess(abs(rise - schedule.rise[row]) * 86400, 5)
+            self.assertLess(abs(set_ - schedule.set[row]) * 86400, 5)
+
+    def test_incremental_update_only_touches_changed_objects(self):
+        tracker = DebrisTracker(LOC, batched=True)
+        predictor = PassPredictor(tracker, horizon_hours=2)
+        t0 = tracker.ts.utc(2025, 5, 10, 12)
+        debris = dict(self.debris)
+        before = predictor.update(debris, t0)
+
+        removed = before.keys[0]
+        del debris[removed]
+        calls = []
+        compute = predictor.compute
+        predictor.compute = lambda sat_array, *args: calls.append(len(sat_array)) or compute(sat_array, *args)
+        after = predictor.update(debris, tracker.ts.utc(2025, 5, 10, 12, 1))
+
+        self.assertNotIn(removed, set(after.keys))
+        self.assertEqual(calls, [])
+        self.assertEqual(len(after), len(before) - np.count_nonzero(before.keys == removed))
+
+    def test_location_change_recomputes(self):
+        tracker = DebrisTracker(LOC, batched=True)
+        predictor = PassPredictor(tracker, horizon_hours=1)
+        t0 = tracker.ts.utc(2025, 5, 10, 12)
+        first = predictor.update(self.debris, t0)
+        tracker.set_location([-33.9, 18.4])
+        second = predictor.update(self.debris, t0)
+        self.assertNotEqual(set(first.keys), set(second.keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from plot_renderer import PlotRenderer, RenderWorker
+from tracking_buffer import TrackingBuffer
+from ui_components import DebrisTrackerUI
+
+
+def snapshot(points=50):
+    ui = DebrisTrackerUI.__new__(DebrisTrackerUI)
+    ui.tracking_data = TrackingBuffer(1000)
+    start = datetime(2026, 1, 1, 12, 0, 0).timestamp()
+    for i, altitude, azimuth, distance in zip(range(points), np.linspace(10, 60, points),
+                                              np.linspace(90, 150, points), np.linspace(2000, 800, points)):
+        ui.tracking_data.append(start + i, 'ISS (ZARYA)', altitude, azimuth, distance)
+    return ui.snapshot()
+
+
+class TestPlotRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.plots_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.plots_dir, ignore_errors=True)
+
+    def test_figures_are_reused(self):
+        renderer = PlotRenderer(self.plots_dir)
+        lines = list(renderer.track_lines)
+        path = renderer.track(snapshot(50))
+        self.assertTrue(os.path.exists(path))
+        renderer.track(snapshot(80))
+        self.assertEqual(renderer.track_lines, lines)
+        self.assertEqual(len(lines[0].get_xdata()), 80)
+        self.assertEqual(len(renderer.track_figure.axes[0].lines), 1)
+
+        self.assertTrue(os.path.exists(renderer.sky_map(snapshot(50))))
+        self.assertEqual(len(renderer.sky_points.get_offsets()), 20)
+
+    def test_worker_renders_off_process(self):
+        worker = RenderWorker(self.plots_dir).start()
+        try:
+            started = time.monotonic()
+            for _ in range(10):
+                worker.submit('track', snapshot())
+            worker.submit('sky_map', snapshot())
+            # Handing over a snapshot does not wait for drawing.
+            self.assertLess(time.monotonic() - started, 0.5)
+            self.assertTrue(worker.wait(timeout=60.0))
+        finally:
+            worker.close()
+        self.assertEqual(worker.errors, [])
+        self.assertEqual(len(worker.saved) + worker.coalesced, 11)
+        self.assertGreater(worker.coalesced, 0)
+        self.assertTrue(any('sky_map' in path for path in worker.saved))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import sys
+import os
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hardware_controller import HardwareController
+from servo_protocol import (ACK, FRAME_SIZE, POINT, STATUS_OK, STATUS_QUEUE_FULL, TRAJECTORY_CLEAR,
+                            TRAJECTORY_POINT, BinaryServoLink, StreamDecoder, azimuth_from_field, crc16,
+                            decode_frame, encode_frame)
+
+
+class FakeBoardSerial:
+    """Acks every frame written to it, as the sketch does, and prints a GPS line."""
+
+    def __init__(self, ack=True):
+        self.ack = ack
+        self.frames = []
+        self.outgoing = bytearray(b"Latitude: 17.389801 | Longitude: 78.321151\r\n")
+        self.lock = threading.Lock()
+        self.decoder = StreamDecoder()
+
+    def write(self, data):
+        frames, _ = self.decoder.feed(data)
+        with self.lock:
+            for kind, seq, a, b, c in frames:
+                self.frames.append((kind, a, b, c))
+                if self.ack:
+                    self.outgoing += encode_frame(ACK, seq, STATUS_OK, 32, 0)
+
+    @property
+    def in_waiting(self):
+        return len(self.outgoing)
+
+    def read(self, size=1):
+        with self.lock:
+            chunk = bytes(self.outgoing[:size])
+            del self.outgoing[:size]
+        if not chunk:
+            time.sleep(0.005)
+        return chunk
+
+    def close(self):
+        pass
+
+
+class TestFrames(unittest.TestCase):
+
+    def test_crc_and_round_trip(self):
+        self.assertEqual(crc16(b"123456789"), 0x29B1)
+        frame = encode_frame(POINT, 7, -1234, 4567, 890)
+        self.assertEqual(len(frame), FRAME_SIZE)
+        self.assertEqual(decode_frame(frame), (POINT, 7, -1234, 4567, 890))
+        damaged = bytearray(frame)
+        damaged[4] ^= 0x01
+        self.assertIsNone(decode_frame(bytes(damaged)))
+
+    def test_decoder_separates_text_and_frames(self):
+        ack = encode_frame(ACK, 3, STATUS_OK, 30, 0)
+        damaged = bytearray(encode_frame(ACK, 4, STATUS_OK, 30, 0))
+        damaged[-1] ^= 0xFF
+        stream = b"Latitude: 1.0 | Longitude: 2.0\r\n" + ack + bytes(damaged) + b"Waiting\n" + ack
+        decoder = StreamDecoder()
+        frames, lines = [], []
+        for i in range(0, len(stream), 5):
+            new_frames, new_lines = decoder.feed(stream[i:i + 5])
+            frames += new_frames
+            lines += new_lines
+        self.assertEqual(frames, [(ACK, 3, STATUS_OK, 30, 0)] * 2)
+        # Bytes of the damaged frame end up in front of the next line.
+        self.assertEqual(lines[0].strip(), "Latitude: 1.0 | Longitude: 2.0")
+        self.assertTrue(lines[1].endswith("Waiting"))
+        self.assertEqual(decoder.bad_frames, 1)
+
+    def test_azimuth_field_covers_full_circle(self):
+        link = BinaryServoLink(lambda frame: None)
+        for azimuth in (0.0, 179.99, 359.99, -10.0):
+            link.send_point(azimuth, 45.0)
+            _, _, field, altitude, _ = decode_frame(link._in_flight[link._seq - 1][0])
+            self.assertAlmostEqual(azimuth_from_field(field), azimuth % 360.0, places=2)
+            self.assertEqual(altitude, 4500)
+            link.handle_frame((ACK, link._seq - 1, STATUS_OK, 32, 0))
+
+
+class TestBinaryServoLink(unittest.TestCase):
+
+    def test_window_limits_commands_in_flight(self):
+        written = []
+        link = BinaryServoLink(written.append, window=4)
+        seqs = [link.send_point(100.0 + i, 20.0) for i in range(5)]
+        self.assertIsNone(seqs[-1])
+        self.assertEqual(link.in_flight(), 4)
+        self.assertEqual(link.dropped, 1)
+        for seq in seqs[:4]:
+            link.handle_frame((ACK, seq, STATUS_OK, 32, 0))
+        self.assertEqual(link.in_flight(), 0)
+        stats = link.stats()
+        self.assertEqual(stats['acked'], 4)
+        self.assertIsNotNone(stats['latency'])
+        self.assertGreater(stats['bytes_per_second'], 0)
+
+    def test_unacked_commands_are_resent_then_given_up(self):
+        written = []
+        link = BinaryServoLink(written.append, window=2, ack_timeout=0.01, max_retries=2)
+        link.send(POINT, 0, 0)
+        self.assertTrue(link.wait_idle(timeout=1.0))
+        self.assertEqual(link.retransmits, 2)
+        self.assertEqual(link.failed, 1)
+        self.assertEqual(len(written), 3)
+
+    def test_upload_counts_only_queued_points(self):
+        queued = []
+
+        def board(frame):
+            kind, seq, a, b, c = decode_frame(frame)
+            status = STATUS_OK
+            if kind == TRAJECTORY_POINT:
+                if len(queued) < 3:
+                    queued.append(a)
+                else:
+                    status = STATUS_QUEUE_FULL
+            link.handle_frame((ACK, seq, status, 3 - len(queued), 0))
+
+        link = BinaryServoLink(board)
+        sent = link.upload_trajectory([(100, 90.0 + i, 10.0) for i in range(10)])
+        self.assertEqual(sent, 3)
+        self.assertEqual(len(queued), 3)
+        self.assertEqual(link.queue_full, 1)
+
+
+class TestHardwareBinaryProtocol(unittest.TestCase):
+
+    def setUp(self):
+        self.hardware = HardwareController(stream_rate=100.0, latency=0.0, protocol="binary")
+        self.hardware.ser = FakeBoardSerial()
+        self.hardware.start_reader()
+
+    def tearDown(self):
+        self.hardware.close()
+
+    def test_binary_commands_are_acked(self):
+        now = time.time()
+        self.hardware.set_trajectory([now, now + 2.0], [100.0, 120.0], [10.0, 30.0])
+        self.hardware.start_stream()
+        time.sleep(0.3)
+        self.hardware.stop_stream()
+        self.assertTrue(self.hardware.binary_link().wait_idle(1.0))
+
+        stats = self.hardware.link_stats()
+        self.assertGreater(stats['acked'], 10)
+        self.assertEqual(stats['failed'], 0)
+        kinds = {kind for kind, _, _, _ in self.hardware.ser.frames}
+        self.assertEqual(kinds, {POINT})
+        # The GPS line shares the port with the acks.
+        self.assertEqual(self.hardware.wait_for_fix(1.0)[:2], (17.389801, 78.321151))
+
+    def test_frames_allow_a_higher_rate(self):
+        ascii_hardware = HardwareController(stream_rate=1000.0)
+        self.hardware.stream_rate = 1000.0
+        self.assertGreater(self.hardware.effective_stream_rate(), 1.5 * ascii_hardware.effective_stream_rate())
+
+    def test_trajectory_upload(self):
+        now = time.time()
+        sent = self.hardware.upload_trajectory([now + 1.0, now + 1.5, now + 2.0], [90.0, 91.0, 92.0], [10.0, 11.0, 12.0])
+        self.assertEqual(sent, 3)
+        self.assertTrue(self.hardware.binary_link().wait_idle(1.0))
+        frames = self.hardware.ser.frames
+        self.assertEqual([frame[0] for frame in frames], [TRAJECTORY_CLEAR] + [TRAJECTORY_POINT] * 3)
+        self.assertAlmostEqual(frames[1][3], 1000, delta=50)
+        self.assertEqual([frame[3] for frame in frames[2:]], [500, 500])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import sys
+import os
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+from debris_tracker import DebrisTracker
+from pass_predictor import PassPredictor
+from target_scheduler import TargetPlan, TargetScheduler, reachable_windows
+
+TLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'tle_cache', 'debris_active_20250510_0939.tle')
+LOC = [17.389801, 78.321151]
+
+
+class TestTargetPlan(unittest.TestCase):
+
+    def test_target_at(self):
+        plan = TargetPlan(['a', 'b'], [1.0, 2.0], [2.0, 4.0], [0.0, 10.0], joined=[1.0, 3.0],
+                          azimuth=[np.nan, 40.0], altitude=[np.nan, 20.0])
+        self.assertEqual(plan.target_at(1.5), 'a')
+        self.assertIsNone(plan.slew_at(1.5))
+        # Slewing to b already names it, and where it will be met.
+        self.assertEqual(plan.target_at(2.5), 'b')
+        self.assertEqual(plan.slew_at(2.5), ('b', 40.0, 20.0, 3.0))
+        self.assertEqual(plan.target_at(3.0), 'b')
+        self.assertIsNone(plan.slew_at(3.5))
+        self.assertIsNone(plan.target_at(0.5))
+        self.assertIsNone(plan.target_at(4.5))
+
+    def test_reachable_windows_take_longest_run(self):
+        az = np.array([[10, 200, 20, 30, 40, 250],
+                       [200, 210, 220, 230, 240, 250]], dtype=float)
+        alt = np.full(az.shape, 30.0)
+        first, last = reachable_windows(az, alt)
+        self.assertEqual((first[0], last[0]), (2, 4))
+        self.assertLess(last[1], first[1])
+
+
+class TestTargetScheduler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        debris = DataManager().load_tle_file(TLE_FILE)
+        cls.debris = dict(list(debris.items())[:1500])
+
+    def setUp(self):
+        self.tracker = DebrisTracker(LOC, batched=True)
+        self.predictor = PassPredictor(self.tracker, horizon_hours=2)
+        self.scheduler = TargetScheduler(self.predictor)
+        self.t0 = self.tracker.ts.utc(2025, 5, 10, 12)
+
+    def test_plan_is_sequential_and_reachable(self):
+        plan = self.scheduler.update(self.debris, self.t0)
+        self.assertTrue(len(plan))
+        self.assertTrue(np.all(plan.end > plan.joined))
+        self.assertTrue(np.all(plan.joined >= plan.start))
+        # Each slew begins as the track before it ends...
+        np.testing.assert_allclose(plan.start[1:], plan.end[:-1])
+        # ...and takes time: each track is joined no earlier than it allows.
+        gaps = (plan.joined[1:] - plan.end[:-1]) * 86400
+        needed = plan.slew[1:] / self.scheduler.slew_rate + self.scheduler.settle_seconds
+        self.assertTrue(np.all(gaps >= needed - 1e-3))
+
+        for key, start, end in zip(plan.keys, plan.joined, plan.end):
+            middle = self.tracker.ts.tt_jd((start + end) / 2)
+            alt, az, _ = (self.debris[key] - self.tracker.location).at(middle).altaz()
+            self.assertGreater(alt.degrees, 0)
+            self.assertLessEqual(az.degrees, 180.5)
+
+    def test_target_holds_through_a_track(self):
+        plan = self.scheduler.update(self.debris, self.t0)
+        start, end = plan.joined[0], plan.end[0]
+        targets = {self.scheduler.target(self.debris, self.tracker.ts.tt_jd(jd))
+                   for jd in np.linspace(start, end, 10, endpoint=False)}
+        self.assertEqual(targets, {plan.keys[0]})
+
+    def test_replans_keep_the_track_in_progress(self):
+        plan = self.scheduler.update(self.debris, self.t0)
+        self.assertIs(self.scheduler.update(self.debris, self.tracker.ts.utc(2025, 5, 10, 12, 1)), plan)
+
+        jd = (plan.joined[0] + plan.end[0]) / 2
+        key = plan.keys[0]
+        # A catalog change gives a new schedule and forces a replan.
+        debris = dict(self.debris)
+        del debris[next(k for k in debris if k != key)]
+        replanned = self.scheduler.update(debris, self.tracker.ts.tt_jd(jd))
+        self.assertEqual(self.scheduler.replans, 2)
+        self.assertEqual(replanned.keys[0], key)
+        self.assertAlmostEqual(replanned.end[0], plan.end[0])
+
+    def test_slews_point_ahead_to_the_next_track(self):
+        plan = self.scheduler.update(self.debris, self.t0)
+        slewing = np.flatnonzero(plan.joined - plan.start > 0.5 / 86400)
+        self.assertTrue(len(slewing))
+        row = slewing[0]
+        jd = (plan.start[row] + plan.joined[row]) / 2
+        self.assertEqual(self.scheduler.target(self.debris, self.tracker.ts.tt_jd(jd)), plan.keys[row])
+        key, azimuth, altitude, joined = plan.slew_at(jd)
+        alt, az, _ = (self.debris[key] - self.tracker.location).at(self.tracker.ts.tt_jd(joined)).altaz()
+        self.assertAlmostEqual(azimuth, az.degrees, delta=1.0)
+        self.assertAlmostEqual(altitude, alt.degrees, delta=1.0)
+
+    def test_replan_runs_outside_the_lock(self):
+        class Lock:
+            held = 0
+
+            def __enter__(self):
+                Lock.held += 1
+
+            def __exit__(self, *exc):
+                Lock.held -= 1
+
+        calls = []
+        plan_from = self.scheduler.plan_from
+        self.scheduler.plan_from = lambda *args, **kwargs: calls.append(Lock.held) or plan_from(*args, **kwargs)
+        self.scheduler.update(self.debris, self.t0, Lock())
+        self.assertEqual(calls, [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
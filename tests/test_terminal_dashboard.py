@@ -0,0 +1,70 @@
+import sys
+import os
+import io
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from terminal_dashboard import TerminalDashboard, diff_updates, move_to
+
+
+def position(altitude, azimuth=100.0, distance=900.0):
+    return {'altitude': altitude, 'azimuth': azimuth, 'distance': distance, 'visible': True}
+
+
+class TestDiffUpdates(unittest.TestCase):
+
+    def test_only_changed_cells_are_written(self):
+        previous = ["Altitude:  41.0", "unchanged line "]
+        lines = ["Altitude:  42.5", "unchanged line "]
+        self.assertEqual(diff_updates(previous, lines), move_to(0, 12) + "2.5")
+        self.assertEqual(diff_updates(lines, lines), "")
+
+    def test_removed_rows_are_blanked(self):
+        self.assertEqual(diff_updates(["abc", "def"], ["abc"]), move_to(1, 0) + "   ")
+
+
+class TestTerminalDashboard(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.dashboard = TerminalDashboard(stream=self.stream, top_n=3)
+        self.name = lambda key: f"OBJECT {key}"
+
+    def test_top_objects_by_altitude(self):
+        visible = {1: position(10.0), 2: position(70.0), 3: position(40.0), 4: position(5.0)}
+        lines = self.dashboard.compose((3, visible[3]), visible, self.name, (17.4, 78.3),
+                                       {'propagation': (0.012, 0.010)}, {'display': 5.0})
+        self.assertTrue(all(len(line) == self.dashboard.width for line in lines))
+        table = [line for line in lines if line[1:3].strip() in ("1", "2", "3")]
+        self.assertEqual([line.split()[-4] for line in table], ["2", "3", "1"])
+        self.assertTrue(table[1].startswith("*"))
+        self.assertIn("4 objects above the horizon", "".join(lines))
+        self.assertIn("propagation 12.0/10.0", "".join(lines))
+
+    def test_redraw_writes_less_than_first_frame(self):
+        visible = {1: position(10.0), 2: position(70.0)}
+        first = self.dashboard.render((2, visible[2]), visible, self.name, (0, 0))
+        visible[2] = position(70.5)
+        second = self.dashboard.render((2, visible[2]), visible, self.name, (0, 0))
+        self.assertLess(len(second), len(first) / 4)
+        self.assertNotIn("\x1b[2J", second)
+        self.dashboard.close()
+        self.assertTrue(self.stream.getvalue().endswith("\x1b[?25h\n"))
+
+    def test_printed_messages_go_to_status_lines(self):
+        visible = {1: position(10.0)}
+        self.dashboard.render(None, visible, self.name, (0, 0))
+        print("Error in servo stage: timeout", file=self.dashboard)
+        self.dashboard.write("GPS location ")
+        update = self.dashboard.render(None, visible, self.name, (0, 0))
+        # Only the new message is drawn, in place; the partial line waits.
+        self.assertIn("> Error in servo stage: timeout", update)
+        self.assertNotIn("\n", update)
+        self.assertNotIn("GPS", update)
+        self.dashboard.write("changed\n")
+        self.dashboard.close()
+        self.assertIn("> GPS location changed", self.stream.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
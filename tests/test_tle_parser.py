@@ -0,0 +1,109 @@
+import sys
+import os
+import glob
+import unittest
+import numpy as np
+from sgp4.api import Satrec
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tle_parser import checksums_ok, parse_tle_buffer, parse_tle_file, parse_tle_range, split_tle_sets
+from catalog_cache import records_from_satrecs
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tle_cache')
+
+ISS = ("ISS (ZARYA)",
+       "1 25544U 98067A   25130.51782528  .00009878  00000+0  18188-3 0  9999",
+       "2 25544  51.6378 142.9408 0002278  88.3214 271.8034 15.49527845509374")
+IRIDIUM_33_DEB = ("IRIDIUM 33 DEB",
+                  "1 33773U 97051L   25083.80947091  .00003355  00000+0  10059-2 0  9993",
+                  "2 33773  86.4084 171.8933 0008985 308.5313  51.5081 14.42541273845561")
+NEGATIVE_DRAG = ("COSMOS 2251 DEB",
+                 "1 34427U 93036RU  25129.89612418 -.00000123  10270-5 -25036-4 0  9992",
+                 "2 34427  74.0375 245.9410 0120442 300.8046  58.0763 14.08938412 25272")
+
+
+def _text(*tle_sets):
+    return "\r\n".join(line for tle in tle_sets for line in tle) + "\r\n"
+
+
+class TestTleParser(unittest.TestCase):
+
+    def assert_matches_sgp4(self, records, tle_sets):
+        satrecs = [Satrec.twoline2rv(line1, line2) for _, line1, line2 in tle_sets]
+        expected = records_from_satrecs(satrecs, [name for name, _, _ in tle_sets])
+        self.assertEqual(len(records), len(expected))
+        for field in expected.dtype.names:
+            if expected[field].dtype.kind == 'f':
+                np.testing.assert_allclose(records[field], expected[field], rtol=1e-12, atol=1e-9, err_msg=field)
+            else:
+                np.testing.assert_array_equal(records[field], expected[field], err_msg=field)
+
+    def test_fields_match_sgp4_reader(self):
+        tle_sets = [ISS, IRIDIUM_33_DEB, NEGATIVE_DRAG]
+        records = parse_tle_buffer(_text(*tle_sets).encode())
+        self.assert_matches_sgp4(records, tle_sets)
+        self.assertLess(records['bstar'][2], 0)
+        self.assertLess(records['ndot'][2], 0)
+
+    def test_shipped_cache_files(self):
+        for filepath in glob.glob(os.path.join(CACHE_DIR, '*.tle')):
+            tle_sets = split_tle_sets(open(filepath, 'rb').read())
+            if tle_sets:
+                self.assert_matches_sgp4(parse_tle_file(filepath), tle_sets)
+
+    def test_missing_name_line_does_not_shift_records(self):
+        text = _text(ISS, IRIDIUM_33_DEB[1:], IRIDIUM_33_DEB)
+        tle_sets = split_tle_sets(text)
+        self.assertEqual([name for name, _, _ in tle_sets], ["ISS (ZARYA)", "", "IRIDIUM 33 DEB"])
+        self.assertEqual(parse_tle_buffer(text.encode())['norad'].tolist(), [25544, 33773, 33773])
+
+    def test_bad_checksum_and_truncated_groups_are_skipped(self):
+        corrupt = (ISS[0], ISS[1][:30] + '9' + ISS[1][31:], ISS[2])
+        truncated = (IRIDIUM_33_DEB[0], IRIDIUM_33_DEB[1])
+        text = _text(corrupt, truncated, ("junk",), IRIDIUM_33_DEB)
+        records = parse_tle_buffer(text.encode())
+        self.assertEqual(records['norad'].tolist(), [33773])
+        self.assertEqual(records['name'][0], b"IRIDIUM 33 DEB")
+        self.assertEqual(len(parse_tle_buffer(text.encode(), verify_checksums=False)), 2)
+
+    def test_mismatched_catalog_numbers_are_skipped(self):
+        text = _text((ISS[0], ISS[1], IRIDIUM_33_DEB[2]), IRIDIUM_33_DEB)
+        self.assertEqual(parse_tle_buffer(text.encode())['norad'].tolist(), [33773])
+
+    def test_letters_in_numeric_fields_are_skipped(self):
+        # O for 0 leaves the checksum as it was.
+        letter = (ISS[0], ISS[1], ISS[2][:26] + 'O' + ISS[2][27:])
+        text = _text(letter, IRIDIUM_33_DEB)
+        self.assertEqual([line2 for _, _, line2 in split_tle_sets(text)], [IRIDIUM_33_DEB[2]])
+        self.assertEqual(parse_tle_buffer(text.encode())['norad'].tolist(), [33773])
+
+    def test_split_and_parse_keep_the_same_sets(self):
+        sign = (ISS[0], ISS[1][:46] + '+' + ISS[1][47:], ISS[2])
+        alpha5 = (IRIDIUM_33_DEB[0], '1 I' + IRIDIUM_33_DEB[1][3:], '2 I' + IRIDIUM_33_DEB[2][3:])
+        text = _text(sign, alpha5, NEGATIVE_DRAG)
+        norads = [int(line1[2:7]) for _, line1, _ in split_tle_sets(text, verify_checksums=False)]
+        self.assertEqual(norads, parse_tle_buffer(text.encode(), verify_checksums=False)['norad'].tolist())
+        self.assertEqual(norads, [34427])
+
+    def test_byte_ranges_partition_the_file(self):
+        filepath = os.path.join(CACHE_DIR, 'debris_iridium-33-debris_20250510_0939.tle')
+        expected = parse_tle_file(filepath)
+        size = os.path.getsize(filepath)
+        for count in (1, 3, 17):
+            parts = [parse_tle_range(filepath, size * i // count, size * (i + 1) // count) for i in range(count)]
+            np.testing.assert_array_equal(np.concatenate(parts), expected)
+
+    def test_checksums(self):
+        lines = np.frombuffer((ISS[1] + ISS[2]).encode(), dtype=np.uint8).reshape(2, 69)
+        self.assertTrue(np.all(checksums_ok(lines)))
+        broken = lines.copy()
+        broken[0, 68] = ord('0')
+        self.assertFalse(checksums_ok(broken)[0])
+
+    def test_empty_input(self):
+        self.assertEqual(len(parse_tle_buffer(b"")), 0)
+        self.assertEqual(split_tle_sets(""), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import sys
+import os
+import time
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tracking_buffer import TrackingBuffer
+
+
+class TestTrackingBuffer(unittest.TestCase):
+
+    def test_keeps_newest_samples_in_order(self):
+        buffer = TrackingBuffer(capacity=5)
+        for i in range(12):
+            buffer.append(1000.0 + i, f"OBJECT {i % 2}", float(i), 2.0 * i, 100.0 * i)
+        self.assertEqual(len(buffer), 5)
+        np.testing.assert_array_equal(buffer['timestamps'], 1000.0 + np.arange(7, 12))
+        np.testing.assert_array_equal(buffer.column('altitudes', 2), [10.0, 11.0])
+        self.assertEqual(buffer.name_list(3), ["OBJECT 1", "OBJECT 0", "OBJECT 1"])
+        self.assertEqual(buffer.names, ["OBJECT 0", "OBJECT 1"])
+
+    def test_windows_are_views(self):
+        buffer = TrackingBuffer(capacity=4)
+        for i in range(6):
+            buffer.append(float(i), "ISS", float(i), 0.0, 0.0)
+        window = buffer.window(3)
+        self.assertTrue(all(np.shares_memory(view, buffer.columns[key]) for key, view in window.items()))
+        np.testing.assert_array_equal(buffer.since(4.0)['altitudes'], [4.0, 5.0])
+        self.assertEqual(len(buffer.window(10)['timestamps']), 4)
+
+    def test_append_cost_does_not_grow_with_capacity(self):
+        timings = []
+        for capacity in (1000, 1000000):
+            buffer = TrackingBuffer(capacity)
+            started = time.perf_counter()
+            for i in range(3000):
+                buffer.append(float(i), "ISS", 1.0, 2.0, 3.0)
+            timings.append(time.perf_counter() - started)
+        self.assertLess(timings[1], 3 * timings[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
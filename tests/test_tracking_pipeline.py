@@ -0,0 +1,271 @@
+import sys
+import os
+import io
+import queue
+import time
+import unittest
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from skyfield.api import load
+from target_scheduler import TargetPlan
+from tracking_buffer import TrackingBuffer
+from tracking_pipeline import TrackingPipeline, offer, scheduled_target, select_target
+
+
+class FakeTracker:
+    class ts:
+        @staticmethod
+        def now():
+            return time.monotonic()
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.location = None
+        self.lock = None
+        self.moved_under_lock = []
+
+    def set_location(self, location):
+        self.moved_under_lock.append(self.lock is not None and self.lock.locked())
+        self.location = location
+
+    def calculate_positions(self, catalog, t=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {25544: {'altitude': 40.0 + self.calls, 'azimuth': 120.0, 'distance': 800.0, 'visible': True}}
+
+    def trajectory(self, catalog, key, duration=60.0, step=1.0, start=None):
+        now = time.time()
+        return [now, now + duration], [120.0, 130.0], [40.0, 50.0]
+
+
+class FakeStreamingHardware:
+    def __init__(self):
+        self.trajectories = []
+        self.streaming = False
+        self.end = None
+
+    def set_trajectory(self, times, azimuths, altitudes):
+        self.trajectories.append(times)
+        self.end = times[-1]
+
+    def clear_trajectory(self):
+        self.end = None
+
+    def trajectory_end(self):
+        return self.end
+
+    def start_stream(self):
+        self.streaming = True
+
+    def stop_stream(self):
+        self.streaming = False
+
+    def move_servos(self, azimuth, altitude):
+        raise AssertionError("servo stage should not run while streaming")
+
+
+class FakeCatalog:
+    def name(self, norad_id):
+        return f"OBJECT {norad_id}"
+
+
+class FakeHardware:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.commands = []
+
+    def move_servos(self, azimuth, altitude):
+        self.commands.append((time.monotonic(), azimuth, altitude))
+        time.sleep(self.delay)
+
+
+class FakeUI:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.frames = []
+        self.tracking_data = TrackingBuffer(100)
+
+    def display_tracking_info(self, name, altitude, azimuth, distance, visible, loc):
+        self.frames.append((name, altitude))
+        time.sleep(self.delay)
+
+    def record_tracking(self, name, altitude, azimuth, distance, visible):
+        self.tracking_data.append(time.time(), name, altitude, azimuth, distance)
+
+    def generate_sky_map(self):
+        pass
+
+
+class FakeDashboard:
+    def __init__(self):
+        self.draws = []
+        self.closed = False
+        self.printed = []
+
+    def write(self, text):
+        self.printed.append(text)
+
+    def flush(self):
+        pass
+
+    def render(self, target, visible_objects, name, location, timings=None, rates=None):
+        self.draws.append((target, visible_objects, timings))
+
+    def close(self):
+        self.closed = True
+
+
+class TestTrackingPipeline(unittest.TestCase):
+
+    def test_servo_rate_independent_of_slow_rendering(self):
+        hardware = FakeHardware()
+        ui = FakeUI(delay=0.4)
+        pipeline = TrackingPipeline(FakeTracker(), FakeCatalog(), hardware, ui, (17.4, 78.3),
+                                    propagate_interval=0.05, servo_interval=0.05)
+        pipeline.run(duration=1.0)
+
+        times = [t for t, _, _ in hardware.commands]
+        self.assertGreaterEqual(len(times), 15)
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        self.assertLess(max(gaps), 0.2)
+        self.assertLessEqual(len(ui.frames), 4)
+        self.assertEqual(ui.frames[0][0], "OBJECT 25544")
+
+    def test_rendering_continues_while_serial_blocks(self):
+        hardware = FakeHardware(delay=0.5)
+        ui = FakeUI()
+        pipeline = TrackingPipeline(FakeTracker(), FakeCatalog(), hardware, ui, (17.4, 78.3),
+                                    propagate_interval=0.05, servo_interval=0.05)
+        pipeline.run(duration=1.0)
+        self.assertGreaterEqual(len(ui.frames), 10)
+
+    def test_stages_stop(self):
+        pipeline = TrackingPipeline(FakeTracker(), FakeCatalog(), FakeHardware(), FakeUI(), (0, 0),
+                                    propagate_interval=0.05, servo_interval=0.05)
+        pipeline.run(duration=0.2)
+        self.assertEqual(pipeline._threads, [])
+
+    def test_dashboard_draws_at_its_own_rate(self):
+        dashboard = FakeDashboard()
+        ui = FakeUI()
+        pipeline = TrackingPipeline(FakeTracker(), FakeCatalog(), FakeHardware(), ui, (0, 0),
+                                    propagate_interval=0.05, servo_interval=0.05,
+                                    dashboard=dashboard, display_interval=0.25)
+        pipeline.run(duration=1.0)
+
+        # Every frame is recorded but only drawn four or five times a second.
+        self.assertGreaterEqual(len(ui.tracking_data), 10)
+        self.assertEqual(ui.frames, [])
+        self.assertTrue(3 <= len(dashboard.draws) <= 5)
+        self.assertTrue(dashboard.closed)
+        target, visible, timings = dashboard.draws[-1]
+        self.assertEqual(target[0], 25544)
+        self.assertEqual(list(visible), [25544])
+        self.assertIn('propagation', timings)
+        self.assertIn('selection', timings)
+
+    def test_stage_errors_print_to_the_dashboard(self):
+        class BrokenHardware(FakeHardware):
+            def move_servos(self, azimuth, altitude):
+                raise IOError("port closed")
+
+        dashboard = FakeDashboard()
+        stdout = sys.stdout
+        pipeline = TrackingPipeline(FakeTracker(), FakeCatalog(), BrokenHardware(), FakeUI(), (0, 0),
+                                    propagate_interval=0.05, servo_interval=0.05, dashboard=dashboard)
+        pipeline.run(duration=0.3)
+        self.assertIn("Error in servo stage: port closed", "".join(dashboard.printed))
+        self.assertIs(sys.stdout, stdout)
+
+    def test_selection_survives_errors(self):
+        class FlakyHistory:
+            calls = 0
+
+            def record(self, *args):
+                FlakyHistory.calls += 1
+                if FlakyHistory.calls == 1:
+                    raise IOError("disk full")
+
+        hardware = FakeHardware()
+        ui = FakeUI()
+        pipeline = TrackingPipeline(FakeTracker(), FakeCatalog(), hardware, ui, (0, 0),
+                                    propagate_interval=0.05, servo_interval=0.05, history=FlakyHistory())
+        output = io.StringIO()
+        with redirect_stdout(output):
+            pipeline.run(duration=0.5)
+        self.assertIn("Error in selection stage: disk full", output.getvalue())
+        self.assertGreater(FlakyHistory.calls, 3)
+        self.assertGreater(len(ui.frames), 3)
+        self.assertIn('selection', pipeline.timings)
+
+    def test_stream_mode_hands_trajectories_to_hardware(self):
+        hardware = FakeStreamingHardware()
+        pipeline = TrackingPipeline(FakeTracker(), FakeCatalog(), hardware, FakeUI(), (0, 0),
+                                    propagate_interval=0.05, stream=True, trajectory_seconds=60.0)
+        pipeline.start()
+        time.sleep(0.3)
+        self.assertTrue(hardware.streaming)
+        pipeline.stop()
+
+        self.assertFalse(hardware.streaming)
+        # The same target keeps its trajectory until half of it is used.
+        self.assertEqual(len(hardware.trajectories), 1)
+
+    def test_location_applied_under_tracker_lock(self):
+        tracker = FakeTracker()
+        location = [0.0, 0.0]
+        pipeline = TrackingPipeline(tracker, FakeCatalog(), FakeHardware(), FakeUI(), location,
+                                    propagate_interval=0.05)
+        tracker.lock = pipeline._tracker_lock
+        pipeline.start()
+        pipeline.set_location([12.0, 30.0])
+        deadline = time.time() + 2.0
+        while tracker.location is None and time.time() < deadline:
+            time.sleep(0.01)
+        pipeline.stop()
+        self.assertEqual(tracker.location, [12.0, 30.0])
+        self.assertEqual(tracker.moved_under_lock, [True])
+        self.assertEqual(location, [12.0, 30.0])
+
+    def test_offer_drops_oldest(self):
+        q = queue.Queue(maxsize=2)
+        for item in range(5):
+            offer(q, item)
+        self.assertEqual([q.get_nowait(), q.get_nowait()], [3, 4])
+
+    def test_select_target(self):
+        self.assertIsNone(select_target({}))
+        visible = {1: {'visible': False}, 2: {'visible': True}}
+        self.assertEqual(select_target(visible)[0], 2)
+
+    def test_scheduled_target_must_be_visible(self):
+        class FakeScheduler:
+            plan = TargetPlan([3], [0.0], [1.0], [0.0])
+
+            def target(self, catalog, t, lock=None):
+                return 3
+
+        visible = {2: {'visible': True}, 3: {'visible': True}}
+        t = load.timescale().tt_jd(0.5)
+        self.assertEqual(scheduled_target(FakeScheduler(), None, t, visible)[0], 3)
+        self.assertIsNone(scheduled_target(FakeScheduler(), None, t, {2: {'visible': True}}))
+
+    def test_scheduled_target_while_slewing(self):
+        class FakeScheduler:
+            plan = TargetPlan([3], [2460806.0], [2460806.1], [30.0], joined=[2460806.05],
+                              azimuth=[90.0], altitude=[10.0])
+
+            def target(self, catalog, t, lock=None):
+                return 3
+
+        t = load.timescale().tt_jd(2460806.0 + 0.04)
+        key, data = scheduled_target(FakeScheduler(), None, t, {})
+        self.assertEqual(key, 3)
+        self.assertEqual((data['azimuth'], data['altitude'], data['visible']), (90.0, 10.0, False))
+        self.assertAlmostEqual(data['joined'] - t.utc_datetime().timestamp(), 0.01 * 86400, places=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
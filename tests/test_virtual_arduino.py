@@ -0,0 +1,100 @@
+import sys
+import os
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hardware_controller import HardwareController
+from virtual_arduino import ServoModel, VirtualArduino
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestServoModel(unittest.TestCase):
+
+    def test_servos_slew_and_clamp(self):
+        servos = ServoModel(slew_rate=100.0, azimuth=0.0, altitude=0.0)
+        servos.command(90.0, 250.0, at=10.0)
+        self.assertEqual(servos.position_at(10.5), (50.0, 50.0))
+        self.assertEqual(servos.position_at(20.0), (90.0, 180.0))
+
+
+@unittest.skipUnless(os.name == 'posix', "needs a pseudo-terminal")
+class TestVirtualArduino(unittest.TestCase):
+
+    def setUp(self):
+        self.board = VirtualArduino(gps_interval=0.1, location=(12.5, 77.25))
+        self.board.start()
+
+    def tearDown(self):
+        self.board.close()
+
+    def test_ascii_commands_and_gps(self):
+        hardware = HardwareController(port=self.board.port)
+        try:
+            self.assertEqual(hardware.connect(fix_timeout=2.0), [12.5, 77.25])
+            hardware.move_servos(123.456, 45.9)
+            self.assertTrue(_wait_for(lambda: self.board.received()))
+        finally:
+            hardware.close()
+        _, kind, azimuth, altitude = self.board.received()[0]
+        # The sketch truncates with toInt().
+        self.assertEqual((kind, azimuth, altitude), ('ascii', 123.0, 45.0))
+
+    def test_binary_commands_are_acked(self):
+        hardware = HardwareController(port=self.board.port, protocol="binary")
+        try:
+            hardware.connect(fix_timeout=2.0)
+            for i in range(10):
+                hardware.move_servos(100.0 + i, 30.25)
+                time.sleep(0.01)
+            self.assertTrue(hardware.binary_link().wait_idle(2.0))
+            stats = hardware.link_stats()
+        finally:
+            hardware.close()
+        self.assertEqual(stats['acked'], 10)
+        self.assertEqual(stats['failed'], 0)
+        received = self.board.received('point')
+        self.assertEqual([command[2] for command in received], [100.0 + i for i in range(10)])
+        self.assertEqual(received[-1][3], 30.25)
+
+    def test_resent_trajectory_point_is_not_queued_twice(self):
+        hardware = HardwareController(port=self.board.port, protocol="binary")
+        # Seq 0 clears the queue; the ack of the second point is lost.
+        self.board.lost_acks.add(2)
+        try:
+            hardware.connect(fix_timeout=2.0)
+            now = time.time()
+            sent = hardware.upload_trajectory([now + 0.2 + 0.1 * i for i in range(5)],
+                                              [90.0 + i for i in range(5)], [30.0] * 5)
+            self.assertTrue(_wait_for(lambda: len(self.board.played) >= 5))
+            time.sleep(0.2)
+            stats = hardware.link_stats()
+        finally:
+            hardware.close()
+        self.assertEqual(sent, 5)
+        self.assertGreaterEqual(stats['retransmits'], 1)
+        self.assertEqual([azimuth for _, azimuth, _ in self.board.played], [90.0 + i for i in range(5)])
+        self.assertEqual(self.board.duplicates, 1)
+
+    def test_commands_are_paced_by_the_baud_rate(self):
+        hardware = HardwareController(port=self.board.port)
+        try:
+            hardware.connect(fix_timeout=2.0)
+            for _ in range(20):
+                hardware.move_servos(90.0, 45.0)
+            self.assertTrue(_wait_for(lambda: len(self.board.received()) == 20))
+        finally:
+            hardware.close()
+        times = [command[0] for command in self.board.received()]
+        # "SERVO,90.0,45.0\n" is 16 bytes, about 17 ms at 9600 baud.
+        self.assertGreaterEqual(times[-1] - times[0], 19 * 16 * 10 / 9600 * 0.99)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_manager import DataManager
+from debris_tracker import DebrisTracker
+from visibility_filter import ReachabilityIndex
+
+TLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'tle_cache', 'debris_active_20250510_0939.tle')
+
+
+class TestReachabilityIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        debris = DataManager().load_tle_file(TLE_FILE)
+        cls.debris = dict(list(debris.items())[:3000])
+
+    def test_prefilter_finds_every_visible_object(self):
+        """Objects above the horizon at any time in the refresh window must be candidates"""
+        for loc in ([17.389801, 78.321151], [68.0, 15.0], [-40.0, -70.0]):
+            full = DebrisTracker(loc, batched=True)
+            filtered = DebrisTracker(loc, prefilter=True, refresh_interval=120.0)
+            for second in (0, 45, 90, 119):
+                t = full.ts.utc(2025, 5, 10, 12, 0, second)
+                self.assertEqual(set(full.calculate_positions(self.debris, t)),
+                                 set(filtered.calculate_positions(self.debris, t)))
+
+    def test_candidates_are_a_small_fraction(self):
+        tracker = DebrisTracker([17.389801, 78.321151], prefilter=True)
+        t = tracker.ts.utc(2025, 5, 10, 12)
+        candidates = tracker.candidate_array(self.debris, t)
+        self.assertLess(len(candidates), len(self.debris) / 3)
+
+    def test_static_filter_drops_low_inclination_orbits_at_high_latitude(self):
+        tracker = DebrisTracker([0.0, 0.0], batched=True)
+        index = ReachabilityIndex(tracker.satellite_array(self.debris))
+        polar = set(index.static_candidates(85.0))
+        equatorial = set(index.static_candidates(0.0))
+        self.assertTrue(polar < equatorial)
+
+    def test_grid_refreshes_after_interval(self):
+        tracker = DebrisTracker([17.389801, 78.321151], batched=True)
+        index = ReachabilityIndex(tracker.satellite_array(self.debris), refresh_interval=60.0)
+        t = tracker.ts.utc(2025, 5, 10, 12)
+        index.candidates(t, tracker.location)
+        self.assertFalse(index.needs_refresh(tracker.ts.utc(2025, 5, 10, 12, 0, 30)))
+        self.assertTrue(index.needs_refresh(tracker.ts.utc(2025, 5, 10, 12, 1, 30)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import numpy as np
+
+COLUMNS = (('timestamps', np.float64), ('altitudes', np.float32), ('azimuths', np.float32),
+           ('distances', np.float32), ('name_ids', np.int32))
+
+
+class TrackingBuffer:
+    """
+    Fixed-capacity columnar history of tracked positions.
+
+    Each column is a preallocated NumPy array holding every sample twice,
+    at i and i + capacity, so the newest n samples are always one
+    contiguous slice: appending is O(1) and windows are views, never
+    copies.  Object names are interned to integer ids.  Timestamps are
+    POSIX seconds.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.columns = {key: np.zeros(2 * capacity, dtype=dtype) for key, dtype in COLUMNS}
+        self.names = []
+        self._name_ids = {}
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def name_id(self, name):
+        """Integer id of name, assigning the next one the first time it is seen."""
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def append(self, timestamp, name, altitude, azimuth, distance):
+        row = (timestamp, altitude, azimuth, distance, self.name_id(name))
+        head = self._head
+        for (key, _), value in zip(COLUMNS, row):
+            column = self.columns[key]
+            column[head] = value
+            column[head + self.capacity] = value
+        self._head = (head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    def _slice(self, n):
+        n = self._count if n is None else max(min(n, self._count), 0)
+        end = self._head + self.capacity
+        return slice(end - n, end)
+
+    def column(self, key, n=None):
+        """View of the newest n (default all) values of column key, oldest first."""
+        return self.columns[key][self._slice(n)]
+
+    def window(self, n=None):
+        """Views of the newest n samples of every column."""
+        span = self._slice(n)
+        return {key: self.columns[key][span] for key, _ in COLUMNS}
+
+    def since(self, timestamp):
+        """Views of the samples taken at or after timestamp."""
+        times = self.column('timestamps')
+        return self.window(len(times) - int(np.searchsorted(times, timestamp)))
+
+    def name_list(self, n=None):
+        return [self.names[i] for i in self.column('name_ids', n)]
+
+    def __getitem__(self, key):
+        if key == 'names':
+            return self.name_list()
+        return self.column(key)
@@ -0,0 +1,336 @@
+import contextlib
+import queue
+import threading
+import time
+import numpy as np
+
+DAY_S = 86400.0
+
+
+def select_target(visible_objects):
+    """Pick the object to point at: the first visible one, as the tracking loop always has."""
+    for norad_id, data in visible_objects.items():
+        if data.get('visible', False) is True:
+            return norad_id, data
+    return None
+
+
+def scheduled_target(scheduler, catalog, t, visible_objects, lock=None):
+    """
+    The scheduler's target for time t, if it is among the visible objects.
+    While the mount slews to the next track, the target is that object at
+    the point the track is joined, not visible, with 'joined' the POSIX
+    time it is reached.
+    """
+    key = scheduler.target(catalog, t, lock)
+    if key is None:
+        return None
+    slew = scheduler.plan.slew_at(t.tt)
+    if slew is not None and slew[0] == key:
+        _, azimuth, altitude, joined = slew
+        return key, {
+            'altitude': altitude,
+            'azimuth': azimuth,
+            'distance': float('nan'),
+            'visible': False,
+            'joined': t.utc_datetime().timestamp() + (joined - t.tt) * DAY_S,
+        }
+    if key in visible_objects:
+        return key, visible_objects[key]
+    return None
+
+
+def offer(q, item):
+    """Put item on a bounded queue, dropping the oldest entry if it is full."""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class TrackingPipeline:
+    """
+    Runs the tracking loop as separate stages that each keep their own
+    cadence, so a slow step no longer holds up the others:
+
+    - propagation computes the visible objects every propagate_interval s,
+    - selection picks the target from each new set of positions,
+    - servo output sends the latest target every servo_interval s,
+    - rendering updates the display and plots as fast as it can keep up.
+
+    Stages pass data through bounded queues that drop the oldest entry
+    when full, so a stage that falls behind always sees the newest data.
+    Propagation, selection and servo output run in worker threads;
+    rendering runs on the calling thread, which keeps matplotlib there.
+
+    With stream set, the servo stage is replaced by the hardware's own
+    streaming thread: selection hands it a trajectory_seconds look-ahead
+    track of the target, refreshed when the target changes or half of it
+    has been used, and the hardware interpolates it at its stream rate.
+
+    With a scheduler, selection follows its plan instead of taking the
+    first visible object, and sends the mount to where the next track is
+    joined as soon as the one before it ends.  Replanning reads the
+    tracker under the lock but plans outside it, so propagation goes on.
+
+    With a dashboard (a TerminalDashboard), every frame is still recorded
+    for the plots but the screen is redrawn in place every
+    display_interval seconds from the newest frame, independent of the
+    propagation rate, showing the visible objects and stage timings.
+    While it runs, anything printed goes to the dashboard's status lines
+    rather than scrolling the screen under it.
+
+    With a history (a HistoryStore), selection logs every target it picks.
+
+    A new observer location, e.g. from a GPS listener thread, is handed in
+    with set_location() and applied by the propagation stage under the
+    tracker lock, between ticks.
+    """
+
+    def __init__(self, tracker, catalog, hardware, ui, location, propagate_interval=1.0,
+                 servo_interval=0.5, sky_map_interval=60, queue_size=2, stream=False,
+                 trajectory_seconds=60.0, scheduler=None, dashboard=None, display_interval=0.2,
+                 history=None):
+        self.tracker = tracker
+        self.catalog = catalog
+        self.hardware = hardware
+        self.ui = ui
+        self.location = location
+        self.propagate_interval = propagate_interval
+        self.servo_interval = servo_interval
+        self.sky_map_interval = sky_map_interval
+
+        self.positions = queue.Queue(maxsize=queue_size)
+        self.targets = queue.Queue(maxsize=queue_size)
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.locations = queue.Queue(maxsize=1)
+        self.stream = stream
+        self.trajectory_seconds = trajectory_seconds
+        self.scheduler = scheduler
+        self.dashboard = dashboard
+        self.display_interval = display_interval
+        self.history = history
+        self.timings = {}
+        self.display_rate = None
+        self.stop_event = threading.Event()
+        self.target = None
+        self._streamed_key = None
+        self._tracker_lock = threading.Lock()
+        self._threads = []
+
+    def _timed(self, name, started):
+        """Record how long a run of stage name took: (last, moving average) in seconds."""
+        elapsed = time.monotonic() - started
+        _, average = self.timings.get(name, (elapsed, elapsed))
+        self.timings[name] = (elapsed, average + 0.1 * (elapsed - average))
+
+    def _every(self, interval, step, name):
+        """Call step every interval seconds on a fixed schedule until stopped."""
+        next_run = time.monotonic()
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            try:
+                step()
+            except Exception as e:
+                print(f"Error in {name} stage: {str(e)}")
+            self._timed(name, started)
+            next_run += interval
+            delay = next_run - time.monotonic()
+            if delay < 0:
+                # Fell behind; skip the missed runs rather than bursting.
+                next_run = time.monotonic()
+                delay = 0
+            self.stop_event.wait(delay)
+
+    def set_location(self, location):
+        """Queue a new observer location; safe to call from any thread."""
+        offer(self.locations, list(location))
+
+    def _apply_location(self):
+        """Move the tracker to the newest queued location; call with the tracker lock held."""
+        try:
+            location = self.locations.get_nowait()
+        except queue.Empty:
+            return
+        self.tracker.set_location(location)
+        # The UI and history are given this list, so update it in place.
+        self.location[:] = location
+
+    def _propagate(self):
+        with self._tracker_lock:
+            self._apply_location()
+            t = self.tracker.ts.now()
+            visible_objects = self.tracker.calculate_positions(self.catalog, t)
+        offer(self.positions, (t, visible_objects))
+
+    def _select(self):
+        while not self.stop_event.is_set():
+            try:
+                t, visible_objects = self.positions.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            started = time.monotonic()
+            try:
+                self._select_from(t, visible_objects)
+            except Exception as e:
+                print(f"Error in selection stage: {str(e)}")
+            self._timed('selection', started)
+
+    def _select_from(self, t, visible_objects):
+        if self.scheduler is not None:
+            target = scheduled_target(self.scheduler, self.catalog, t, visible_objects, self._tracker_lock)
+        else:
+            target = select_target(visible_objects)
+        if target is not None and target[1]['visible'] and self.history is not None:
+            norad_id, data = target
+            self.history.record(time.time(), norad_id, data['azimuth'], data['altitude'], data['distance'],
+                                self.location)
+        if self.stream:
+            self._update_trajectory(target)
+        else:
+            offer(self.targets, target)
+        offer(self.frames, (t, target, visible_objects))
+
+    def _update_trajectory(self, target):
+        if target is None:
+            self.hardware.clear_trajectory()
+            self._streamed_key = None
+            return
+        key, data = target
+        end = self.hardware.trajectory_end()
+        if key == self._streamed_key and end is not None and end - time.time() > self.trajectory_seconds / 2:
+            return
+        try:
+            joined = data.get('joined')
+            with self._tracker_lock:
+                times, azimuths, altitudes = self.tracker.trajectory(self.catalog, key, self.trajectory_seconds,
+                                                                     start=joined)
+            now = time.time()
+            if joined is not None and len(times) and times[0] > now:
+                # Still slewing: hold where the track is joined until then.
+                times = np.concatenate([[now], times])
+                azimuths = np.concatenate([[data['azimuth']], azimuths])
+                altitudes = np.concatenate([[data['altitude']], altitudes])
+            self.hardware.set_trajectory(times, azimuths, altitudes)
+            self._streamed_key = key
+        except Exception as e:
+            print(f"Error computing trajectory for {key}: {str(e)}")
+
+    def _servo(self):
+        # Keep pointing at the last target until selection sends a newer one.
+        while True:
+            try:
+                self.target = self.targets.get_nowait()
+            except queue.Empty:
+                break
+        if self.target is not None:
+            _, data = self.target
+            self.hardware.move_servos(data['azimuth'], data['altitude'])
+
+    def _render(self, frame):
+        _, target, visible_objects = frame
+        if target is None and visible_objects:
+            target = next(iter(visible_objects.items()))
+        if target is None:
+            self.ui.display_tracking_info("No objects", 0.0, 0.0, 0.0, False, self.location)
+            return
+        norad_id, data = target
+        self.ui.display_tracking_info(self.catalog.name(norad_id), data['altitude'], data['azimuth'],
+                                      data['distance'], data['visible'], self.location)
+
+    def _record(self, frame):
+        """Keep the target of a frame for the plots without drawing it."""
+        _, target, _ = frame
+        if target is not None:
+            norad_id, data = target
+            self.ui.record_tracking(self.catalog.name(norad_id), data['altitude'], data['azimuth'],
+                                    data['distance'], data['visible'])
+
+    def _draw(self, frame):
+        _, target, visible_objects = frame
+        visible = {key: data for key, data in visible_objects.items() if data.get('visible', False)}
+        rates = {'propagation': 1.0 / self.propagate_interval}
+        if self.display_rate is not None:
+            rates['display'] = self.display_rate
+        self.dashboard.render(target, visible, self.catalog.name, self.location, dict(self.timings), rates)
+
+    def start(self):
+        """Start the propagation, selection and servo stages."""
+        self.stop_event.clear()
+        stages = [
+            ('propagation', lambda: self._every(self.propagate_interval, self._propagate, 'propagation')),
+            ('selection', self._select),
+        ]
+        if self.stream:
+            self.hardware.start_stream()
+        else:
+            stages.append(('servo', lambda: self._every(self.servo_interval, self._servo, 'servo')))
+        self._threads = [threading.Thread(target=run, name=f"tracking-{name}", daemon=True)
+                         for name, run in stages]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=5.0):
+        self.stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self.stream:
+            self.hardware.stop_stream()
+
+    def run(self, duration=None):
+        """
+        Start the worker stages and render on this thread until stopped,
+        interrupted or, if given, duration seconds have passed.
+        """
+        output = contextlib.nullcontext() if self.dashboard is None else contextlib.redirect_stdout(self.dashboard)
+        try:
+            with output:
+                self._run(duration)
+        finally:
+            if self.dashboard is not None:
+                self.dashboard.close()
+
+    def _run(self, duration):
+        self.start()
+        started = time.monotonic()
+        last_sky_map_time = time.time()
+        latest = None
+        next_draw = last_draw = started
+        try:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                if duration is not None and now - started >= duration:
+                    break
+                if self.dashboard is not None and latest is not None and now >= next_draw:
+                    self._draw(latest)
+                    self._timed('render', now)
+                    if now > last_draw:
+                        rate = 1.0 / (now - last_draw)
+                        self.display_rate = rate if self.display_rate is None else self.display_rate + 0.2 * (rate - self.display_rate)
+                    last_draw = now
+                    next_draw += self.display_interval
+                    if next_draw < now:
+                        next_draw = now + self.display_interval
+                timeout = 0.1 if self.dashboard is None else min(max(next_draw - time.monotonic(), 0.001), 0.1)
+                try:
+                    frame = self.frames.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+                if self.dashboard is not None:
+                    self._record(frame)
+                    latest = frame
+                else:
+                    self._render(frame)
+
+                current_time = time.time()
+                if current_time - last_sky_map_time >= self.sky_map_interval and len(self.ui.tracking_data):
+                    self.ui.generate_sky_map()
+                    last_sky_map_time = current_time
+        finally:
+            self.stop()
@@ -4,19 +4,17 @@ import numpy as np
 import time
 from datetime import datetime
 import matplotlib.dates as mdates
+from tracking_buffer import TrackingBuffer
+from plot_renderer import date_numbers
 
 class DebrisTrackerUI:
-    def __init__(self):
+    def __init__(self, history_size=1000):
         self.clear_terminal()
-        self.tracking_data = {
-            'timestamps': [],
-            'altitudes': [],
-            'azimuths': [],
-            'distances': [],
-            'names': []
-        }
+        self.tracking_data = TrackingBuffer(history_size)
         self.last_plot_time = time.time()
         self.plot_interval = 30  
+        # A plot_renderer.RenderWorker; when set, plots are drawn off-process.
+        self.renderer = None
         
     def clear_terminal(self):
         os.system('cls' if os.name == 'nt' else 'clear')
@@ -39,46 +37,59 @@ class DebrisTrackerUI:
         print("╚═════════════════════════════════════════════════════╝")
         print("\nPress Ctrl+C to stop tracking")
 
+        self.record_tracking(name, altitude, azimuth, distance, visible)
+
+    def record_tracking(self, name, altitude, azimuth, distance, visible):
+        """Keep a visible position for the plots and refresh them every plot_interval."""
         if visible:
             self.store_tracking_data(name, altitude, azimuth, distance)
-            
+
         current_time = time.time()
         if current_time - self.last_plot_time >= self.plot_interval and len(self.tracking_data['timestamps']) > 1:
             self.plot_tracking_data()
             self.last_plot_time = current_time
 
     def store_tracking_data(self, name, altitude, azimuth, distance):
-        self.tracking_data['timestamps'].append(datetime.now())
-        self.tracking_data['altitudes'].append(altitude)
-        self.tracking_data['azimuths'].append(azimuth)
-        self.tracking_data['distances'].append(distance)
-        self.tracking_data['names'].append(name)
-        max_points = 1000
-        if len(self.tracking_data['timestamps']) > max_points:
-            for key in self.tracking_data:
-                self.tracking_data[key] = self.tracking_data[key][-max_points:]
+        self.tracking_data.append(time.time(), name, altitude, azimuth, distance)
+
+    def snapshot(self, n=None):
+        """Copy of the newest n samples, with times as Matplotlib date numbers."""
+        window = self.tracking_data.window(n)
+        return {
+            'times': date_numbers(window['timestamps']),
+            'altitudes': np.array(window['altitudes'], dtype=float),
+            'azimuths': np.array(window['azimuths'], dtype=float),
+            'distances': np.array(window['distances'], dtype=float),
+            'names': self.tracking_data.name_list(20),
+        }
 
     def plot_tracking_data(self):
-        if not self.tracking_data['timestamps']:
+        if not len(self.tracking_data):
+            return
+        if self.renderer is not None:
+            self.renderer.poll()
+            self.renderer.submit('track', self.snapshot())
             return
             
+        window = self.tracking_data.window()
+        times = date_numbers(window['timestamps'])
         plt.figure(figsize=(12, 10))
         plt.subplot(3, 1, 1)
-        plt.plot(self.tracking_data['timestamps'], self.tracking_data['altitudes'], 'b-')
+        plt.plot(times, window['altitudes'], 'b-')
         plt.title('Altitude Over Time')
         plt.ylabel('Altitude (degrees)')
         plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
         plt.grid(True)
 
         plt.subplot(3, 1, 2)
-        plt.plot(self.tracking_data['timestamps'], self.tracking_data['azimuths'], 'r-')
+        plt.plot(times, window['azimuths'], 'r-')
         plt.title('Azimuth Over Time')
         plt.ylabel('Azimuth (degrees)')
         plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
         plt.grid(True)
         
         plt.subplot(3, 1, 3)
-        plt.plot(self.tracking_data['timestamps'], self.tracking_data['distances'], 'g-')
+        plt.plot(times, window['distances'], 'g-')
         plt.title('Distance Over Time')
         plt.ylabel('Distance (km)')
         plt.xlabel('Time')
@@ -99,15 +110,19 @@ class DebrisTrackerUI:
         print(f"\nPlot saved to tracking_plots/debris_track_{timestamp}.png")
 
     def generate_sky_map(self):
-        if not self.tracking_data['timestamps']:
+        if not len(self.tracking_data):
+            return
+        if self.renderer is not None:
+            self.renderer.poll()
+            self.renderer.submit('sky_map', self.snapshot(20))
             return
             
         plt.figure(figsize=(8, 8))
         ax = plt.subplot(111, projection='polar')
         
-        azimuths = np.radians(self.tracking_data['azimuths'][-20:]) 
-        altitudes = [90 - alt for alt in self.tracking_data['altitudes'][-20:]]
-        names = self.tracking_data['names'][-20:]
+        window = self.tracking_data.window(20)
+        azimuths = np.radians(window['azimuths'])
+        altitudes = 90 - window['altitudes']
         
         sc = ax.scatter(azimuths, altitudes, c=range(len(azimuths)), cmap='viridis', alpha=0.7, s=50)
        
@@ -0,0 +1,313 @@
+import os
+import re
+import sys
+import time
+import threading
+import select
+from servo_protocol import (ACK, POINT, STATUS_OK, STATUS_QUEUE_FULL, STATUS_UNKNOWN, TRAJECTORY_CLEAR,
+                            TRAJECTORY_POINT, StreamDecoder, azimuth_from_field, encode_frame)
+
+# Sequence numbers the board remembers, as the sketch does, to spot a
+# frame resent because its ack was lost.  At least the host's window.
+RECENT_FRAMES = 8
+
+
+def _to_int(text):
+    """Arduino String.toInt(): the leading integer, or 0."""
+    match = re.match(r'\s*(-?\d+)', text)
+    return int(match.group(1)) if match else 0
+
+
+class ServoModel:
+    """
+    Two hobby servos that each turn toward their last command at slew_rate
+    degrees per second, limited to 0-180 degrees like the sketch.
+    """
+
+    def __init__(self, slew_rate=300.0, azimuth=90.0, altitude=90.0):
+        self.slew_rate = slew_rate
+        self.position = [azimuth, altitude]
+        self.target = [azimuth, altitude]
+        self.updated = None
+
+    def _advance(self, at):
+        if self.updated is not None:
+            step = self.slew_rate * max(at - self.updated, 0.0)
+            for axis in range(2):
+                delta = self.target[axis] - self.position[axis]
+                self.position[axis] += max(-step, min(step, delta))
+        self.updated = at
+
+    def command(self, azimuth, altitude, at):
+        self._advance(at)
+        self.target = [min(max(azimuth, 0.0), 180.0), min(max(altitude, 0.0), 180.0)]
+
+    def position_at(self, at):
+        """(azimuth, altitude) the servos have reached at time at."""
+        position, updated = list(self.position), self.updated
+        self._advance(at)
+        reached = tuple(self.position)
+        self.position, self.updated = position, updated
+        return reached
+
+
+class VirtualArduino:
+    """
+    Software stand-in for sketch_apr16a on a pseudo-terminal, so
+    HardwareController can be run and benchmarked without a board.
+
+    Open port with HardwareController like a real serial port.  The device
+    prints "Waiting for GPS signal..." and then a location line every
+    gps_interval seconds, accepts ASCII SERVO commands and binary frames
+    (acking frames and playing queued trajectory points as the sketch
+    does), and drives a ServoModel.  Bytes are taken off the line no faster
+    than baud_rate allows, and every command is recorded in commands as
+    (time, kind, azimuth, altitude), timed when its last byte would have
+    arrived.  Queued points are recorded in played as they are reached.
+    A frame resent because its ack was lost is acked again but not
+    repeated; add a sequence number to lost_acks to lose its next ack.
+    POSIX only.
+    """
+
+    def __init__(self, location=(17.389801, 78.321151), baud_rate=9600, gps_interval=1.0,
+                 slew_rate=300.0, queue_size=32):
+        import pty
+        import tty
+        self.location = location
+        self.baud_rate = baud_rate
+        self.gps_interval = gps_interval
+        self.queue_size = queue_size
+        self.servos = ServoModel(slew_rate)
+        self.commands = []
+        self.played = []
+        self.lost_acks = set()
+        self.duplicates = 0
+        self.acks = 0
+        self.bad_lines = 0
+        self.gps_lines = 0
+
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._decoder = StreamDecoder()
+        self._queue = []
+        self._recent = [None] * RECENT_FRAMES
+        self._last_seq = None
+        self._last_step = None
+        self._wire_clock = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="virtual-arduino", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _write(self, data):
+        try:
+            os.write(self._master, data)
+        except OSError:
+            pass
+
+    def _gps_line(self):
+        latitude, longitude = self.location
+        return f"Latitude: {latitude:.6f} | Longitude: {longitude:.6f}\r\n".encode()
+
+    def _run(self):
+        self._write(b"Waiting for GPS signal...\r\n")
+        next_gps = time.time() + self.gps_interval
+        while not self._stop.is_set():
+            timeout = max(min(next_gps - time.time(), 0.005 if self._queue else 0.05), 0.0)
+            try:
+                ready, _, _ = select.select([self._master], [], [], timeout)
+                data = os.read(self._master, 256) if ready else b""
+            except OSError:
+                break
+            if data:
+                self._receive(data)
+            now = time.time()
+            self._play(now)
+            if now >= next_gps:
+                self._write(self._gps_line())
+                self.gps_lines += 1
+                next_gps += self.gps_interval
+
+    def _receive(self, data):
+        # Bytes cannot arrive faster than the line rate: each command is
+        # handled, and timed, when its last byte would have come in.
+        received_at = time.time()
+        byte_time = 10.0 / self.baud_rate
+        for i in range(len(data)):
+            self._wire_clock = max(self._wire_clock, received_at) + byte_time
+            frames, lines = self._decoder.feed(data[i:i + 1])
+            if not frames and not lines:
+                continue
+            delay = self._wire_clock - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            for frame in frames:
+                self._handle_frame(frame, self._wire_clock)
+            for line in lines:
+                self._handle_line(line.strip(), self._wire_clock)
+
+    def _record(self, kind, azimuth, altitude, at):
+        with self._lock:
+            self.commands.append((at, kind, azimuth, altitude))
+
+    def _handle_line(self, line, at):
+        if not line.startswith("SERVO"):
+            self.bad_lines += 1
+            return
+        parts = line.split(',')
+        if len(parts) < 3:
+            self.bad_lines += 1
+            return
+        azimuth, altitude = _to_int(parts[1]), _to_int(parts[2])
+        self.servos.command(azimuth, altitude, at)
+        self._record('ascii', float(azimuth), float(altitude), at)
+
+    def _ack(self, seq, status):
+        if seq in self.lost_acks:
+            self.lost_acks.discard(seq)
+            return
+        self._write(encode_frame(ACK, seq, status, self.queue_size - len(self._queue), 0))
+        self.acks += 1
+
+    def _handle_frame(self, frame, at):
+        kind, seq, a, b, c = frame
+        recent = self._recent[seq % RECENT_FRAMES]
+        if recent is not None and recent[0] == seq and (self._last_seq - seq) % 256 < RECENT_FRAMES:
+            # Resent because the ack was lost: ack it again, do not redo it.
+            self.duplicates += 1
+            self._ack(seq, recent[1])
+            return
+        status = STATUS_OK
+        if kind == POINT:
+            azimuth, altitude = azimuth_from_field(a), b / 100.0
+            self.servos.command(azimuth, altitude, at)
+            self._record('point', azimuth, altitude, at)
+        elif kind == TRAJECTORY_POINT:
+            if len(self._queue) >= self.queue_size:
+                status = STATUS_QUEUE_FULL
+            else:
+                if not self._queue:
+                    self._last_step = at
+                self._queue.append((c / 1000.0, azimuth_from_field(a), b / 100.0))
+                self._record('trajectory', azimuth_from_field(a), b / 100.0, at)
+        elif kind == TRAJECTORY_CLEAR:
+            self._queue = []
+        else:
+            status = STATUS_UNKNOWN
+        self._recent[seq % RECENT_FRAMES] = (seq, status)
+        self._last_seq = seq
+        self._ack(seq, status)
+
+    def _play(self, now):
+        while self._queue and now - self._last_step >= self._queue[0][0]:
+            delay, azimuth, altitude = self._queue.pop(0)
+            self._last_step += delay
+            self.servos.command(azimuth, altitude, self._last_step)
+            with self._lock:
+                self.played.append((self._last_step, azimuth, altitude))
+
+    def received(self, kind=None):
+        """Commands recorded so far, optionally only those of one kind."""
+        with self._lock:
+            return [command for command in self.commands if kind is None or command[1] == kind]
+
+    def stats(self):
+        """Command count and the spacing between commands, in seconds."""
+        times = [command[0] for command in self.received()]
+        intervals = [b - a for a, b in zip(times, times[1:])]
+        return {
+            'commands': len(times),
+            'acks': self.acks,
+            'bad_frames': self._decoder.bad_frames,
+            'bad_lines': self.bad_lines,
+            'gps_lines': self.gps_lines,
+            'mean_interval': sum(intervals) / len(intervals) if intervals else None,
+            'max_interval': max(intervals) if intervals else None,
+        }
+
+
+def benchmark(seconds=10.0, protocol="ascii", stream_rate=25.0, baud_rate=9600):
+    """
+    Stream a slowly moving trajectory through HardwareController to a
+    VirtualArduino and report command latency (from the host write to the
+    command's last byte arriving) and updates that never arrived.
+    """
+    from hardware_controller import HardwareController
+
+    with VirtualArduino(baud_rate=baud_rate, gps_interval=1.0) as board:
+        hardware = HardwareController(port=board.port, baud_rate=baud_rate, stream_rate=stream_rate,
+                                      protocol=protocol)
+        sent = []
+        write = hardware._write_frame
+
+        def timed_write(frame):
+            sent.append(time.time())
+            write(frame)
+        hardware._write_frame = timed_write
+
+        location = hardware.connect(fix_timeout=5.0)
+        now = time.time()
+        hardware.set_trajectory([now, now + seconds], [10.0, 170.0], [20.0, 80.0])
+        hardware.start_stream()
+        time.sleep(seconds)
+        hardware.stop_stream()
+        if hardware.link is not None:
+            hardware.link.wait_idle(2.0)
+        time.sleep(0.5)
+        hardware.close()
+
+        received = board.received()
+        latencies = sorted(command[0] - sent_at for command, sent_at in zip(received, sent))
+        report = {
+            'protocol': protocol,
+            'location': location,
+            'sent': len(sent),
+            'received': len(received),
+            'lost': max(len(sent) - len(received), 0),
+            'rate': len(received) / seconds,
+            'latency_median': latencies[len(latencies) // 2] if latencies else None,
+            'latency_max': latencies[-1] if latencies else None,
+            'board': board.stats(),
+            'link': hardware.link_stats(),
+        }
+        return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        for protocol in ("ascii", "binary"):
+            report = benchmark(protocol=protocol, stream_rate=float(sys.argv[2]) if len(sys.argv) > 2 else 25.0)
+            print(f"{protocol}: {report['received']}/{report['sent']} commands at {report['rate']:.1f}/s, "
+                  f"median latency {report['latency_median'] * 1000:.1f} ms, "
+                  f"max {report['latency_max'] * 1000:.1f} ms, lost {report['lost']}")
+    else:
+        with VirtualArduino() as board:
+            print(f"Virtual Arduino listening on {board.port}; run main with port='{board.port}'. Ctrl-C to stop.")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                print(board.stats())
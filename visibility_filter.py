@@ -0,0 +1,136 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6378.135
+EARTH_ROTATION_RAD_S = 7.292115e-5
+
+
+def horizon_angle(height_km, radius_km=EARTH_RADIUS_KM):
+    """
+    Earth-central angle (radians) between a sub-satellite point and the
+    edge of the area from which an object at height_km is above the horizon.
+    """
+    height_km = np.maximum(height_km, 0.0)
+    return np.arccos(radius_km / (radius_km + height_km))
+
+
+class ReachabilityIndex:
+    """
+    Narrows a SatelliteArray down to the objects that could be above the
+    observer's horizon within the next refresh_interval seconds.
+
+    Two stages are used:
+    - a static test from the orbital elements alone: an object whose ground
+      track never comes closer to the observer's latitude than its apogee
+      visibility cone can never rise, and is dropped for good;
+    - a coarse grid of sub-satellite points, refreshed every
+      refresh_interval seconds, from which only objects whose footprint can
+      reach the observer before the next refresh are kept.
+    """
+
+    def __init__(self, sat_array, refresh_interval=120.0, cell_size_deg=10.0, margin_deg=2.0):
+        self.sat_array = sat_array
+        self.refresh_interval = refresh_interval
+        self.cell_size = np.radians(cell_size_deg)
+        self.margin = np.radians(margin_deg)
+        self.refreshed_at = None
+        self.refresh_count = 0
+
+        satrecs = sat_array.satrecs
+        radius = np.array([sat.radiusearthkm for sat in satrecs], dtype=float)
+        inclination = np.array([sat.inclo for sat in satrecs], dtype=float)
+        eccentricity = np.array([sat.ecco for sat in satrecs], dtype=float)
+        mean_motion = np.array([sat.no_kozai for sat in satrecs], dtype=float) / 60.0
+        self.apogee_km = np.array([sat.alta for sat in satrecs], dtype=float) * radius
+        self.perigee_km = np.array([sat.altp for sat in satrecs], dtype=float) * radius
+
+        # Highest latitude the ground track reaches and how far from it the
+        # object can still be seen.
+        self.max_latitude = np.where(inclination > np.pi / 2, np.pi - inclination, inclination)
+        self.cone = horizon_angle(self.apogee_km)
+
+        # Fastest the sub-satellite point can move across the ground: the
+        # perigee angular rate of the orbit plus the rotation of the Earth.
+        with np.errstate(invalid='ignore', divide='ignore'):
+            perigee_rate = mean_motion * (1.0 + eccentricity) ** 2 / (1.0 - eccentricity ** 2) ** 1.5
+        self.ground_rate = np.nan_to_num(perigee_rate, nan=np.inf) + EARTH_ROTATION_RAD_S
+
+        self._grid_indices = np.zeros(0, dtype=np.int64)
+        self._grid_cells = np.zeros(0, dtype=np.int64)
+        self._grid_vectors = np.zeros((0, 3))
+
+    def static_candidates(self, latitude_deg):
+        """Indices of objects whose orbit geometry allows them to rise at this latitude."""
+        latitude = np.radians(abs(latitude_deg))
+        reachable = self.max_latitude + self.cone + self.margin >= latitude
+        return np.flatnonzero(reachable)
+
+    def needs_refresh(self, t):
+        if self.refreshed_at is None:
+            return True
+        age = (t.tt - self.refreshed_at.tt) * 86400.0
+        return age < 0 or age >= self.refresh_interval
+
+    def refresh(self, t, location):
+        """Propagate the statically reachable objects once and rebuild the grid."""
+        indices = self.static_candidates(location.latitude.degrees)
+        errors, r_itrs = self.sat_array.subset(indices).itrs_positions(t)
+        r_itrs = r_itrs[:, 0, :]
+        ok = (errors[:, 0] == 0) & np.all(np.isfinite(r_itrs), axis=1)
+        indices, r_itrs = indices[ok], r_itrs[ok]
+
+        vectors = r_itrs / np.linalg.norm(r_itrs, axis=1)[:, None]
+        lat = np.arcsin(np.clip(vectors[:, 2], -1.0, 1.0))
+        lon = np.arctan2(vectors[:, 1], vectors[:, 0])
+        cells = self._cell_ids(lat, lon)
+
+        order = np.argsort(cells, kind='stable')
+        self._grid_indices = indices[order]
+        self._grid_cells = cells[order]
+        self._grid_vectors = vectors[order]
+        self.refreshed_at = t
+        self.refresh_count += 1
+
+    def candidates(self, t, location):
+        """
+        Indices into sat_array of every object that may be above the horizon
+        of location at time t.  Refreshes the grid when it has gone stale.
+        """
+        if self.needs_refresh(t):
+            self.refresh(t, location)
+
+        observer = np.asarray(location.itrs_xyz.km, dtype=float)
+        observer = observer / np.linalg.norm(observer)
+        window = self.refresh_interval
+        reach = self.cone + self.ground_rate * window + self.margin
+
+        # Pick the grid cells that can contain any object close enough, then
+        # do the exact per-object test only on those.
+        max_reach = np.max(reach[self._grid_indices]) if len(self._grid_indices) else 0.0
+        cell_ids = self._cells_within(observer, max_reach)
+        start = np.searchsorted(self._grid_cells, cell_ids, side='left')
+        stop = np.searchsorted(self._grid_cells, cell_ids, side='right')
+        rows = np.concatenate([np.arange(a, b) for a, b in zip(start, stop)] or [np.zeros(0, dtype=np.int64)])
+        if not len(rows):
+            return rows
+
+        indices = self._grid_indices[rows]
+        separation = np.arccos(np.clip(self._grid_vectors[rows] @ observer, -1.0, 1.0))
+        return np.sort(indices[separation <= reach[indices]])
+
+    def _cell_ids(self, lat, lon):
+        n_lon = int(np.ceil(2 * np.pi / self.cell_size))
+        row = np.floor((lat + np.pi / 2) / self.cell_size).astype(np.int64)
+        col = np.floor((lon + np.pi) / self.cell_size).astype(np.int64) % n_lon
+        return row * n_lon + col
+
+    def _cells_within(self, observer, radius):
+        n_lat = int(np.ceil(np.pi / self.cell_size))
+        n_lon = int(np.ceil(2 * np.pi / self.cell_size))
+        rows, cols = np.meshgrid(np.arange(n_lat), np.arange(n_lon), indexing='ij')
+        lat = np.clip(-np.pi / 2 + (rows + 0.5) * self.cell_size, -np.pi / 2, np.pi / 2)
+        lon = -np.pi + (cols + 0.5) * self.cell_size
+        centres = np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+        distance = np.arccos(np.clip(centres @ observer, -1.0, 1.0))
+        # A cell can hold points up to half its diagonal from its centre.
+        half_diagonal = self.cell_size * np.sqrt(2.0) / 2.0
+        return np.flatnonzero((distance <= radius + half_diagonal).ravel())